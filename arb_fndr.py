@@ -1,13 +1,57 @@
 "Finds arbitrage opportunity"
 
-from config import MIN_PROFIT_PERCENT, DEFAULT_TAKER_FEE_PERCENT
+import asyncio
+import time
+import numpy as np
+from config import (MIN_PROFIT_PERCENT, DEFAULT_TAKER_FEE_PERCENT, TOP_K_OPPORTUNITIES,
+                    MIN_TRADE_AMOUNT, MAX_TRADE_AMOUNT, SPREAD_OUTLIER_ZSCORE, SPREAD_OUTLIER_MIN_SAMPLES)
+from price_mtrx import PriceMatrix
+from idx_heap import IndexedHeap
+from order_book import size_trade
+from metrics import Metrics
 
 class ArbitrageFinder:
     """
     Identifies cross-exchange arbitrage opportunities.
     """
-    def __init__(self):
-        pass
+    def __init__(self, price_matrix=None):
+        """
+        Args:
+            price_matrix (PriceMatrix, optional): Matrix used by find_top_opportunities,
+                                                  e.g. a SharedPriceMatrix filled by ingestion workers.
+        """
+        # Dense symbol x exchange arrays reused across cycles by find_top_opportunities
+        self.price_matrix = PriceMatrix() if price_matrix is None else price_matrix
+        self.fee_percents = {} # {(symbol, exchange_id): taker fee percent}, see set_fee_percents
+
+        # Incremental mode state, fed by on_ticker_update:
+        # per-symbol heaps of fee-adjusted ask cost (min) and bid revenue (max, stored negated)
+        self.ask_heaps = {}
+        self.bid_heaps = {}
+        self.quotes = {} # {(symbol, exchange_id): (bid, ask)}
+        self.symbol_opportunities = {} # Current best opportunity per symbol
+        self.pending_symbols = set() # Symbols with an opportunity not yet consumed
+        self.opportunity_event = asyncio.Event()
+
+    def find_top_opportunities(self, all_market_data=None, k=TOP_K_OPPORTUNITIES):
+        """
+        Finds the k best cross-exchange opportunities using the vectorized
+        price matrix. Gives the same results as find_best_opportunity, which
+        is kept as the dict-based reference implementation.
+
+        Args:
+            all_market_data (dict, optional): A dictionary of market data
+                                   {(symbol, exchange_id): {bid, ask, timestamp}}.
+                                   None evaluates the matrix as it is, which is how a
+                                   SharedPriceMatrix is read without copying.
+            k (int): Maximum number of opportunities to return.
+
+        Returns:
+            list: Opportunity dicts sorted by net profit, best first.
+        """
+        if all_market_data is not None:
+            self.price_matrix.load(all_market_data)
+        return self.price_matrix.top_opportunities(k, MIN_PROFIT_PERCENT)
 
     def find_best_opportunity(self, all_market_data):
         """
@@ -58,12 +102,11 @@ class ArbitrageFinder:
                     if sell_price <= buy_price:
                         continue
 
-                    # --- Fee Calculation (Simplified) ---
-                    # In a real bot, you'd fetch actual taker fees for each exchange/symbol
-                    # and potentially consider maker fees if placing limit orders.
-                    # Also, withdrawal fees for rebalancing are a major factor.
-                    buy_fee_percent = DEFAULT_TAKER_FEE_PERCENT
-                    sell_fee_percent = DEFAULT_TAKER_FEE_PERCENT
+                    # --- Fee Calculation ---
+                    # Taker fees per exchange/symbol from set_fee_percents. Maker fees for
+                    # limit orders and withdrawal fees for rebalancing are not modelled.
+                    buy_fee_percent = self._fee_percent(symbol, buy_exchange_id)
+                    sell_fee_percent = self._fee_percent(symbol, sell_exchange_id)
 
                     # Calculate effective prices after fees
                     # Buying: initial_capital / (1 + fee_percent/100)
@@ -91,3 +134,250 @@ class ArbitrageFinder:
                                 'estimated_sell_fee_percent': sell_fee_percent
                             }
         return best_opportunity
+
+    def rank_by_executable_profit(self, opportunities, order_books):
+        """
+        Sizes each opportunity against order book depth and re-ranks them by
+        the profit that can actually be executed after slippage, instead of
+        the top-of-book spread.
+
+        Args:
+            opportunities (list): Opportunity dicts, e.g. from find_top_opportunities.
+            order_books (dict): {(symbol, exchange_id): OrderBook}.
+
+        Returns:
+            list: Executable opportunities, best expected profit first. Each dict
+                  gains 'trade_amount' (base), 'trade_amount_quote', 'buy_vwap',
+                  'sell_vwap', 'executable_profit_percent' and 'expected_profit'.
+        """
+        ranked = []
+        for opportunity in opportunities:
+            symbol = opportunity['symbol']
+            buy_book = order_books.get((symbol, opportunity['buy_exchange']))
+            sell_book = order_books.get((symbol, opportunity['sell_exchange']))
+            if buy_book is None or sell_book is None:
+                continue
+
+            sizing = size_trade(
+                buy_book, sell_book,
+                opportunity['estimated_buy_fee_percent'], opportunity['estimated_sell_fee_percent'],
+                MIN_TRADE_AMOUNT, MAX_TRADE_AMOUNT, MIN_PROFIT_PERCENT
+            )
+            if sizing is None:
+                continue
+            ranked.append(dict(
+                opportunity,
+                trade_amount=sizing['amount'],
+                trade_amount_quote=sizing['cost'],
+                buy_vwap=sizing['buy_vwap'],
+                sell_vwap=sizing['sell_vwap'],
+                executable_profit_percent=sizing['net_profit_percent'],
+                expected_profit=sizing['expected_profit']
+            ))
+        ranked.sort(key=lambda opp: opp['expected_profit'], reverse=True)
+        return ranked
+
+    def filter_outliers(self, opportunities, ticker_store, max_zscore=SPREAD_OUTLIER_ZSCORE,
+                        min_samples=SPREAD_OUTLIER_MIN_SAMPLES):
+        """
+        Drops opportunities whose current spread is a transient spike: more than
+        max_zscore standard deviations above the pair's rolling mean spread.
+        Pairs with fewer than min_samples of history are kept.
+
+        Args:
+            opportunities (list): Opportunity dicts.
+            ticker_store (TickerStore): Source of the spread history, e.g. DataManager.market_data.
+            max_zscore (float, optional): Threshold. None keeps every opportunity.
+        """
+        if max_zscore is None or not opportunities:
+            return opportunities
+        cells = [(ticker_store.symbol_index.get(opp['symbol']), ticker_store.exchange_index.get(opp['buy_exchange']),
+                  ticker_store.exchange_index.get(opp['sell_exchange'])) for opp in opportunities]
+        known = [i for i, cell in enumerate(cells) if None not in cell]
+        if not known:
+            return opportunities
+        _, _, zscore, samples = ticker_store.spread_stats(tuple(np.array([cells[i] for i in known]).T))
+        spikes = {i for i, z, n in zip(known, zscore.tolist(), samples.tolist())
+                  if n >= min_samples and z > max_zscore} # NaN z-scores are kept
+        return [opp for i, opp in enumerate(opportunities) if i not in spikes]
+
+    def set_fee_percents(self, fee_percents):
+        """
+        Installs exact taker fees, e.g. from ExchangeManager.load_fee_table.
+        Pairs without an entry keep DEFAULT_TAKER_FEE_PERCENT. Quotes already
+        held by the incremental state are re-evaluated with the new fees.
+
+        Args:
+            fee_percents (dict): {(symbol, exchange_id): taker fee percent}.
+        """
+        self.fee_percents.update(fee_percents)
+        for (symbol, exchange_id), fee_percent in fee_percents.items():
+            self.price_matrix.set_fee(symbol, exchange_id, fee_percent)
+        for (symbol, exchange_id), (bid, ask) in list(self.quotes.items()):
+            if (symbol, exchange_id) in fee_percents:
+                self.on_ticker_update(symbol, exchange_id, {'bid': bid, 'ask': ask})
+
+    def _fee_percent(self, symbol, exchange_id):
+        """
+        Returns the taker fee percent used for a (symbol, exchange) pair.
+        """
+        return self.fee_percents.get((symbol, exchange_id), DEFAULT_TAKER_FEE_PERCENT)
+
+    def on_ticker_update(self, symbol, exchange_id, ticker):
+        """
+        Incrementally re-evaluates a single symbol after one of its tickers changed.
+        Cost is O(log E) in the number of exchanges quoting the symbol and does
+        not depend on how many symbols are tracked.
+
+        Args:
+            symbol (str): The symbol whose ticker changed.
+            exchange_id (str): The exchange that sent the ticker.
+            ticker (dict): Ticker data with 'bid' and 'ask'.
+
+        Returns:
+            dict or None: The symbol's best opportunity after the update.
+        """
+        bid, ask = ticker.get('bid'), ticker.get('ask')
+        self.quotes[(symbol, exchange_id)] = (bid, ask)
+        fee_percent = self._fee_percent(symbol, exchange_id)
+
+        ask_heap = self.ask_heaps.get(symbol)
+        if ask_heap is None:
+            ask_heap = self.ask_heaps[symbol] = IndexedHeap()
+            self.bid_heaps[symbol] = IndexedHeap()
+        bid_heap = self.bid_heaps[symbol]
+
+        if ask is None:
+            ask_heap.remove(exchange_id)
+        else:
+            ask_heap.push(exchange_id, ask * (1 + fee_percent / 100))
+        if bid is None:
+            bid_heap.remove(exchange_id)
+        else:
+            bid_heap.push(exchange_id, -bid * (1 - fee_percent / 100))
+
+        opportunity = self._evaluate_symbol(symbol)
+        if opportunity:
+            received_at = ticker.get('received_at')
+            opportunity['detected_at'] = time.perf_counter()
+            if received_at is not None:
+                opportunity['received_at'] = received_at
+                Metrics.observe('receive_to_detect', exchange_id, opportunity['detected_at'] - received_at)
+            self.symbol_opportunities[symbol] = opportunity
+            self.pending_symbols.add(symbol)
+            self.opportunity_event.set()
+        else:
+            self.symbol_opportunities.pop(symbol, None)
+            self.pending_symbols.discard(symbol)
+        return opportunity
+
+    def exclude_quote(self, symbol, exchange_id):
+        """
+        Drops an exchange's quote of a symbol from the incremental state and
+        re-evaluates the symbol without it, e.g. when DataManager.expire_quotes
+        finds it stale or the exchange's circuit open. The next ticker from the
+        exchange brings it back.
+        """
+        if self.quotes.pop((symbol, exchange_id), None) is None:
+            return
+        self.ask_heaps[symbol].remove(exchange_id)
+        self.bid_heaps[symbol].remove(exchange_id)
+        opportunity = self._evaluate_symbol(symbol)
+        if opportunity:
+            opportunity['detected_at'] = time.perf_counter()
+            self.symbol_opportunities[symbol] = opportunity
+        else:
+            self.symbol_opportunities.pop(symbol, None)
+            self.pending_symbols.discard(symbol)
+
+    def _best_pair(self, symbol):
+        """
+        Finds the best buy/sell exchange pair for one symbol from the heap tops.
+        When the cheapest ask and richest bid are on the same exchange, the
+        runner-up on either side is the best cross-exchange alternative.
+
+        Returns:
+            tuple or None: (buy_exchange_id, sell_exchange_id, cost_per_unit, revenue_per_unit).
+        """
+        ask_heap = self.ask_heaps.get(symbol)
+        if ask_heap is None:
+            return None
+        asks = ask_heap.smallest_two()
+        bids = self.bid_heaps[symbol].smallest_two()
+        if not asks or not bids:
+            return None
+
+        best_pair, best_ratio = None, None
+        for buy_exchange_id, cost_per_unit in asks:
+            for sell_exchange_id, neg_revenue in bids:
+                if buy_exchange_id == sell_exchange_id:
+                    continue
+                ratio = -neg_revenue / cost_per_unit
+                if best_ratio is None or ratio > best_ratio:
+                    best_pair, best_ratio = (buy_exchange_id, sell_exchange_id, cost_per_unit, -neg_revenue), ratio
+        return best_pair
+
+    def spread_percent(self, symbol):
+        """
+        Best fee-adjusted cross-exchange spread of a symbol in percent, negative
+        when no pair is profitable, or None without quotes from two exchanges.
+        Used by the polling scheduler to favour symbols near MIN_PROFIT_PERCENT.
+        """
+        best_pair = self._best_pair(symbol)
+        if best_pair is None:
+            return None
+        cost_per_unit, revenue_per_unit = best_pair[2], best_pair[3]
+        return ((revenue_per_unit - cost_per_unit) / cost_per_unit) * 100
+
+    def _evaluate_symbol(self, symbol):
+        """
+        Returns the symbol's best opportunity if it clears MIN_PROFIT_PERCENT.
+        """
+        best_pair = self._best_pair(symbol)
+        if best_pair is None:
+            return None
+
+        buy_exchange_id, sell_exchange_id, cost_per_unit, revenue_per_unit = best_pair
+        buy_price = self.quotes[(symbol, buy_exchange_id)][1]
+        sell_price = self.quotes[(symbol, sell_exchange_id)][0]
+        if sell_price <= buy_price or revenue_per_unit <= cost_per_unit:
+            return None
+
+        net_profit_percent = ((revenue_per_unit - cost_per_unit) / cost_per_unit) * 100
+        if net_profit_percent <= MIN_PROFIT_PERCENT:
+            return None
+        return {
+            'symbol': symbol,
+            'buy_exchange': buy_exchange_id,
+            'sell_exchange': sell_exchange_id,
+            'buy_price': buy_price,
+            'sell_price': sell_price,
+            'net_profit_percent': net_profit_percent,
+            'estimated_buy_fee_percent': self._fee_percent(symbol, buy_exchange_id),
+            'estimated_sell_fee_percent': self._fee_percent(symbol, sell_exchange_id)
+        }
+
+    def pop_pending_opportunities(self):
+        """
+        Returns the opportunities for symbols updated since the last call,
+        best first, and resets the wake-up event.
+        """
+        opportunities = [self.symbol_opportunities[s] for s in self.pending_symbols
+                         if s in self.symbol_opportunities]
+        self.pending_symbols.clear()
+        self.opportunity_event.clear()
+        opportunities.sort(key=lambda opp: opp['net_profit_percent'], reverse=True)
+        return opportunities
+
+    async def wait_for_opportunity(self, timeout=None):
+        """
+        Waits until on_ticker_update reports a profitable opportunity.
+
+        Returns:
+            bool: True if woken by an opportunity, False on timeout.
+        """
+        try:
+            await asyncio.wait_for(self.opportunity_event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
@@ -0,0 +1,103 @@
+"compares executing only the best opportunity with batch allocation across opportunities per cycle"
+
+import argparse
+import asyncio
+import logging
+import random
+import time
+import numpy as np
+from exc_mngr import ExchangeManager
+from sim_exc import SimulatedExchange
+from trade_exec import TradeExecutor
+from cap_alloc import allocate_trades
+from utils import Logger
+
+class _SimClient:
+    """
+    Placeholder client so ExchangeManager accepts the benchmark exchanges.
+    """
+    has = {}
+
+    async def close(self):
+        pass
+
+def make_cycles(args):
+    """
+    Seeded lists of sized opportunities, one list per cycle, as
+    ArbitrageFinder.rank_by_executable_profit would return them.
+    """
+    rng = random.Random(args.seed)
+    exchange_ids = [f'ex{i}' for i in range(args.exchanges)]
+    cycles = []
+    for _ in range(args.cycles):
+        opportunities = []
+        for _ in range(args.opportunities):
+            symbol = f'C{rng.randrange(args.symbols)}/USDT'
+            buy_exchange, sell_exchange = rng.sample(exchange_ids, 2)
+            price = 100.0
+            spread = rng.uniform(0.25, 0.8)
+            net = spread - 2 * args.fee
+            amount = rng.uniform(100, 2000) / price # Depth-limited size
+            opportunities.append({
+                'symbol': symbol, 'buy_exchange': buy_exchange, 'sell_exchange': sell_exchange,
+                'buy_price': price, 'sell_price': price * (1 + spread / 100), 'net_profit_percent': net,
+                'estimated_buy_fee_percent': args.fee, 'estimated_sell_fee_percent': args.fee,
+                'trade_amount': amount, 'trade_amount_quote': amount * price,
+                'expected_profit': amount * price * net / 100,
+            })
+        opportunities.sort(key=lambda opp: opp['expected_profit'], reverse=True)
+        cycles.append(opportunities)
+    return exchange_ids, cycles
+
+async def run(batch, exchange_ids, cycles, args):
+    balances = {'USDT': args.quote_balance}
+    balances.update({f'C{i}': args.base_balance for i in range(args.symbols)})
+    simulator = SimulatedExchange(latency=args.latency, seed=args.seed, starting_balances=balances)
+    exchange_manager = ExchangeManager(exchange_ids, clients={ex_id: _SimClient() for ex_id in exchange_ids},
+                                       simulator=simulator)
+    executor = TradeExecutor(exchange_manager)
+    trades, profit, allocate_times, cycle_times = [], 0.0, [], []
+    for opportunities in cycles:
+        start = time.perf_counter()
+        if batch:
+            keys = set()
+            for opportunity in opportunities:
+                base, quote = opportunity['symbol'].split('/')
+                keys.update(((opportunity['buy_exchange'], quote), (opportunity['sell_exchange'], base)))
+            free = await exchange_manager.fetch_balances(keys)
+            allocate_start = time.perf_counter()
+            chosen = allocate_trades(opportunities, free)
+            allocate_times.append(time.perf_counter() - allocate_start)
+        else:
+            chosen = opportunities[:1]
+        results = await asyncio.gather(*(executor.execute_arbitrage_trade(opp) for opp in chosen))
+        cycle_times.append(time.perf_counter() - start)
+        trades.append(sum(r['status'] in ('completed', 'unwound') for r in results))
+        profit += sum(r['profit'] for r in results)
+    return np.array(trades), profit, np.array(allocate_times), np.array(cycle_times)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--cycles', type=int, default=200)
+    parser.add_argument('--opportunities', type=int, default=32, help='ranked opportunities per cycle')
+    parser.add_argument('--exchanges', type=int, default=5)
+    parser.add_argument('--symbols', type=int, default=10)
+    parser.add_argument('--quote-balance', type=float, default=3000, help='USDT per exchange')
+    parser.add_argument('--base-balance', type=float, default=10, help='units of each base per exchange')
+    parser.add_argument('--fee', type=float, default=0.1)
+    parser.add_argument('--latency', type=float, default=0.01)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    Logger.setLevel(logging.CRITICAL)
+    exchange_ids, cycles = make_cycles(args)
+    print(f"{args.cycles} cycles x {args.opportunities} opportunities, {args.exchanges} exchanges, "
+          f"{args.symbols} symbols, {args.quote_balance:g} USDT and {args.base_balance:g} of each base per exchange")
+    for label, batch in (('best only', False), ('batch', True)):
+        trades, profit, allocate_times, cycle_times = asyncio.run(run(batch, exchange_ids, cycles, args))
+        line = (f"{label:<10} trades/cycle={trades.mean():5.2f} pnl={profit:9.2f} USDT "
+                f"cycle p50={np.percentile(cycle_times, 50) * 1e3:6.1f}ms")
+        if batch:
+            line += (f" allocate p50={np.percentile(allocate_times, 50) * 1e6:5.0f}us "
+                     f"p99={np.percentile(allocate_times, 99) * 1e6:5.0f}us")
+        print(line)
@@ -0,0 +1,69 @@
+"measures balance round-trips and per-trade overhead with and without the account cache"
+
+import argparse
+import asyncio
+import logging
+import math
+import time
+from exc_mngr import ExchangeManager
+from sim_exc import SimulatedExchange
+from trade_exec import TradeExecutor
+from utils import Logger
+
+class CountingExchange(SimulatedExchange):
+    """
+    SimulatedExchange that counts balance requests.
+    """
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.balance_requests = 0
+
+    async def fetch_balance(self, exchange_id):
+        self.balance_requests += 1
+        return await super().fetch_balance(exchange_id)
+
+class _SimClient:
+    has = {}
+
+    async def close(self):
+        pass
+
+def _manager(args, cached):
+    simulator = CountingExchange(latency=args.latency, fill_probability=1.0, partial_fill_probability=0.0,
+                                 starting_balances={'BTC': math.inf, 'USDT': math.inf}, seed=args.seed)
+    exchange_manager = ExchangeManager(['ex0', 'ex1'], clients={'ex0': _SimClient(), 'ex1': _SimClient()},
+                                       simulator=simulator)
+    if not cached:
+        exchange_manager.cache.maxsize = 0 # Every entry is evicted as soon as it is stored
+    return exchange_manager, simulator
+
+async def run_trades(args, cached):
+    exchange_manager, simulator = _manager(args, cached)
+    executor = TradeExecutor(exchange_manager)
+    opportunity = {'symbol': 'BTC/USDT', 'buy_exchange': 'ex0', 'sell_exchange': 'ex1',
+                   'buy_price': 100.0, 'sell_price': 100.5, 'net_profit_percent': 0.3,
+                   'estimated_buy_fee_percent': 0.1, 'estimated_sell_fee_percent': 0.1}
+    start = time.perf_counter()
+    for _ in range(args.trades):
+        await executor.execute_arbitrage_trade(dict(opportunity))
+    return simulator.balance_requests, (time.perf_counter() - start) / args.trades
+
+async def run_burst(args):
+    exchange_manager, simulator = _manager(args, cached=True)
+    await asyncio.gather(*(exchange_manager.fetch_balance('ex0', 'USDT') for _ in range(args.burst)))
+    return simulator.balance_requests
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--trades', type=int, default=100)
+    parser.add_argument('--burst', type=int, default=100, help='concurrent balance lookups for the coalescing check')
+    parser.add_argument('--latency', type=float, default=0.02, help='median request round-trip in seconds')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    Logger.setLevel(logging.CRITICAL)
+    for cached in (False, True):
+        requests, per_trade = asyncio.run(run_trades(args, cached))
+        print(f"{'cached' if cached else 'uncached':<9} balance requests={requests:4d} "
+              f"per trade={per_trade * 1e3:6.1f}ms over {args.trades} trades")
+    print(f"{args.burst} concurrent lookups -> {asyncio.run(run_burst(args))} balance request(s)")
@@ -0,0 +1,107 @@
+"measures time from process launch to the first opportunity, before and after the startup changes"
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+async def child(mode, url, exchange_ids, symbols, cache_dir, previous_wait):
+    """
+    Starts up like main.py against the fake exchange and prints FIRST once
+    an opportunity is found. 'previous' is the old sequence: markets via the
+    fee table, then polling and a fixed wait for data.
+    """
+    from utils import Logger
+    from fake_exc import FakeExchangeClient
+    from exc_mngr import ExchangeManager
+    from data_mngr import DataManager
+    from arb_fndr import ArbitrageFinder
+    Logger.setLevel('CRITICAL')
+
+    clients = {ex_id: FakeExchangeClient(ex_id, url) for ex_id in exchange_ids}
+    arbitrage_finder = ArbitrageFinder()
+    if mode == 'previous':
+        exchange_manager = ExchangeManager(exchange_ids, clients=clients, markets_cache_dir=None)
+        data_manager = DataManager(exchange_manager, symbols, exchange_ids, spread_fn=arbitrage_finder.spread_percent)
+        data_manager.add_ticker_listener(arbitrage_finder.on_ticker_update)
+        arbitrage_finder.set_fee_percents(await exchange_manager.load_fee_table(symbols))
+        poller = asyncio.create_task(data_manager.fetch_all_tickers_periodically())
+        await asyncio.sleep(previous_wait)
+    else:
+        exchange_manager = ExchangeManager(exchange_ids, clients=clients, markets_cache_dir=cache_dir)
+        await exchange_manager.connect()
+        data_manager = DataManager(exchange_manager, symbols, exchange_ids, spread_fn=arbitrage_finder.spread_percent)
+        data_manager.add_ticker_listener(arbitrage_finder.on_ticker_update)
+        poller = asyncio.create_task(data_manager.fetch_all_tickers_periodically())
+        fee_table, _ = await asyncio.gather(exchange_manager.load_fee_table(symbols),
+                                            data_manager.wait_until_ready(10))
+        arbitrage_finder.set_fee_percents(fee_table)
+    print('READY', flush=True)
+    while not arbitrage_finder.pop_pending_opportunities():
+        await arbitrage_finder.wait_for_opportunity(timeout=1)
+    print('FIRST', flush=True)
+    poller.cancel()
+    await asyncio.gather(poller, return_exceptions=True)
+    await exchange_manager.close()
+
+async def launch(mode, server, args, cache_dir):
+    """
+    Returns (seconds to READY, seconds to FIRST) measured from process spawn.
+    """
+    start = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, os.path.abspath(__file__), '--child', mode, '--url', server.url,
+        '--exchanges', str(args.exchanges), '--symbols', str(args.symbols), '--cache-dir', cache_dir,
+        '--previous-wait', str(args.previous_wait), stdout=asyncio.subprocess.PIPE, cwd=cache_dir,
+        env={**os.environ, 'PYTHONPATH': os.path.dirname(os.path.abspath(__file__))})
+    times = {}
+    while True:
+        line = await process.stdout.readline()
+        if not line:
+            break
+        times[line.decode().strip()] = time.perf_counter() - start
+    await process.wait()
+    return times.get('READY'), times.get('FIRST')
+
+async def run(args):
+    from fake_exc import FakeExchangeServer
+    exchange_ids = [f'ex{i}' for i in range(args.exchanges)]
+    symbols = [f'SYM{i}/USDT' for i in range(args.symbols)]
+    server = FakeExchangeServer(exchange_ids, symbols, latency=args.latency, markets_latency=args.markets_latency,
+                                market_info_size=args.market_info_size, dispersion=0.02)
+    await server.start()
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            for mode, label in (('previous', 'previous startup'), ('new', 'cold (no disk cache)'),
+                                ('new', 'warm (disk cache)')):
+                before = server.markets_requests
+                ready, first = await launch(mode, server, args, cache_dir)
+                await asyncio.sleep(args.markets_latency + 0.5) # Let background refreshes land
+                print(f"{label:<22} ready {ready:6.3f}s  first opportunity {first:6.3f}s  "
+                      f"markets downloads {server.markets_requests - before}")
+    finally:
+        await server.stop()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--exchanges', type=int, default=3)
+    parser.add_argument('--symbols', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds per ticker request')
+    parser.add_argument('--markets-latency', type=float, default=1.5, help='seconds per markets download')
+    parser.add_argument('--market-info-size', type=int, default=50_000, help='raw bytes per market')
+    parser.add_argument('--previous-wait', type=float, default=10.0,
+                        help='fixed wait for data of the previous startup (2 x CHECK_INTERVAL_SECONDS)')
+    parser.add_argument('--child')
+    parser.add_argument('--url')
+    parser.add_argument('--cache-dir')
+    args = parser.parse_args()
+
+    if args.child:
+        asyncio.run(child(args.child, args.url, [f'ex{i}' for i in range(args.exchanges)],
+                          [f'SYM{i}/USDT' for i in range(args.symbols)], args.cache_dir, args.previous_wait))
+    else:
+        print(f"{args.exchanges} exchanges x {args.symbols} symbols, markets download "
+              f"{args.markets_latency:g}s and {args.symbols * args.market_info_size / 1e6:.1f} MB per exchange")
+        asyncio.run(run(args))
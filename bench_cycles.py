@@ -0,0 +1,68 @@
+"benchmarks full and incremental cycle detection on a synthetic market graph"
+
+import argparse
+import random
+import time
+from cycle_fndr import CycleFinder
+
+QUOTES = ['USDT', 'BTC', 'ETH']
+
+def build(n_currencies, n_exchanges, seed=0):
+    """
+    Builds a CycleFinder where every currency trades against each quote on every exchange.
+    Returns the finder, the fair prices, and the list of (exchange_id, symbol) markets.
+    """
+    rng = random.Random(seed)
+    prices = {'USDT': 1.0, 'BTC': 50000.0, 'ETH': 3000.0}
+    for i in range(n_currencies):
+        prices[f'C{i}'] = rng.uniform(0.01, 500)
+
+    finder = CycleFinder()
+    markets = []
+    for e in range(n_exchanges):
+        for base in prices:
+            for quote in QUOTES:
+                if base == quote or base in QUOTES and QUOTES.index(base) < QUOTES.index(quote):
+                    continue
+                markets.append((f'ex{e}', f'{base}/{quote}'))
+    for ex_id, symbol in markets:
+        base, quote = symbol.split('/')
+        rate = prices[base] / prices[quote]
+        finder.update_market(ex_id, symbol, rate * 0.9999, rate * 1.0001)
+    return finder, prices, markets
+
+def run(n_currencies, n_exchanges, ticks, dislocation_rate, seed=0):
+    finder, prices, markets = build(n_currencies, n_exchanges, seed)
+    rng = random.Random(seed + 1)
+
+    start = time.perf_counter()
+    finder.find_cycles()
+    full_ms = (time.perf_counter() - start) * 1e3
+
+    found, elapsed = 0, 0.0
+    for _ in range(ticks):
+        ex_id, symbol = rng.choice(markets)
+        base, quote = symbol.split('/')
+        # Most ticks are small moves; some are dislocations large enough to open a cycle
+        noise = 0.01 if rng.random() < dislocation_rate else 0.00005
+        rate = prices[base] / prices[quote] * (1 + rng.gauss(0, noise))
+        finder.update_market(ex_id, symbol, rate * 0.9999, rate * 1.0001)
+        start = time.perf_counter()
+        if finder.find_cycles():
+            found += 1
+        elapsed += time.perf_counter() - start
+        # Restore the fair price so dislocations do not accumulate
+        rate = prices[base] / prices[quote]
+        finder.update_market(ex_id, symbol, rate * 0.9999, rate * 1.0001)
+
+    print(f"{len(markets) // n_exchanges:>8} {n_exchanges:>9} {finder.edge_count:>8} {full_ms:>9.2f} "
+          f"{elapsed / ticks * 1e3:>9.3f} {found:>7}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--ticks', type=int, default=2000)
+    parser.add_argument('--dislocation-rate', type=float, default=0.01)
+    args = parser.parse_args()
+    print(f"{'mkts/ex':>8} {'exchanges':>9} {'edges':>8} {'full ms':>9} {'tick ms':>9} {'cycles':>7}")
+    for n_currencies, n_exchanges in [(100, 3), (1000, 3), (1000, 10), (3000, 5)]:
+        run(n_currencies, n_exchanges, args.ticks, args.dislocation_rate)
@@ -0,0 +1,55 @@
+"benchmarks a DataManager fetch cycle against the local fake exchange server"
+
+import argparse
+import asyncio
+import time
+from fake_exc import FakeExchangeServer, make_clients
+from exc_mngr import ExchangeManager
+from data_mngr import DataManager
+
+# (label, batched fetch_tickers, pooled connections)
+MODES = [
+    ('per-symbol, new socket', False, False),
+    ('per-symbol, pooled', False, True),
+    ('batched, pooled', True, True),
+]
+
+async def run_mode(server, batch, pooled, cycles):
+    """
+    Runs fetch cycles in one mode and returns (requests/cycle, ms/cycle, sockets opened).
+    """
+    exchange_manager = ExchangeManager(server.exchange_ids, clients=make_clients(server, batch, pooled))
+    data_manager = DataManager(exchange_manager, server.symbols, server.exchange_ids)
+    try:
+        await data_manager.fetch_all_tickers_once() # Warm-up, opens the pooled connections
+        server.reset_stats()
+        start = time.perf_counter()
+        for _ in range(cycles):
+            await data_manager.fetch_all_tickers_once()
+        elapsed = time.perf_counter() - start
+    finally:
+        await exchange_manager.close()
+    return server.request_count / cycles, elapsed / cycles * 1e3, len(server.peers)
+
+async def main(n_symbols, n_exchanges, cycles, latency):
+    symbols = [f'SYM{i}/USDT' for i in range(n_symbols)]
+    exchange_ids = [f'ex{i}' for i in range(n_exchanges)]
+    server = FakeExchangeServer(exchange_ids, symbols, latency=latency)
+    await server.start()
+    try:
+        print(f"{n_symbols} symbols x {n_exchanges} exchanges, {cycles} cycles, {latency * 1e3:.1f} ms server latency")
+        print(f"{'mode':<24} {'req/cycle':>10} {'ms/cycle':>10} {'sockets':>8}")
+        for label, batch, pooled in MODES:
+            requests, ms, sockets = await run_mode(server, batch, pooled, cycles)
+            print(f"{label:<24} {requests:>10.1f} {ms:>10.2f} {sockets:>8}")
+    finally:
+        await server.stop()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--symbols', type=int, default=50)
+    parser.add_argument('--exchanges', type=int, default=5)
+    parser.add_argument('--cycles', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.005, help='server latency in seconds')
+    args = parser.parse_args()
+    asyncio.run(main(args.symbols, args.exchanges, args.cycles, args.latency))
@@ -0,0 +1,67 @@
+"benchmarks the dict-based and vectorized arbitrage finders"
+
+import argparse
+import time
+from arb_fndr import ArbitrageFinder
+from synth_mrkt import SyntheticMarket
+
+def time_call(func, repeat):
+    """
+    Returns the best wall time in seconds of func() over repeat runs, and its last result.
+    """
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def run(sizes, repeat):
+    """
+    Times both finder paths for each (symbols, exchanges) size and checks they agree.
+    """
+    print(f"{'symbols':>8} {'exchanges':>9} {'dict ms':>10} {'numpy ms':>10} {'speedup':>8} match")
+    for n_symbols, n_exchanges in sizes:
+        market_data = SyntheticMarket(n_symbols, n_exchanges).market_data()
+        finder = ArbitrageFinder()
+
+        dict_time, best = time_call(lambda: finder.find_best_opportunity(market_data), repeat)
+        numpy_time, top = time_call(lambda: finder.find_top_opportunities(market_data), repeat)
+
+        top_best = top[0] if top else None
+        match = (best is None and top_best is None) or (
+            best is not None and top_best is not None
+            and best['net_profit_percent'] == top_best['net_profit_percent'])
+        print(f"{n_symbols:>8} {n_exchanges:>9} {dict_time * 1e3:>10.3f} {numpy_time * 1e3:>10.3f} "
+              f"{dict_time / numpy_time:>8.1f} {match}")
+
+def run_incremental(sizes, updates=20000):
+    """
+    Measures the per-update cost of ArbitrageFinder.on_ticker_update, which
+    should stay flat as the number of tracked symbols grows.
+    """
+    print(f"{'symbols':>8} {'exchanges':>9} {'us/update':>10}")
+    for n_symbols, n_exchanges in sizes:
+        market = SyntheticMarket(n_symbols, n_exchanges)
+        finder = ArbitrageFinder()
+        for (symbol, ex_id), ticker in market.market_data().items():
+            finder.on_ticker_update(symbol, ex_id, ticker)
+        stream = list(market.ticks(updates))
+
+        start = time.perf_counter()
+        for symbol, ex_id, ticker in stream:
+            finder.on_ticker_update(symbol, ex_id, ticker)
+        elapsed = time.perf_counter() - start
+        print(f"{n_symbols:>8} {n_exchanges:>9} {elapsed / updates * 1e6:>10.2f}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--incremental', action='store_true',
+                        help='time per-ticker incremental evaluation instead of full scans')
+    args = parser.parse_args()
+    sizes = [(5, 3), (50, 5), (200, 10), (500, 15), (1000, 20)]
+    if args.incremental:
+        run_incremental(sizes)
+    else:
+        run(sizes, args.repeat)
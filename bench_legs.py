@@ -0,0 +1,85 @@
+"compares sequential and concurrent two-leg execution against the simulated exchange"
+
+import argparse
+import asyncio
+import logging
+import math
+import numpy as np
+from exc_mngr import ExchangeManager
+from sim_exc import SimulatedExchange
+from trade_exec import TradeExecutor
+from utils import Logger
+
+class _SimClient:
+    """
+    Placeholder client so ExchangeManager accepts the benchmark exchanges.
+    """
+    has = {}
+
+    async def close(self):
+        pass
+
+def _opportunity(spread_percent, fee_percent):
+    price = 100.0
+    return {
+        'symbol': 'BTC/USDT',
+        'buy_exchange': 'ex0',
+        'sell_exchange': 'ex1',
+        'buy_price': price,
+        'sell_price': price * (1 + spread_percent / 100),
+        'net_profit_percent': spread_percent - 2 * fee_percent,
+        'estimated_buy_fee_percent': fee_percent,
+        'estimated_sell_fee_percent': fee_percent,
+    }
+
+async def run(concurrent, trades, args):
+    """
+    Executes the same seeded sequence of trades in one mode and returns the results.
+    """
+    simulator = SimulatedExchange(latency=args.latency, fill_probability=args.fill_probability,
+                                  volatility_percent=args.volatility, seed=args.seed,
+                                  exchange_latency={'ex1': args.latency * args.slow_factor},
+                                  starting_balances={'BTC': math.inf, 'USDT': math.inf})
+    exchange_manager = ExchangeManager(['ex0', 'ex1'], clients={'ex0': _SimClient(), 'ex1': _SimClient()},
+                                       simulator=simulator)
+    executor = TradeExecutor(exchange_manager, concurrent=concurrent, leg_timeout=args.leg_timeout)
+    opportunity = _opportunity(args.spread, args.fee)
+    results = []
+    for _ in range(trades):
+        results.append(await executor.execute_arbitrage_trade(dict(opportunity)))
+    return results
+
+def summarize(name, results):
+    skews = np.array([r['leg_skew'] for r in results if r['leg_skew'] is not None]) * 1e3
+    statuses = [r['status'] for r in results]
+    profit = sum(r['profit'] for r in results)
+    unwind_cost = sum(r['unwind_cost'] for r in results)
+    line = f"{name:<11}"
+    if len(skews):
+        line += f" skew p50={np.percentile(skews, 50):6.1f}ms p99={np.percentile(skews, 99):6.1f}ms"
+    line += (f" completed={statuses.count('completed'):4d} unwound={statuses.count('unwound'):3d}"
+             f" failed={statuses.count('failed'):3d} exposed={statuses.count('exposed'):2d}"
+             f" unwind_cost={unwind_cost:8.4f} pnl={profit:9.4f}")
+    print(line)
+    return profit, unwind_cost
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--trades', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=0.02, help='median order round-trip in seconds')
+    parser.add_argument('--slow-factor', type=float, default=2.0, help='sell exchange latency multiple')
+    parser.add_argument('--fill-probability', type=float, default=0.97)
+    parser.add_argument('--volatility', type=float, default=0.05, help='percent per sqrt(second) of exposure')
+    parser.add_argument('--leg-timeout', type=float, default=0.5)
+    parser.add_argument('--spread', type=float, default=0.4, help='quoted spread in percent')
+    parser.add_argument('--fee', type=float, default=0.1)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    Logger.setLevel(logging.CRITICAL)
+    sequential = asyncio.run(run(False, args.trades, args))
+    concurrent = asyncio.run(run(True, args.trades, args))
+    seq_pnl, seq_cost = summarize('sequential', sequential)
+    con_pnl, con_cost = summarize('concurrent', concurrent)
+    print(f"concurrent saves {seq_cost - con_cost:.4f} USDT of unwind cost and "
+          f"gains {con_pnl - seq_pnl:.4f} USDT over {args.trades} trades")
@@ -0,0 +1,134 @@
+"measures event-loop stalls caused by synchronous vs queued logging and journaling"
+
+import argparse
+import asyncio
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import tempfile
+import time
+import numpy as np
+from utils import DeferredQueueHandler, Logger
+from trd_jrnl import TradeJournal
+
+LOG_CALLS_PER_TRADE = 12 # Roughly what TradeExecutor logs for one trade
+
+class SlowStream:
+    """
+    Text stream whose writes take a fixed time, like a busy terminal or disk.
+    """
+    def __init__(self, stream, delay):
+        self.stream = stream
+        self.delay = delay
+
+    def write(self, text):
+        if self.delay:
+            time.sleep(self.delay)
+        return self.stream.write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+class SyncJournal:
+    """
+    The alternative to TradeJournal: serialize and append in the caller.
+    """
+    def __init__(self, path):
+        self.file = open(path, 'a', encoding='utf-8')
+
+    def record(self, kind, entry):
+        self.file.write(json.dumps({'kind': kind, 'time': time.time(), **entry}, default=str) + '\n')
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+def make_logger(mode, directory, io_delay):
+    """
+    Returns (logger, listener or None, handlers) wired like utils.setup_logger
+    before (mode 'sync') and after ('queue'), plus the stock QueueHandler ('stock-queue').
+    """
+    logger = logging.getLogger(f'bench-{mode}')
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    devnull = open(os.devnull, 'w', encoding='utf-8')
+    handlers = [logging.StreamHandler(SlowStream(devnull, io_delay)),
+                logging.FileHandler(os.path.join(directory, f'{mode}.log'))]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    if mode == 'sync':
+        for handler in handlers:
+            logger.addHandler(handler)
+        return logger, None, handlers
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(DeferredQueueHandler(log_queue) if mode == 'queue' else logging.handlers.QueueHandler(log_queue))
+    listener = logging.handlers.QueueListener(log_queue, *handlers)
+    listener.start()
+    return logger, listener, handlers
+
+def fake_trade(logger, journal, i):
+    opportunity = {'symbol': 'BTC/USDT', 'buy_exchange': 'binance', 'sell_exchange': 'kraken',
+                   'buy_price': 65000.0 + i, 'sell_price': 65100.0 + i, 'net_profit_percent': 0.15}
+    journal.record('opportunity', opportunity)
+    for n in range(LOG_CALLS_PER_TRADE):
+        logger.info("Trade %d step %d: %s buy on %s @ %s, sell on %s @ %s", i, n, opportunity['symbol'],
+                    opportunity['buy_exchange'], opportunity['buy_price'],
+                    opportunity['sell_exchange'], opportunity['sell_price'])
+    logger.debug("Order book levels: %s", opportunity) # Disabled level: never formatted
+    journal.record('trade', {'symbol': 'BTC/USDT', 'status': 'completed', 'profit': 1.5, 'filled_amount': 0.01})
+
+async def run_mode(mode, args, directory):
+    logger, listener, handlers = make_logger(mode, directory, args.io_delay)
+    journal_path = os.path.join(directory, f'{mode}.jsonl')
+    journal = SyncJournal(journal_path) if mode == 'sync' else TradeJournal(journal_path)
+    loop = asyncio.get_running_loop()
+    lateness = []
+    trade_times = []
+    end = loop.time() + args.duration
+
+    async def monitor():
+        # A 1 ms timer that fires late means the loop was busy with something else
+        while loop.time() < end:
+            expected = loop.time() + 0.001
+            await asyncio.sleep(0.001)
+            lateness.append(loop.time() - expected)
+
+    async def trader():
+        i = 0
+        while loop.time() < end:
+            start = time.perf_counter()
+            fake_trade(logger, journal, i)
+            trade_times.append(time.perf_counter() - start)
+            i += 1
+            await asyncio.sleep(1 / args.trade_rate)
+
+    await asyncio.gather(monitor(), trader())
+    if listener:
+        listener.stop()
+    journal.close()
+    for handler in handlers:
+        handler.close()
+    return np.array(lateness), np.array(trade_times)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--trade-rate', type=float, default=100, help='simulated trades per second')
+    parser.add_argument('--io-delay', type=float, default=0.0002, help='seconds per console write')
+    args = parser.parse_args()
+
+    Logger.setLevel(logging.WARNING)
+    print(f"{args.trade_rate:g} trades/s x {LOG_CALLS_PER_TRADE} log lines + 2 journal entries, "
+          f"console writes take {args.io_delay * 1e3:g} ms")
+    with tempfile.TemporaryDirectory() as directory:
+        for mode in ('sync', 'stock-queue', 'queue'):
+            lateness, trade_times = asyncio.run(run_mode(mode, args, directory))
+            print(f"{mode:<12} loop blocked per trade p50={np.percentile(trade_times, 50) * 1e6:7.0f}us "
+                  f"p99={np.percentile(trade_times, 99) * 1e6:7.0f}us | timer lateness "
+                  f"p50={np.percentile(lateness, 50) * 1e6:6.0f}us p99={np.percentile(lateness, 99) * 1e6:6.0f}us "
+                  f"max={lateness.max() * 1e3:6.2f}ms")
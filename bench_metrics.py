@@ -0,0 +1,66 @@
+"benchmarks the per-sample overhead of the latency instrumentation"
+
+import argparse
+import asyncio
+import random
+import time
+import aiohttp
+from metrics import LatencyMetrics
+
+def per_sample_ns(metrics, samples, n_exchanges):
+    """
+    Average cost of one timed sample: two perf_counter reads plus observe().
+    """
+    exchange_ids = [f'ex{i}' for i in range(n_exchanges)]
+    keys = [exchange_ids[random.randrange(n_exchanges)] for _ in range(samples)]
+    perf_counter = time.perf_counter
+    observe = metrics.observe
+    start = time.perf_counter_ns()
+    for ex_id in keys:
+        t0 = perf_counter()
+        observe('fetch', ex_id, perf_counter() - t0)
+    return (time.perf_counter_ns() - start) / samples
+
+def loop_ns(samples, n_exchanges):
+    """
+    Cost of the same loop without any instrumentation, subtracted as a baseline.
+    """
+    exchange_ids = [f'ex{i}' for i in range(n_exchanges)]
+    keys = [exchange_ids[random.randrange(n_exchanges)] for _ in range(samples)]
+    start = time.perf_counter_ns()
+    for ex_id in keys:
+        pass
+    return (time.perf_counter_ns() - start) / samples
+
+async def scrape(metrics):
+    """
+    Starts the endpoint on a random local port and returns the status and size of one scrape.
+    """
+    port = random.randrange(20000, 60000)
+    server = asyncio.create_task(metrics.serve('127.0.0.1', port))
+    await asyncio.sleep(0.1)
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f'http://127.0.0.1:{port}/metrics') as response:
+                return response.status, len(await response.text())
+    finally:
+        server.cancel()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--samples', type=int, default=1_000_000)
+    parser.add_argument('--exchanges', type=int, default=15)
+    args = parser.parse_args()
+
+    baseline = loop_ns(args.samples, args.exchanges)
+    enabled = LatencyMetrics(enabled=True)
+    on = per_sample_ns(enabled, args.samples, args.exchanges) - baseline
+    off = per_sample_ns(LatencyMetrics(enabled=False), args.samples, args.exchanges) - baseline
+    print(f"per sample (2x perf_counter + observe): enabled {on:.0f} ns, disabled {off:.0f} ns")
+
+    start = time.perf_counter()
+    text = enabled.render_prometheus()
+    print(f"render: {(time.perf_counter() - start) * 1e3:.2f} ms for {len(enabled.histograms)} series, "
+          f"{len(text):,} bytes")
+    status, size = asyncio.run(scrape(enabled))
+    print(f"scrape: HTTP {status}, {size:,} bytes")
@@ -0,0 +1,107 @@
+"compares fixed-cycle polling with the adaptive scheduler against a rate-limited fake exchange"
+
+import argparse
+import asyncio
+import logging
+import time
+import numpy as np
+from fake_exc import FakeExchangeServer, make_clients
+from exc_mngr import ExchangeManager
+from data_mngr import DataManager
+from config import MIN_PROFIT_PERCENT, RATE_LIMIT_HEADROOM
+from utils import Logger
+
+async def fixed_cycle(data_manager, interval):
+    """
+    The previous polling loop: every request at once, then a fixed sleep.
+    """
+    while True:
+        await data_manager.fetch_all_tickers_once()
+        await asyncio.sleep(interval)
+
+async def sample_staleness(data_manager, duration, period, near_band):
+    """
+    Samples quote ages every period seconds. Returns {'near': [...], 'far': [...], 'fast': [...]}:
+    ages of symbols within near_band of MIN_PROFIT_PERCENT, of the other symbols,
+    and of every quote on the exchanges other than the slow one.
+    """
+    samples = {'near': [], 'far': [], 'fast': []}
+    loop = asyncio.get_running_loop()
+    end = loop.time() + duration
+    while loop.time() < end:
+        await asyncio.sleep(period)
+        now = loop.time()
+        for symbol in data_manager.symbols:
+            spread = data_manager.spread_percent(symbol)
+            if spread is None:
+                continue
+            group = 'near' if abs(spread - MIN_PROFIT_PERCENT) < near_band else 'far'
+            for ex_id in data_manager.exchange_ids:
+                updated = data_manager.market_data.last_update(symbol, ex_id)
+                if updated is None:
+                    continue
+                samples[group].append(now - updated)
+                if ex_id != data_manager.exchange_ids[0]:
+                    samples['fast'].append(now - updated)
+    return samples
+
+async def run_mode(args, adaptive, interval):
+    symbols = [f'SYM{i}/USDT' for i in range(args.symbols)]
+    exchange_ids = [f'ex{i}' for i in range(args.exchanges)]
+    server = FakeExchangeServer(exchange_ids, symbols, latency=args.latency, rate_limit=args.rate_limit,
+                                exchange_latency={exchange_ids[0]: args.slow_latency}, seed=args.seed)
+    await server.start()
+    exchange_manager = ExchangeManager(exchange_ids, clients=make_clients(server, batch=args.batch))
+    data_manager = DataManager(exchange_manager, symbols, exchange_ids)
+    if adaptive:
+        poller = asyncio.create_task(data_manager.fetch_all_tickers_periodically())
+    else:
+        poller = asyncio.create_task(fixed_cycle(data_manager, interval))
+    try:
+        await asyncio.sleep(args.warmup)
+        server.reset_stats()
+        start = time.perf_counter()
+        samples = await sample_staleness(data_manager, args.duration, 0.05, args.near_band)
+        elapsed = time.perf_counter() - start
+    finally:
+        poller.cancel()
+        await asyncio.gather(poller, return_exceptions=True)
+        await exchange_manager.close()
+        await server.stop()
+    return server, elapsed, samples
+
+def _ages(values):
+    if not values:
+        return '      n/a'
+    return f"p50={np.percentile(values, 50) * 1e3:6.0f}ms p90={np.percentile(values, 90) * 1e3:6.0f}ms"
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--symbols', type=int, default=40)
+    parser.add_argument('--exchanges', type=int, default=3)
+    parser.add_argument('--rate-limit', type=float, default=20, help='requests per second per exchange')
+    parser.add_argument('--latency', type=float, default=0.01)
+    parser.add_argument('--slow-latency', type=float, default=0.5, help='latency of the first exchange')
+    parser.add_argument('--interval', type=float, default=1.0, help='sleep of the fixed-cycle loop')
+    parser.add_argument('--batch', action='store_true', help='advertise batched fetch_tickers')
+    parser.add_argument('--near-band', type=float, default=0.1, help='percent around MIN_PROFIT_PERCENT')
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--warmup', type=float, default=2.0)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    Logger.setLevel(logging.CRITICAL)
+    print(f"{args.symbols} symbols x {args.exchanges} exchanges, limit {args.rate_limit:g} req/s, "
+          f"ex0 latency {args.slow_latency * 1e3:.0f} ms, {'batched' if args.batch else 'per-symbol'} requests")
+    # A fixed cycle that stays within the limit has to stretch its sleep to fit every request
+    requests_per_cycle = 1 if args.batch else args.symbols
+    compliant = max(args.interval, requests_per_cycle / (args.rate_limit * RATE_LIMIT_HEADROOM))
+    modes = [('fixed cycle', False, args.interval), ('adaptive', True, None)]
+    if compliant > args.interval:
+        modes.insert(1, (f'fixed {compliant:g}s', False, compliant))
+    for label, adaptive, interval in modes:
+        server, elapsed, samples = asyncio.run(run_mode(args, adaptive, interval))
+        rate = server.request_count / elapsed / args.exchanges
+        print(f"{label:<12} {rate:6.1f} req/s/exchange, {server.rejected_count:5d} rejected (429)")
+        print(f"{'':<12} near threshold {_ages(samples['near'])}  others {_ages(samples['far'])}  "
+              f"fast exchanges {_ages(samples['fast'])}")
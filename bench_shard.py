@@ -0,0 +1,113 @@
+"measures sharded ingestion throughput into the shared price matrix as workers are added"
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import time
+from shm_mtrx import SharedPriceMatrix
+from shard_ingest import shard_exchanges
+
+SPREAD = 1.0004 # Every message has ask == bid * SPREAD, so a torn cell is detectable
+
+def _message(rng, symbol, exchange_id):
+    """
+    A ccxt-style ticker payload, with the extra fields real exchanges send.
+    """
+    bid = rng.uniform(1, 1000)
+    last = bid * 1.0002
+    return json.dumps({
+        'symbol': symbol, 'exchange': exchange_id, 'timestamp': int(time.time() * 1000),
+        'datetime': '2024-01-01T00:00:00.000Z', 'high': last * 1.02, 'low': last * 0.98,
+        'bid': bid, 'bidVolume': rng.uniform(0, 10), 'ask': bid * SPREAD, 'askVolume': rng.uniform(0, 10),
+        'vwap': last, 'open': last * 0.99, 'close': last, 'last': last, 'previousClose': last * 0.99,
+        'change': last * 0.01, 'percentage': 1.0, 'average': last, 'baseVolume': rng.uniform(1e3, 1e6),
+        'quoteVolume': rng.uniform(1e6, 1e9), 'info': {'s': symbol.replace('/', ''), 'c': str(last)}
+    })
+
+def bench_worker(matrix_name, symbols, exchange_ids, shard, n_messages, start_event, results, seed):
+    """
+    Parses n_messages ticker payloads for the shard and stores them through
+    DataManager into the shared matrix, like an ingestion worker does.
+    """
+    from data_mngr import DataManager
+    from utils import Logger
+    Logger.setLevel('CRITICAL')
+    rng = random.Random(seed)
+    payloads = [(symbol, ex_id, _message(rng, symbol, ex_id)) for symbol in symbols for ex_id in shard]
+    matrix = SharedPriceMatrix(symbols, exchange_ids, name=matrix_name)
+    data_manager = DataManager(None, symbols, shard)
+    data_manager.add_ticker_listener(matrix.on_ticker_update)
+    start_event.wait()
+    start = time.perf_counter()
+    for i in range(n_messages):
+        symbol, ex_id, payload = payloads[i % len(payloads)]
+        ticker = json.loads(payload)
+        data_manager._store_ticker(symbol, ex_id, {'bid': ticker['bid'], 'ask': ticker['ask'],
+                                                   'timestamp': ticker['timestamp']})
+    results.put(time.perf_counter() - start)
+    matrix.close()
+
+def run(n_workers, symbols, exchange_ids, messages_per_exchange, read_check):
+    """
+    Returns (messages/s, finder reads, torn reads retried, inconsistent cells seen).
+    """
+    context = multiprocessing.get_context('spawn')
+    matrix = SharedPriceMatrix(symbols, exchange_ids)
+    start_event = context.Event()
+    results = context.Queue()
+    processes = []
+    total = 0
+    for i, shard in enumerate(shard_exchanges(exchange_ids, n_workers)):
+        n_messages = messages_per_exchange * len(shard)
+        total += n_messages
+        process = context.Process(target=bench_worker, daemon=True, args=(
+            matrix.name, symbols, exchange_ids, shard, n_messages, start_event, results, i))
+        process.start()
+        processes.append(process)
+    time.sleep(1.0) # Let the workers import and build their payloads
+    start = time.perf_counter()
+    start_event.set()
+
+    # The finder reads concurrently, checking every cell it reads is consistent
+    reads = inconsistent = 0
+    rng = random.Random(0)
+    while any(p.is_alive() for p in processes) and results.qsize() < len(processes):
+        matrix.top_opportunities(5, 0.0)
+        reads += 1
+        if read_check:
+            cell = matrix.read(rng.choice(symbols), rng.choice(exchange_ids))
+            if cell is None:
+                continue # Counted in torn_reads
+            bid, ask, _ = cell
+            if bid == bid and abs(ask / bid - SPREAD) > 1e-9: # bid == bid skips NaN (never written)
+                inconsistent += 1
+    for _ in processes:
+        results.get()
+    elapsed = time.perf_counter() - start
+    for process in processes:
+        process.join()
+    torn = matrix.torn_reads
+    matrix.close()
+    return total / elapsed, reads, torn, inconsistent
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--symbols', type=int, default=500)
+    parser.add_argument('--exchanges', type=int, default=8)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--messages', type=int, default=50_000, help='messages per exchange')
+    parser.add_argument('--no-read-check', action='store_true')
+    args = parser.parse_args()
+
+    symbols = [f'SYM{i}/USDT' for i in range(args.symbols)]
+    exchange_ids = [f'ex{i}' for i in range(args.exchanges)]
+    print(f"{args.symbols} symbols x {args.exchanges} exchanges, {args.messages:,} messages per exchange, "
+          f"{os.cpu_count()} CPUs")
+    baseline = None
+    for n_workers in args.workers:
+        rate, reads, torn, inconsistent = run(n_workers, symbols, exchange_ids, args.messages, not args.no_read_check)
+        baseline = baseline or rate
+        print(f"workers={n_workers:<3} {rate:>12,.0f} msg/s  x{rate / baseline:4.2f}  "
+              f"finder reads={reads:,} torn retries={torn} inconsistent cells={inconsistent}")
@@ -0,0 +1,96 @@
+"measures memory per pair and detection-path time of the ticker dict against the array-backed TickerStore"
+
+import argparse
+import random
+import time
+import tracemalloc
+import numpy as np
+from arb_fndr import ArbitrageFinder
+from tkr_store import TickerStore
+
+def feed(args):
+    """
+    Seeded (symbol, exchange_id, bid, ask, timestamp, received_at, updated_at) updates,
+    history_size rounds over every pair.
+    """
+    rng = random.Random(args.seed)
+    symbols = [f'SYM{i}/USDT' for i in range(args.symbols)]
+    exchange_ids = [f'ex{i}' for i in range(args.exchanges)]
+    updates = []
+    for step in range(args.history):
+        for symbol in symbols:
+            for ex_id in exchange_ids:
+                mid = 100 * (1 + rng.gauss(0, 0.002))
+                updates.append((symbol, ex_id, mid * 0.9995, mid * 1.0005, 1.7e12 + step, time.perf_counter(),
+                                float(step)))
+    return symbols, exchange_ids, updates
+
+def build_dict(updates):
+    """
+    The previous layout: a ticker dict per pair plus a last_fetch_time dict.
+    """
+    market_data, last_fetch_time = {}, {}
+    for symbol, ex_id, bid, ask, timestamp, received_at, updated_at in updates:
+        key = (symbol, ex_id)
+        market_data[key] = {'symbol': symbol, 'exchange_id': ex_id, 'bid': bid, 'ask': ask,
+                            'timestamp': timestamp, 'received_at': received_at}
+        last_fetch_time[key] = updated_at
+    return market_data, last_fetch_time
+
+def build_store(symbols, exchange_ids, updates, history_size):
+    store = TickerStore(symbols, exchange_ids, history_size=history_size)
+    for update in updates:
+        store.record(*update)
+    return store
+
+def measure(build):
+    """
+    Returns (result, bytes allocated and still held by build()).
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return result, held
+
+def timed(fn, iterations):
+    times = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return np.percentile(times, 50) * 1e6, np.percentile(times, 99) * 1e6
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--symbols', type=int, default=200)
+    parser.add_argument('--exchanges', type=int, default=5)
+    parser.add_argument('--history', type=int, default=32, help='samples kept per pair')
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    symbols, exchange_ids, updates = feed(args)
+    pairs = args.symbols * args.exchanges
+    print(f"{args.symbols} symbols x {args.exchanges} exchanges = {pairs} pairs, history {args.history}")
+
+    (market_data, _), dict_bytes = measure(lambda: build_dict(updates))
+    _, latest_bytes = measure(lambda: build_store(symbols, exchange_ids, updates, 1))
+    store, store_bytes = measure(lambda: build_store(symbols, exchange_ids, updates, args.history))
+    print(f"{'dict (latest only)':<28} {dict_bytes / pairs:7.0f} B/pair")
+    print(f"{'TickerStore (latest only)':<28} {latest_bytes / pairs:7.0f} B/pair")
+    print(f"{'TickerStore (+history)':<28} {store_bytes / pairs:7.0f} B/pair "
+          f"({store.nbytes() / pairs:.0f} B/pair in arrays)")
+
+    finder = ArbitrageFinder()
+    rng = random.Random(args.seed)
+    top = [dict(zip(('buy_exchange', 'sell_exchange'), rng.sample(exchange_ids, 2)), symbol=rng.choice(symbols))
+           for _ in range(32)] # Stand-ins for one cycle's candidates
+    for label, fn in (
+            ('copy dict + find', lambda: finder.find_top_opportunities(market_data.copy())),
+            ('store + find', lambda: finder.find_top_opportunities(store)),
+            ('store spread_stats (all)', store.spread_stats),
+            ('filter_outliers (top 32)', lambda: finder.filter_outliers(top, store, max_zscore=4.0))):
+        p50, p99 = timed(fn, args.iterations)
+        print(f"{label:<28} p50={p50:8.1f}us p99={p99:8.1f}us")
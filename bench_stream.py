@@ -0,0 +1,62 @@
+"benchmarks streaming ingest throughput and tick-to-decision latency offline"
+
+import argparse
+import asyncio
+import time
+from replay_ws import ReplayStreamServer, synthetic_ticks, load_ticks
+from exc_mngr import ExchangeManager
+from data_mngr import DataManager
+from arb_fndr import ArbitrageFinder
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return float('nan')
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * pct / 100))]
+
+async def main(args):
+    symbols = [f'SYM{i}/USDT' for i in range(args.symbols)]
+    exchange_ids = [f'ex{i}' for i in range(args.exchanges)]
+    ticks = load_ticks(args.ticks) if args.ticks else synthetic_ticks(exchange_ids, symbols, args.count)
+    server = ReplayStreamServer(ticks, rate=args.rate, drop_every=args.drop_every,
+                                disconnect_after=args.disconnect_after)
+    await server.start()
+
+    exchange_manager = ExchangeManager(exchange_ids, clients={})
+    data_manager = DataManager(exchange_manager, symbols, exchange_ids)
+    finder = ArbitrageFinder()
+    latencies = []
+
+    def on_ticker(symbol, ex_id, ticker):
+        # End to end: server send -> stored -> finder decision
+        finder.on_ticker_update(symbol, ex_id, ticker)
+        latencies.append(time.time() * 1000 - ticker['timestamp'])
+
+    data_manager.add_ticker_listener(on_ticker)
+    task = asyncio.create_task(data_manager.stream_all_tickers(
+        {ex_id: server.url_for(ex_id) for ex_id in exchange_ids}))
+    await asyncio.sleep(args.duration)
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    await server.stop()
+
+    latencies.sort()
+    streams = data_manager.streams.values()
+    print(f"updates: {len(latencies)} in {args.duration:.1f}s -> {len(latencies) / args.duration:,.0f} updates/s")
+    print(f"latency ms: p50={percentile(latencies, 50):.3f} p99={percentile(latencies, 99):.3f} "
+          f"max={latencies[-1] if latencies else float('nan'):.3f}")
+    print(f"gaps: {sum(s.gap_count for s in streams)} reconnects: {sum(s.reconnect_count for s in streams)}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--symbols', type=int, default=50)
+    parser.add_argument('--exchanges', type=int, default=3)
+    parser.add_argument('--count', type=int, default=50000, help='synthetic ticks to generate')
+    parser.add_argument('--ticks', help='JSONL file of recorded ticks to replay instead')
+    parser.add_argument('--rate', type=float, default=0, help='messages/s per exchange, 0 = unthrottled')
+    parser.add_argument('--duration', type=float, default=5)
+    parser.add_argument('--drop-every', type=int, default=0)
+    parser.add_argument('--disconnect-after', type=int, default=0)
+    asyncio.run(main(parser.parse_args()))
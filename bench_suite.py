@@ -0,0 +1,220 @@
+"benchmark suite for the detection and execution hot paths"
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+from synth_mrkt import SyntheticMarket
+from arb_fndr import ArbitrageFinder
+from data_mngr import DataManager
+from trade_exec import TradeExecutor
+from utils import Logger
+
+class MockExchangeManager:
+    """
+    ExchangeManager stand-in that answers every call immediately, so
+    TradeExecutor is measured without network or simulated latency.
+    """
+    def __init__(self, exchange_ids):
+        self.exchanges = {ex_id: object() for ex_id in exchange_ids}
+        self.order_books = {}
+
+    async def fetch_balance(self, exchange_id, currency):
+        return 1e12
+
+    async def normalize_amount(self, exchange_id, symbol, amount, price):
+        return amount
+
+    async def create_market_buy_order(self, exchange_id, symbol, amount, price=None, reference_time=None,
+                                      client_order_id=None):
+        return {'id': f'mock_buy_{exchange_id}', 'status': 'closed', 'amount': amount, 'filled': amount, 'average': price}
+
+    async def create_market_sell_order(self, exchange_id, symbol, amount, price=None, reference_time=None,
+                                       client_order_id=None):
+        return {'id': f'mock_sell_{exchange_id}', 'status': 'closed', 'amount': amount, 'filled': amount, 'average': price}
+
+def _summary(samples_ns):
+    """
+    Latency percentiles in microseconds and calls/s from per-call samples.
+    """
+    samples = np.asarray(samples_ns, dtype=float) / 1e3
+    p50, p90, p99 = np.percentile(samples, [50, 90, 99])
+    return {
+        'calls': len(samples),
+        'mean_us': float(samples.mean()),
+        'p50_us': float(p50),
+        'p90_us': float(p90),
+        'p99_us': float(p99),
+        'max_us': float(samples.max()),
+        'throughput_per_s': float(1e6 / samples.mean()),
+    }
+
+def _peak_memory(func, calls=3):
+    """
+    Peak bytes allocated by func() above the current baseline, via tracemalloc.
+    """
+    tracemalloc.start()
+    try:
+        for _ in range(calls):
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            func()
+            peak = tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+    return peak
+
+def _measure(func, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter_ns()
+        func()
+        samples.append(time.perf_counter_ns() - start)
+    return samples
+
+def bench_find_best(market, iterations):
+    finder = ArbitrageFinder()
+    snapshots = [market.market_data() for _ in range(min(iterations, 16))]
+    state = {'i': 0}
+
+    def call():
+        state['i'] += 1
+        finder.find_best_opportunity(snapshots[state['i'] % len(snapshots)])
+    return call
+
+def bench_find_top(market, iterations):
+    finder = ArbitrageFinder()
+    snapshots = [market.market_data() for _ in range(min(iterations, 16))]
+    state = {'i': 0}
+
+    def call():
+        state['i'] += 1
+        finder.find_top_opportunities(snapshots[state['i'] % len(snapshots)])
+    return call
+
+def bench_latest_market_data(market, iterations):
+    data_manager = DataManager(None, market.symbols, market.exchange_ids)
+    data_manager.market_data.update(market.market_data())
+    return data_manager.get_latest_market_data
+
+def bench_execute_trade(market, iterations):
+    executor = TradeExecutor(MockExchangeManager(market.exchange_ids))
+    ticker = market.market_data()[(market.symbols[0], market.exchange_ids[0])]
+    opportunity = {
+        'symbol': market.symbols[0],
+        'buy_exchange': market.exchange_ids[0],
+        'sell_exchange': market.exchange_ids[-1],
+        'buy_price': ticker['ask'],
+        'sell_price': ticker['ask'] * 1.01,
+        'net_profit_percent': 0.8,
+        'estimated_buy_fee_percent': 0.1,
+        'estimated_sell_fee_percent': 0.1
+    }
+    loop = asyncio.new_event_loop()
+
+    def call():
+        loop.run_until_complete(executor.execute_arbitrage_trade(opportunity))
+    return call
+
+BENCHMARKS = {
+    'find_best_opportunity': bench_find_best,
+    'find_top_opportunities': bench_find_top,
+    'get_latest_market_data': bench_latest_market_data,
+    'execute_arbitrage_trade': bench_execute_trade,
+}
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(grid, names, iterations, args):
+    results = []
+    for n_symbols, n_exchanges in grid:
+        for name in names:
+            market = SyntheticMarket(n_symbols, n_exchanges, volatility=args.volatility,
+                                     dislocation_rate=args.dislocation_rate, seed=args.seed)
+            func = BENCHMARKS[name](market, iterations)
+            # Scale iterations down for slow paths so a grid run stays bounded
+            func()
+            start = time.perf_counter()
+            func()
+            single = time.perf_counter() - start
+            n = max(5, min(iterations, int(args.time_budget / max(single, 1e-9))))
+
+            result = {'bench': name, 'symbols': n_symbols, 'exchanges': n_exchanges}
+            result.update(_summary(_measure(func, n)))
+            result['peak_memory_bytes'] = _peak_memory(func)
+            results.append(result)
+            print(f"{name:<24} {n_symbols:>6} {n_exchanges:>4} p50={result['p50_us']:>11.1f}us "
+                  f"p99={result['p99_us']:>11.1f}us {result['throughput_per_s']:>11,.0f}/s "
+                  f"peak={result['peak_memory_bytes'] / 1024:>9.1f}KiB")
+    return results
+
+def compare(results, baseline_path, threshold):
+    """
+    Prints benchmarks whose p50 regressed by more than threshold versus a saved run.
+    Returns True if any regressed.
+    """
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {(r['bench'], r['symbols'], r['exchanges']): r for r in json.load(f)['results']}
+    regressed = False
+    for result in results:
+        old = baseline.get((result['bench'], result['symbols'], result['exchanges']))
+        if not old:
+            continue
+        change = result['p50_us'] / old['p50_us'] - 1
+        if change > threshold:
+            regressed = True
+            print(f"REGRESSION {result['bench']} {result['symbols']}x{result['exchanges']}: "
+                  f"p50 {old['p50_us']:.1f}us -> {result['p50_us']:.1f}us (+{change:.0%})")
+    return regressed
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--symbols', type=int, nargs='+', default=[10, 100, 500])
+    parser.add_argument('--exchanges', type=int, nargs='+', default=[3, 10, 20])
+    parser.add_argument('--bench', nargs='+', choices=sorted(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument('--iterations', type=int, default=1000, help='maximum calls per benchmark')
+    parser.add_argument('--time-budget', type=float, default=2.0, help='seconds per benchmark')
+    parser.add_argument('--volatility', type=float, default=0.0005)
+    parser.add_argument('--dislocation-rate', type=float, default=0.01)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--compare', help='baseline JSON from an earlier run')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed p50 slowdown, 0.2 = 20%%')
+    parser.add_argument('--log-level', default='WARNING', help='bot logger level during the run')
+    args = parser.parse_args()
+
+    Logger.setLevel(getattr(logging, args.log_level))
+    grid = [(s, e) for s in args.symbols for e in args.exchanges]
+    results = run(grid, args.bench, args.iterations, args)
+    report = {
+        'meta': {
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'timestamp': time.time(),
+            'seed': args.seed,
+            'volatility': args.volatility,
+            'dislocation_rate': args.dislocation_rate,
+            'log_level': args.log_level,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved {len(results)} results to {args.output}")
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
@@ -0,0 +1,108 @@
+"measures fetch cycle tail latency against a faulty fake exchange with and without deadlines, hedging and circuit breakers"
+
+import argparse
+import asyncio
+import logging
+import time
+import numpy as np
+from fake_exc import FakeExchangeServer, make_clients
+from exc_mngr import ExchangeManager
+from data_mngr import DataManager
+from arb_fndr import ArbitrageFinder
+from circ_brkr import CircuitBreaker
+from utils import Logger
+
+# (label, deadline, hedged requests, circuit breakers and quote expiry)
+MODES = [
+    ('no controls', False, False, False),
+    ('deadline + breaker', True, False, True),
+    ('deadline + hedge + breaker', True, True, True),
+]
+
+async def run_mode(server, args, deadline, hedge, breakers):
+    """
+    Runs fetch-and-detect cycles while one exchange goes down for a stretch of them.
+
+    Returns:
+        tuple: (cycle seconds array, fetch_stats, opportunities using the down
+                exchange during the outage, quotes withdrawn, circuits opened).
+    """
+    exchange_manager = ExchangeManager(server.exchange_ids, clients=make_clients(server, batch=args.batch),
+                                       markets_cache_dir=None)
+    exchange_manager.fetch_timeout = args.timeout if deadline else None
+    exchange_manager.hedge_requests = hedge
+    exchange_manager.breakers = ({ex_id: CircuitBreaker(ex_id, open_seconds=args.open_seconds)
+                                  for ex_id in server.exchange_ids} if breakers else {})
+    data_manager = DataManager(exchange_manager, server.symbols, server.exchange_ids)
+    finder = ArbitrageFinder()
+    down = server.exchange_ids[-1]
+    outage = range(args.outage_start, args.outage_start + args.outage_cycles)
+    cycle_times, stale_opportunities, withdrawn = [], 0, 0
+    try:
+        await data_manager.fetch_all_tickers_once() # Warm-up, opens the pooled connections
+        for cycle in range(args.cycles):
+            if cycle == outage.start:
+                server.down.add(down)
+            elif cycle == outage.stop:
+                server.down.discard(down)
+            start = time.perf_counter()
+            await data_manager.fetch_all_tickers_once()
+            if breakers:
+                # Staleness is judged on the benchmark's time scale
+                withdrawn += len(data_manager.expire_quotes(args.max_age))
+            opportunities = finder.find_top_opportunities(data_manager.get_latest_market_data(), k=32)
+            cycle_times.append(time.perf_counter() - start)
+            if cycle in outage:
+                stale_opportunities += sum(down in (opp['buy_exchange'], opp['sell_exchange'])
+                                           for opp in opportunities)
+            await asyncio.sleep(args.interval)
+    finally:
+        server.down.clear()
+        await exchange_manager.close()
+    opened = sum(breaker.opened_count for breaker in exchange_manager.breakers.values())
+    return np.array(cycle_times), exchange_manager.fetch_stats, stale_opportunities, withdrawn, opened
+
+async def main(args):
+    symbols = [f'SYM{i}/USDT' for i in range(args.symbols)]
+    exchange_ids = [f'ex{i}' for i in range(args.exchanges)]
+    print(f"{args.symbols} symbols x {args.exchanges} exchanges ({'batched' if args.batch else 'per-symbol'}), "
+          f"{args.cycles} cycles, {args.latency * 1e3:.0f}ms latency, {args.tail_probability:.0%} stragglers "
+          f"+{args.tail_latency:g}s, {args.error_rate:.0%} errors, {exchange_ids[-1]} hangs {args.hang:g}s "
+          f"for cycles {args.outage_start}-{args.outage_start + args.outage_cycles - 1}")
+    print(f"{'mode':<28} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'hedged':>7} {'won':>5} "
+          f"{'timeouts':>8} {'refused':>7} {'opened':>6} {'withdrawn':>9} {'stale opps':>10}")
+    for label, deadline, hedge, breakers in MODES:
+        server = FakeExchangeServer(exchange_ids, symbols, latency=args.latency, seed=args.seed, dispersion=0.01,
+                                    error_rate=args.error_rate, tail_probability=args.tail_probability,
+                                    tail_latency=args.tail_latency, hang_seconds=args.hang)
+        await server.start()
+        try:
+            times, stats, stale, withdrawn, opened = await run_mode(server, args, deadline, hedge, breakers)
+        finally:
+            await server.stop()
+        p50, p95, p99 = np.percentile(times, [50, 95, 99]) * 1e3
+        print(f"{label:<28} {p50:8.1f} {p95:8.1f} {p99:8.1f} {times.max() * 1e3:8.1f} {stats['hedged']:7d} "
+              f"{stats['hedge_wins']:5d} {stats['timeouts']:8d} {stats['refused']:7d} {opened:6d} "
+              f"{withdrawn:9d} {stale:10d}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--symbols', type=int, default=20)
+    parser.add_argument('--exchanges', type=int, default=4)
+    parser.add_argument('--batch', action='store_true', help='one fetch_tickers request per exchange')
+    parser.add_argument('--cycles', type=int, default=300)
+    parser.add_argument('--interval', type=float, default=0.05, help='pause between cycles')
+    parser.add_argument('--latency', type=float, default=0.01)
+    parser.add_argument('--tail-probability', type=float, default=0.02)
+    parser.add_argument('--tail-latency', type=float, default=0.5)
+    parser.add_argument('--error-rate', type=float, default=0.01)
+    parser.add_argument('--hang', type=float, default=2.0, help='seconds a request to the down exchange hangs')
+    parser.add_argument('--outage-start', type=int, default=100)
+    parser.add_argument('--outage-cycles', type=int, default=20)
+    parser.add_argument('--timeout', type=float, default=0.25, help='request deadline')
+    parser.add_argument('--open-seconds', type=float, default=1.0, help='circuit open time before a probe')
+    parser.add_argument('--max-age', type=float, default=1.0, help='quote staleness limit')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    Logger.setLevel(logging.CRITICAL)
+    asyncio.run(main(args))
@@ -0,0 +1,111 @@
+"measures cross-quote detection and its incremental conversion updates on a synthetic multi-quote market"
+
+import argparse
+import random
+import time
+import numpy as np
+from price_mtrx import PriceMatrix
+from xquote_fndr import CrossQuoteFinder
+
+QUOTES = ['USDT', 'USDC', 'USD']
+CONVERSIONS = ['USDC/USDT', 'USDT/USD', 'USDC/USD']
+
+def build(args):
+    """
+    A CrossQuoteFinder with every base quoted in every quote on every exchange.
+    Stablecoin pegs drift a little per exchange, so some bases are cheaper in
+    one quote than in another once converted.
+
+    Returns:
+        tuple: (finder, bases, exchange_ids, {(symbol, exchange_id): (bid, ask)}).
+    """
+    rng = random.Random(args.seed)
+    bases = [f'C{i}' for i in range(args.bases)]
+    exchange_ids = [f'ex{i}' for i in range(args.exchanges)]
+    finder = CrossQuoteFinder(bases, exchange_ids, QUOTES)
+    fair = {base: 10 ** rng.uniform(-1, 4) for base in bases} # In USDT
+    quotes = {}
+    for ex_id in exchange_ids:
+        # Value of each quote in USDT on this exchange
+        peg = {'USDT': 1.0, 'USDC': 1 + rng.gauss(0, args.peg_drift), 'USD': 1 + rng.gauss(0, args.peg_drift)}
+        for symbol in CONVERSIONS:
+            base, quote = symbol.split('/')
+            rate = peg[base] / peg[quote]
+            quotes[symbol, ex_id] = (rate * 0.99995, rate * 1.00005)
+        for base in bases:
+            for quote in QUOTES:
+                mid = fair[base] / peg[quote] * (1 + rng.gauss(0, args.dispersion))
+                quotes[f'{base}/{quote}', ex_id] = (mid * 0.9999, mid * 1.0001)
+    for (symbol, ex_id), (bid, ask) in quotes.items():
+        finder.on_ticker_update(symbol, ex_id, {'bid': bid, 'ask': ask})
+    return finder, bases, exchange_ids, quotes
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e3
+
+def check_same_quote(quotes):
+    """
+    On USDT markets alone, same-quote detection must agree with PriceMatrix.
+    """
+    usdt_only = CrossQuoteFinder(quotes=QUOTES)
+    matrix = PriceMatrix()
+    for (symbol, ex_id), (bid, ask) in quotes.items():
+        if symbol.endswith('/USDT') and symbol not in CONVERSIONS:
+            usdt_only.on_ticker_update(symbol, ex_id, {'bid': bid, 'ask': ask})
+            matrix.update(symbol, ex_id, bid, ask)
+    ours = usdt_only.profit_tensor(include_same_quote=True)
+    n_ex = len(usdt_only.exchange_ids)
+    ours = ours[:, :n_ex, :n_ex] # The USDT venues
+    theirs = matrix.profit_tensor()
+    rows = [matrix.symbol_index[f'{base}/USDT'] for base in usdt_only.bases]
+    cols = [matrix.exchange_index[ex_id] for ex_id in usdt_only.exchange_ids]
+    theirs = theirs[np.ix_(rows, cols, cols)]
+    return np.allclose(ours, theirs, equal_nan=True)
+
+def main(args):
+    finder, bases, exchange_ids, quotes = build(args)
+    venues = len(QUOTES) * len(exchange_ids)
+    print(f"{len(bases)} bases x {len(QUOTES)} quotes x {len(exchange_ids)} exchanges "
+          f"({venues} venues, {len(bases) * venues * venues} buy/sell cells)")
+
+    full_ms = timed(lambda: (finder._normalize(range(len(QUOTES))), finder.find_opportunities(k=32)),
+                    args.repeat)
+    detect_ms = timed(lambda: finder.find_opportunities(k=32), args.repeat)
+
+    rng = random.Random(args.seed + 1)
+    symbol_quotes = [key for key in quotes if key[0] not in CONVERSIONS]
+    conversion_quotes = [key for key in quotes if key[0] in CONVERSIONS]
+
+    def tick(keys):
+        symbol, ex_id = rng.choice(keys)
+        bid, ask = quotes[symbol, ex_id]
+        move = 1 + rng.gauss(0, 0.00005)
+        finder.on_ticker_update(symbol, ex_id, {'bid': bid * move, 'ask': ask * move})
+
+    ticker_ms = timed(lambda: tick(symbol_quotes), args.repeat * 10)
+    conversion_ms = timed(lambda: tick(conversion_quotes), args.repeat * 10)
+    # The same conversion move with every quote slice re-priced
+    rescan_ms = timed(lambda: (tick(conversion_quotes), finder._normalize(range(len(QUOTES)))), args.repeat * 10)
+
+    cross = finder.find_opportunities(k=10 ** 6)
+    both = finder.find_opportunities(k=10 ** 6, include_same_quote=True)
+    print(f"{'normalize all + detect':<32} {full_ms:9.3f} ms")
+    print(f"{'detect':<32} {detect_ms:9.3f} ms")
+    print(f"{'ticker update':<32} {ticker_ms * 1e3:9.1f} us")
+    print(f"{'conversion update, incremental':<32} {conversion_ms * 1e3:9.1f} us")
+    print(f"{'conversion update, full rescan':<32} {rescan_ms * 1e3:9.1f} us")
+    print(f"opportunities: {len(both) - len(cross)} same-quote, {len(cross)} only visible across quotes")
+    print(f"same-quote tensor matches PriceMatrix: {check_same_quote(quotes)}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--bases', type=int, default=200)
+    parser.add_argument('--exchanges', type=int, default=5)
+    parser.add_argument('--peg-drift', type=float, default=0.001, help='stablecoin deviation from 1 USDT')
+    parser.add_argument('--dispersion', type=float, default=0.002, help='per-market price noise')
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    main(parser.parse_args())
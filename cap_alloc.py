@@ -0,0 +1,87 @@
+"allocates capital across several opportunities per cycle"
+
+from config import MIN_TRADE_AMOUNT, MAX_TRADE_AMOUNT
+from trade_exec import DEFAULT_TRADE_AMOUNT_QUOTE
+
+def _candidate(opportunity):
+    """
+    Returns (opportunity, wanted base amount, expected profit per base unit).
+    Unsized opportunities get TradeExecutor's default amount and their
+    top-of-book margin.
+    """
+    if 'trade_amount' in opportunity:
+        amount = opportunity['trade_amount']
+        per_unit = opportunity['expected_profit'] / amount if amount else 0.0
+    else:
+        amount = DEFAULT_TRADE_AMOUNT_QUOTE / opportunity['buy_price']
+        per_unit = opportunity['buy_price'] * opportunity['net_profit_percent'] / 100
+    return opportunity, amount, per_unit
+
+def _greedy(candidates, balances, max_trade_amount, min_trade_amount):
+    """
+    Takes candidates in the given order, shrinking each to what is left of
+    the balances and skipping those whose books are already in use.
+    """
+    remaining = dict(balances)
+    used_books = set()
+    chosen = []
+    total = 0.0
+    for opportunity, amount, per_unit in candidates:
+        symbol = opportunity['symbol']
+        buy_book = (symbol, opportunity['buy_exchange'])
+        sell_book = (symbol, opportunity['sell_exchange'])
+        if buy_book in used_books or sell_book in used_books or per_unit <= 0:
+            continue
+        base, quote = symbol.split('/')
+        quote_key = (opportunity['buy_exchange'], quote)
+        base_key = (opportunity['sell_exchange'], base)
+        # Sized trades fill at the book's VWAP, not at the top of book. A shrunk
+        # trade walks fewer levels, so the full size's VWAP never undercharges it.
+        buy_price = opportunity.get('buy_vwap', opportunity['buy_price'])
+        unit_cost = buy_price * (1 + opportunity.get('estimated_buy_fee_percent', 0.0) / 100)
+        amount = min(amount, max_trade_amount / buy_price,
+                     remaining.get(quote_key, 0.0) / unit_cost, remaining.get(base_key, 0.0))
+        if amount * buy_price < min_trade_amount:
+            continue
+        remaining[quote_key] -= amount * unit_cost
+        remaining[base_key] -= amount
+        used_books.update((buy_book, sell_book))
+        chosen.append(dict(opportunity, trade_amount=amount, trade_amount_quote=amount * buy_price,
+                           expected_profit=amount * per_unit))
+        total += amount * per_unit
+    return chosen, total
+
+def allocate_trades(opportunities, balances, max_trade_amount=MAX_TRADE_AMOUNT, min_trade_amount=MIN_TRADE_AMOUNT):
+    """
+    Picks a set of trades to execute together this cycle.
+
+    Trades must not share an order book, since each one was sized against
+    the full depth of its books, and together they must fit the free
+    balances: the quote currency spent on each buy exchange, at the sized
+    trade's VWAP plus fee, and the base currency sold on each sell exchange. Every trade is also capped at
+    max_trade_amount of quote currency and dropped below min_trade_amount.
+
+    Two greedy passes are made, one by expected profit and one by profit
+    per unit of capital, and the more profitable allocation is returned.
+    Profit is assumed to scale linearly when a trade is shrunk to fit,
+    which underestimates it, since smaller trades see less slippage.
+
+    Args:
+        opportunities (list): Opportunity dicts, sized by ArbitrageFinder.rank_by_executable_profit
+                              or unsized from find_top_opportunities.
+        balances (dict): {(exchange_id, currency): free amount}.
+
+    Returns:
+        list: Copies of the chosen opportunities, most profitable first, with
+              'trade_amount', 'trade_amount_quote' and 'expected_profit' set
+              to the allocated size.
+    """
+    candidates = [_candidate(opportunity) for opportunity in opportunities]
+    by_profit = sorted(candidates, key=lambda c: c[1] * c[2], reverse=True)
+    by_return = sorted(candidates, key=lambda c: c[2] / c[0].get('buy_vwap', c[0]['buy_price']), reverse=True)
+    chosen, total = _greedy(by_profit, balances, max_trade_amount, min_trade_amount)
+    alternative, alternative_total = _greedy(by_return, balances, max_trade_amount, min_trade_amount)
+    if alternative_total > total:
+        chosen = alternative
+    chosen.sort(key=lambda opp: opp['expected_profit'], reverse=True)
+    return chosen
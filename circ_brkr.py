@@ -0,0 +1,109 @@
+"per-exchange circuit breakers with half-open probing"
+
+import time
+from utils import Logger
+from config import CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_OPEN_SECONDS, CIRCUIT_MAX_OPEN_SECONDS
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+class CircuitBreaker:
+    """
+    Stops requests to an exchange that keeps failing.
+
+    Closed, every request goes through and consecutive failures are counted.
+    After failure_threshold of them the circuit opens: requests are refused
+    without a round-trip for open_seconds. Then it turns half-open and lets a
+    single probe through. A successful probe closes the circuit; a failed one
+    opens it again for twice as long, up to max_open_seconds.
+
+    While the circuit is not closed the exchange's quotes are excluded.
+    """
+    __slots__ = ('exchange_id', 'failure_threshold', 'open_seconds', 'max_open_seconds', 'clock', 'state',
+                 'failures', 'open_for', 'retry_at', 'opened_count')
+
+    def __init__(self, exchange_id, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, open_seconds=CIRCUIT_OPEN_SECONDS,
+                 max_open_seconds=CIRCUIT_MAX_OPEN_SECONDS, clock=time.monotonic):
+        """
+        Args:
+            exchange_id (str): Exchange guarded, for logging.
+            failure_threshold (int): Consecutive failures that open the circuit.
+            open_seconds (float): First wait before a probe is let through.
+            max_open_seconds (float): Cap of the doubling wait after failed probes.
+            clock (callable): Time source.
+        """
+        self.exchange_id = exchange_id
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0 # Consecutive, while closed
+        self.open_for = open_seconds # Wait of the current or next open period
+        self.retry_at = 0.0 # When an open circuit lets a probe through
+        self.opened_count = 0
+
+    @property
+    def excluded(self):
+        """
+        Whether the exchange's quotes should be ignored.
+        """
+        return self.state != CLOSED
+
+    def available(self):
+        """
+        Whether allow() would let a request through now, without claiming it.
+        """
+        if self.state == CLOSED:
+            return True
+        return self.state == OPEN and self.clock() >= self.retry_at
+
+    def allow(self):
+        """
+        Claims permission for one request. An open circuit past its wait turns
+        half-open and hands out exactly one probe; every allowed request must
+        be followed by record_success, record_failure or abandon.
+        """
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and self.clock() >= self.retry_at:
+            self.state = HALF_OPEN
+            Logger.info("Circuit for %s half-open, probing.", self.exchange_id)
+            return True
+        return False
+
+    def record_success(self):
+        if self.state == OPEN:
+            return # A request sent before the circuit opened; only a probe may close it
+        if self.state == HALF_OPEN:
+            Logger.info("Circuit for %s closed, its quotes are used again.", self.exchange_id)
+            self.open_for = self.open_seconds
+        self.state = CLOSED
+        self.failures = 0
+
+    def record_failure(self):
+        if self.state == HALF_OPEN:
+            self.open_for = min(self.open_for * 2, self.max_open_seconds)
+            self._open()
+            return
+        if self.state == CLOSED:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self._open()
+
+    def abandon(self):
+        """
+        Reports that an allowed request was cancelled without an outcome. A
+        cancelled probe lets the next request probe instead.
+        """
+        if self.state == HALF_OPEN:
+            self.state = OPEN
+            self.retry_at = self.clock()
+
+    def _open(self):
+        self.state = OPEN
+        self.failures = 0
+        self.retry_at = self.clock() + self.open_for
+        self.opened_count += 1
+        Logger.warning("Circuit for %s open, excluding its quotes for %.1fs.", self.exchange_id, self.open_for)
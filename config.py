@@ -4,7 +4,43 @@ DEFAULT_TAKER_FEE_PERCENT = 0.1
 MIN_PROFIT_PERCENT = 0.2
 MIN_TRADE_AMOUNT = 10
 MAX_TRADE_AMOUNT = 1000
+CONCURRENT_LEGS = False # Submit buy and sell legs at the same time; bench_legs shows more unwinds than it saves
+LEG_TIMEOUT_SECONDS = 2.0 # Deadline for each order leg before it is cancelled
+UNWIND_ATTEMPTS = 3 # Orders tried to flatten an unhedged leg before giving up
+TOP_K_OPPORTUNITIES = 5
+BATCH_EXECUTION = True # Execute every non-conflicting opportunity the balances allow, not just the best
+BATCH_CANDIDATES = 32 # Opportunities considered by the allocator each cycle
+TICKER_HISTORY_SIZE = 32 # Recent bids/asks kept per (symbol, exchange) for rolling spread statistics
+SPREAD_OUTLIER_ZSCORE = None # Drop opportunities whose spread z-score exceeds this, e.g. 4.0; None keeps all
+SPREAD_OUTLIER_MIN_SAMPLES = 16 # Spread history needed before the z-score filter applies
+ORDER_BOOK_DEPTH = 50 # Levels kept per side of each order book
+SLIPPAGE_AWARE_SIZING = True # Size trades and rank opportunities using order book depth
+CYCLE_DETECTION = False # Also search for triangular / cross-exchange cycles
+CROSS_EXCHANGE_TRANSFER_PERCENT = 0.0 # Cost of moving a currency between exchanges in a cycle
+CROSS_QUOTE_DETECTION = False # Also compare each base across quote currencies, e.g. BTC/USDT with BTC/USDC
+QUOTE_CURRENCIES = ['USDT', 'USDC', 'USD'] # Quotes compared; every TARGET_SYMBOLS base is tracked in each
+COMMON_QUOTE = 'USDT' # Quote every price is converted into for comparison
+CONVERSION_SYMBOLS = ['USDC/USDT', 'USDT/USD', 'USDC/USD'] # Stablecoin pairs the conversion rates come from
 CHECK_INTERVAL_SECONDS = 5
+# Adaptive polling (poll_sched.PollScheduler)
+RATE_LIMITS = {} # {exchange_id: requests per second}; others use the client's ccxt rateLimit
+DEFAULT_RATE_LIMIT = 10 # Requests per second when an exchange reports no limit
+RATE_LIMIT_HEADROOM = 0.8 # Fraction of each rate limit the poller and hedged requests may spend
+POLL_MIN_INTERVAL_SECONDS = 0.5 # Symbols whose spread is at MIN_PROFIT_PERCENT
+POLL_MAX_INTERVAL_SECONDS = 5 # Symbols POLL_SPREAD_SCALE_PERCENT or more away from it
+POLL_SPREAD_SCALE_PERCENT = 0.5
+POLL_MAX_IN_FLIGHT = 8 # Concurrent per-symbol requests per exchange
+# Tail-latency control of exchange requests (exc_mngr.ExchangeManager, circ_brkr.CircuitBreaker)
+FETCH_TIMEOUT_SECONDS = 2.0 # Deadline of each ticker or order book request; None waits forever
+HEDGE_REQUESTS = True # Send a duplicate of a request still unanswered after HEDGE_QUANTILE of recent latencies
+HEDGE_QUANTILE = 0.95 # About 5% of requests get a hedge, if the rate limit headroom has a token for it
+HEDGE_MIN_SAMPLES = 20 # Latencies needed per exchange before hedging starts
+HEDGE_WINDOW = 256 # Recent latencies kept per exchange and request kind
+CIRCUIT_FAILURE_THRESHOLD = 5 # Consecutive failed requests that open an exchange's circuit
+CIRCUIT_OPEN_SECONDS = 10 # Wait before an open circuit lets a probe through; doubles after each failed probe
+CIRCUIT_MAX_OPEN_SECONDS = 120
+QUOTE_MAX_AGE_SECONDS = 10 # Quotes older than this are withdrawn from the finder
+INCREMENTAL_EVALUATION = True # Re-evaluate only the symbol whose ticker changed
 TARGET_SYMBOLS = [
     'BTC/USDT',
     'ETH/USDT',
@@ -13,5 +49,44 @@ TARGET_SYMBOLS = [
     'ADA/USDT'
 ]
 EXCHANGE_IDS = ['binance', 'kucoin', 'gateio']
+STREAMING_MODE = False # Push tickers from websocket streams instead of polling
+STREAM_URLS = {} # {exchange_id: websocket url}; exchanges without a url keep polling
+STREAM_STALE_SECONDS = 10 # A stream with no message for this long falls back to polling
+STREAM_RECONNECT_MAX_SECONDS = 30
+SHARDED_INGESTION_WORKERS = 0 # Processes ingesting tickers into a shared-memory matrix; 0 ingests in the main loop
+SHARDED_SCAN_INTERVAL_SECONDS = 0.05 # How often the main process checks the shared matrix for new writes
+RECORD_TICKS_PATH = None # Directory to record every received ticker into, e.g. 'recordings/today'
+METRICS_ENABLED = True # Hot-path latency histograms, cheap enough to leave on
+METRICS_HOST = '127.0.0.1'
+METRICS_PORT = 9108 # Prometheus text endpoint; None disables the server
+# Simulated order execution (sim_exc.SimulatedExchange)
+SIM_LATENCY_SECONDS = 0.05 # Median order round-trip
+SIM_LATENCY_JITTER = 0.5 # Log-normal sigma
+SIM_FILL_PROBABILITY = 0.97
+SIM_PARTIAL_FILL_PROBABILITY = 0.05
+SIM_SLIPPAGE_PERCENT = 0.01
+SIM_VOLATILITY_PERCENT = 0.05 # Adverse drift per sqrt(second) of exposure
+SIM_STARTING_BALANCES = { # Paper account of every simulated exchange
+    'USDT': 10000.0,
+    'BTC': 0.1,
+    'ETH': 3.0,
+    'XRP': 4000.0,
+    'SOL': 50.0,
+    'ADA': 15000.0
+}
+PAPER_TRADING = True # Read balances from the simulated paper accounts instead of the real ones
+# Account and market metadata cache (ttl_cache.TTLCache)
+CACHE_MAX_ENTRIES = 1024
+BALANCE_CACHE_TTL = 30 # Seconds; fills update cached balances in between
+FEE_CACHE_TTL = 3600
+MARKET_CACHE_TTL = 3600
+MARKETS_CACHE_DIR = '.markets_cache' # On-disk markets served at startup, then refreshed; None disables it
+MARKETS_CACHE_VERSION = 1 # Bump when the stored market format changes
+MARKETS_CACHE_MAX_AGE = 7 * 86400 # Seconds; older files are ignored
+# Trade journal (trd_jrnl.TradeJournal)
+TRADE_JOURNAL_PATH = None # JSONL file to journal every opportunity and trade into, e.g. 'journal/trades.jsonl'
+JOURNAL_MAX_PENDING = 10000 # Entries queued for the writer before the full policy applies
+JOURNAL_BATCH_SIZE = 256
+JOURNAL_FULL_POLICY = 'drop' # 'drop' new entries or 'block' the caller when the queue is full
 LOG_FILE = 'logs'
 LOG_LEVEL = 'INFO'
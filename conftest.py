@@ -0,0 +1,41 @@
+"shared pytest fixtures: a controllable clock and the local fake exchange"
+
+import asyncio
+import pytest
+from fake_exc import FakeExchangeServer, make_clients
+from exc_mngr import ExchangeManager
+
+class FakeClock:
+    """
+    Time source that only moves when a test sets `now`.
+    """
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+@pytest.fixture
+def run_with_exchange():
+    """
+    Returns run(test, batch=True, pooled=True, **server_args), which runs
+    `await test(server, exchange_manager)` against a fake exchange 'ex0'
+    serving BTC, ETH and SOL against USDT, and shuts both down afterwards.
+    """
+    def run(test, batch=True, pooled=True, **server_args):
+        async def main():
+            server = FakeExchangeServer(['ex0'], ['BTC/USDT', 'ETH/USDT', 'SOL/USDT'], **server_args)
+            await server.start()
+            exchange_manager = ExchangeManager(['ex0'], clients=make_clients(server, batch, pooled),
+                                               markets_cache_dir=None)
+            try:
+                await test(server, exchange_manager)
+            finally:
+                await exchange_manager.close()
+                await server.stop()
+        asyncio.run(main())
+    return run
@@ -0,0 +1,292 @@
+"Finds triangular and cross-exchange arbitrage cycles"
+
+import math
+import numpy as np
+from config import MIN_PROFIT_PERCENT, DEFAULT_TAKER_FEE_PERCENT, CROSS_EXCHANGE_TRANSFER_PERCENT
+
+EPSILON = 1e-12 # Ignore cycles whose log-return is within float noise of zero
+
+class CycleFinder:
+    """
+    Detects profitable cycles in a market graph.
+
+    Every (exchange, currency) is a node. Each market adds two edges weighted
+    by -log of the fee-adjusted rate: base -> quote at the bid and quote -> base
+    at the ask. The same currency on two exchanges is joined by transfer edges,
+    so cycles can stay on one exchange (triangular) or span several. A cycle
+    with negative total weight multiplies capital, i.e. is an arbitrage.
+
+    The graph lives in growable NumPy edge arrays whose weights are updated
+    in place. Detection is a frontier-based Bellman-Ford: a full pass after
+    structural changes, otherwise only edges touched since the last run are
+    checked against the stored potentials and relaxation spreads from there.
+    A negative cycle below min_profit_percent does not end the run: one of
+    its market edges is set aside so relaxation can converge, and is checked
+    again on the next run in case the cycle grew.
+    """
+    def __init__(self, fee_percent=DEFAULT_TAKER_FEE_PERCENT,
+                 transfer_percent=CROSS_EXCHANGE_TRANSFER_PERCENT):
+        self.fee_percent = fee_percent
+        self.transfer_weight = -math.log(1 - transfer_percent / 100)
+
+        self.node_index = {} # {(exchange_id, currency): node}
+        self.node_keys = []
+        self.currency_nodes = {} # {currency: [node, ...]} across exchanges
+
+        self.edge_count = 0
+        self.src = np.zeros(0, dtype=np.int64)
+        self.dst = np.zeros(0, dtype=np.int64)
+        self.weight = np.zeros(0)
+        self.edge_labels = [] # (exchange_id, symbol, 'sell'|'buy') or (None, currency, 'transfer')
+        self.market_edges = {} # {(exchange_id, symbol): (sell_edge, buy_edge)}
+        self.quotes = {} # {(exchange_id, symbol): (bid, ask)} behind the market edges
+        self.fee_percents = {} # {(symbol, exchange_id): taker fee percent}, others use fee_percent
+        self._reserve_edges(64)
+
+        self.dist = np.zeros(0) # Potentials from the last run, feasible when no cycle was found
+        self._offsets = None # CSR out-edge index, rebuilt after structural changes
+        self._out_edges = None
+        self._structure_dirty = True
+        self._feasible = False
+        self._touched = set()
+        self._suppressed = set() # Market edges closing unprofitable cycles, left out of the potentials
+
+    # --- graph construction ---
+
+    def _reserve_edges(self, capacity):
+        if capacity <= self.src.shape[0]:
+            return
+        capacity = max(capacity, self.src.shape[0] * 2)
+        for name, fill in (('src', 0), ('dst', 0), ('weight', np.inf)):
+            old = getattr(self, name)
+            new = np.full(capacity, fill, dtype=old.dtype)
+            new[:self.edge_count] = old[:self.edge_count]
+            setattr(self, name, new)
+
+    def _add_edge(self, u, v, label):
+        self._reserve_edges(self.edge_count + 1)
+        edge = self.edge_count
+        self.src[edge], self.dst[edge] = u, v
+        self.weight[edge] = np.inf # Disabled until a price arrives
+        self.edge_labels.append(label)
+        self.edge_count += 1
+        self._structure_dirty = True
+        return edge
+
+    def _node(self, exchange_id, currency):
+        key = (exchange_id, currency)
+        node = self.node_index.get(key)
+        if node is not None:
+            return node
+
+        node = len(self.node_keys)
+        self.node_index[key] = node
+        self.node_keys.append(key)
+        for other in self.currency_nodes.setdefault(currency, []):
+            for u, v in ((node, other), (other, node)):
+                edge = self._add_edge(u, v, (None, currency, 'transfer'))
+                self.weight[edge] = self.transfer_weight
+        self.currency_nodes[currency].append(node)
+        return node
+
+    def update_market(self, exchange_id, symbol, bid, ask, fee_percent=None):
+        """
+        Sets the two edge weights for a market from its latest bid/ask,
+        adding the market to the graph the first time it is seen.
+        A missing price disables the corresponding edge. Without fee_percent
+        the market's entry from set_fee_percents applies.
+        """
+        edges = self.market_edges.get((exchange_id, symbol))
+        if edges is None:
+            base, quote = symbol.split('/')
+            u, v = self._node(exchange_id, base), self._node(exchange_id, quote)
+            edges = (self._add_edge(u, v, (exchange_id, symbol, 'sell')),
+                     self._add_edge(v, u, (exchange_id, symbol, 'buy')))
+            self.market_edges[(exchange_id, symbol)] = edges
+
+        self.quotes[(exchange_id, symbol)] = (bid, ask)
+        if fee_percent is None:
+            fee_percent = self.fee_percents.get((symbol, exchange_id), self.fee_percent)
+        fee = fee_percent / 100
+        sell_edge, buy_edge = edges
+        # Same per-unit cost/revenue model as ArbitrageFinder
+        self.weight[sell_edge] = -math.log(bid * (1 - fee)) if bid else np.inf
+        self.weight[buy_edge] = math.log(ask * (1 + fee)) if ask else np.inf
+        self._touched.update(edges)
+
+    def on_ticker_update(self, symbol, exchange_id, ticker):
+        """
+        DataManager ticker listener: updates the market's edges in place.
+        """
+        self.update_market(exchange_id, symbol, ticker.get('bid'), ticker.get('ask'))
+
+    def exclude_quote(self, symbol, exchange_id):
+        """
+        DataManager exclusion listener: disables the edges of a stale quote or
+        of an exchange whose circuit is open, until its next ticker.
+        """
+        if (exchange_id, symbol) in self.market_edges:
+            self.update_market(exchange_id, symbol, None, None)
+
+    def set_fee_percents(self, fee_percents):
+        """
+        Installs exact taker fees, e.g. from ExchangeManager.load_fee_table,
+        and re-weights the markets already in the graph.
+
+        Args:
+            fee_percents (dict): {(symbol, exchange_id): taker fee percent}.
+        """
+        self.fee_percents.update(fee_percents)
+        for symbol, exchange_id in fee_percents:
+            quote = self.quotes.get((exchange_id, symbol))
+            if quote is not None:
+                self.update_market(exchange_id, symbol, *quote)
+
+    def _rebuild_index(self):
+        """
+        Rebuilds the CSR out-edge index and resizes per-node arrays.
+        """
+        n = len(self.node_keys)
+        src = self.src[:self.edge_count]
+        self._out_edges = np.argsort(src, kind='stable')
+        self._offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n), out=self._offsets[1:])
+        if self.dist.shape[0] != n:
+            dist = np.zeros(n)
+            dist[:self.dist.shape[0]] = self.dist[:n]
+            self.dist = dist
+        self._structure_dirty = False
+        self._feasible = False # New nodes and edges have no valid potentials yet
+
+    # --- detection ---
+
+    def _out_edges_of(self, nodes):
+        """
+        Returns the ids of all edges leaving the given nodes, using the CSR index.
+        """
+        starts = self._offsets[nodes]
+        counts = self._offsets[nodes + 1] - starts
+        total = int(counts.sum())
+        if total == 0:
+            return np.zeros(0, dtype=np.int64)
+        # Offsets of each node's run within the output, then walk each run
+        run_starts = np.cumsum(counts) - counts
+        positions = np.arange(total) - np.repeat(run_starts, counts) + np.repeat(starts, counts)
+        return self._out_edges[positions]
+
+    def find_cycles(self, min_profit_percent=MIN_PROFIT_PERCENT):
+        """
+        Runs negative-cycle detection, incrementally when possible.
+
+        Returns:
+            list: Profitable cycles, best first. Each is a dict with 'nodes'
+                  [(exchange_id, currency), ...], 'legs' [(exchange_id, symbol, side), ...]
+                  and 'profit_percent'.
+        """
+        if self._structure_dirty:
+            self._rebuild_index()
+        n = len(self.node_keys)
+        if n == 0:
+            return []
+
+        if self._feasible:
+            # Only touched edges can violate the stored potentials
+            self._touched.update(self._suppressed)
+            touched = np.fromiter(self._touched, dtype=np.int64, count=len(self._touched))
+            violated = touched[self.dist[self.src[touched]] + self.weight[touched] < self.dist[self.dst[touched]] - EPSILON]
+            self._touched.clear()
+            if violated.size == 0:
+                return []
+            edges = violated
+        else:
+            self.dist.fill(0.0) # Virtual source connected to every node with weight 0
+            self._touched.clear()
+            edges = np.arange(self.edge_count)
+        self._suppressed.clear()
+
+        pred = np.full(n, -1, dtype=np.int64)
+        blocked = None
+        for _ in range(n):
+            if blocked is not None:
+                edges = edges[~blocked[edges]]
+            src, dst = self.src[edges], self.dst[edges]
+            candidate = self.dist[src] + self.weight[edges]
+            improving = candidate < self.dist[dst] - EPSILON
+            if not improving.any():
+                self._feasible = True
+                return []
+
+            edges, src, dst, candidate = edges[improving], src[improving], dst[improving], candidate[improving]
+            np.minimum.at(self.dist, dst, candidate)
+            best = candidate <= self.dist[dst] # Edges that achieved the new minimum
+            pred[dst[best]] = edges[best]
+
+            negative = self._extract_cycles(pred)
+            if negative is not None:
+                cycles = [self._describe(cycle_edges, total) for total, cycle_edges in negative
+                          if (math.exp(-total) - 1) * 100 > min_profit_percent]
+                if cycles:
+                    self._feasible = False
+                    cycles.sort(key=lambda cycle: cycle['profit_percent'], reverse=True)
+                    return cycles
+                # Only unprofitable cycles so far, which would relax forever and
+                # hide larger ones still forming: set one market edge of each aside
+                if blocked is None:
+                    blocked = np.zeros(self.edge_count, dtype=bool)
+                for _, cycle_edges in negative:
+                    edge = next(e for e in cycle_edges if self.edge_labels[e][2] != 'transfer')
+                    blocked[edge] = True
+                    pred[self.dst[edge]] = -1
+                    self._suppressed.add(edge)
+            edges = self._out_edges_of(np.unique(dst))
+        self._feasible = False
+        return []
+
+    def _extract_cycles(self, pred):
+        """
+        Finds cycles in the predecessor graph by pointer doubling.
+
+        Returns:
+            list or None: None if the predecessor graph is acyclic, otherwise the
+                          negative cycles found as (total weight, [edge, ...]),
+                          possibly none when every cycle was a stale predecessor.
+        """
+        n = pred.shape[0]
+        # pred_node[v] is the node before v, with n as an absorbing sink for roots
+        pred_node = np.full(n + 1, n, dtype=np.int64)
+        has_pred = pred >= 0
+        pred_node[:n][has_pred] = self.src[pred[has_pred]]
+
+        jump = pred_node
+        for _ in range(max(1, math.ceil(math.log2(n + 1)))):
+            jump = jump[jump]
+        on_cycle = np.unique(jump[:n][jump[:n] != n])
+        if on_cycle.size == 0:
+            return None
+
+        cycles, seen = [], set()
+        for start in on_cycle.tolist():
+            if start in seen:
+                continue
+            cycle_edges, node = [], start
+            while True:
+                seen.add(node)
+                edge = int(pred[node])
+                cycle_edges.append(edge)
+                node = int(self.src[edge])
+                if node == start:
+                    break
+            cycle_edges.reverse()
+
+            total = float(self.weight[cycle_edges].sum())
+            if total >= -EPSILON:
+                continue # Stale predecessor, not a real negative cycle
+            cycles.append((total, cycle_edges))
+        return cycles
+
+    def _describe(self, cycle_edges, total):
+        return {
+            'nodes': [self.node_keys[int(self.src[e])] for e in cycle_edges],
+            'legs': [self.edge_labels[e] for e in cycle_edges],
+            'profit_percent': (math.exp(-total) - 1) * 100
+        }
@@ -1,65 +1,312 @@
 "manages price data"
 
 import asyncio
+import time
+import numpy as np
 from utils import Logger
-from config import EXCHANGE_IDS, TARGET_SYMBOLS, CHECK_INTERVAL_SECONDS
+from metrics import Metrics
+from config import (EXCHANGE_IDS, TARGET_SYMBOLS, CHECK_INTERVAL_SECONDS, STREAM_URLS, DEFAULT_TAKER_FEE_PERCENT,
+                    POLL_MAX_IN_FLIGHT, QUOTE_MAX_AGE_SECONDS)
+from ws_feed import TickerStream
+from poll_sched import PollScheduler
+from tkr_store import TickerStore
+from price_mtrx import cross_spread_percent
 
 class DataManager:
     """
     Manages fetching and storing real-time market data from multiple exchanges.
     """
-    def __init__(self, exchange_manager):
+    def __init__(self, exchange_manager, symbols=None, exchange_ids=None, spread_fn=None):
+        """
+        Args:
+            exchange_manager (ExchangeManager): Source of tickers.
+            symbols (list, optional): Symbols to track, defaults to TARGET_SYMBOLS.
+            exchange_ids (list, optional): Exchanges to track, defaults to EXCHANGE_IDS.
+            spread_fn (callable, optional): spread_fn(symbol) -> net spread percent used to
+                                            prioritise polling, e.g. ArbitrageFinder.spread_percent.
+                                            Defaults to an estimate from the stored tickers.
+        """
         self.exchange_manager = exchange_manager
-        # Stores the latest ticker data: {(symbol, exchange_id): {bid, ask, timestamp}}
-        self.market_data = {}
-        self.last_fetch_time = {} # To track last update for each (symbol, exchange)
+        self.spread_fn = spread_fn or self.spread_percent
+        self.symbols = list(symbols or TARGET_SYMBOLS)
+        self.exchange_ids = list(exchange_ids or EXCHANGE_IDS)
+        # Latest tickers and their recent history, interned and array-backed.
+        # Still readable as {(symbol, exchange_id): {bid, ask, timestamp, ...}}.
+        self.market_data = TickerStore(self.symbols, self.exchange_ids)
+        self.ticker_listeners = [] # Callbacks notified on every ticker write
+        self.exclusion_listeners = [] # Callbacks notified when expire_quotes withdraws a quote
+        self.streams = {} # {exchange_id: TickerStream} in streaming mode
+        self.pollers = {} # {exchange_id: PollScheduler} of the running pollers
+        self.quoted_exchanges = set() # Exchanges that delivered a ticker, until all have
+        self.ready = asyncio.Event() # Set once every exchange delivered a ticker
+
+    def symbols_for(self, ex_id):
+        """
+        The tracked symbols an exchange lists, so requests never name a market it lacks.
+        """
+        if self.exchange_manager is None:
+            return self.symbols
+        return self.exchange_manager.listed_symbols(ex_id, self.symbols)
+
+    def add_ticker_listener(self, callback):
+        """
+        Registers callback(symbol, exchange_id, ticker_data), called each time a ticker is stored.
+        """
+        self.ticker_listeners.append(callback)
+
+    def add_exclusion_listener(self, callback):
+        """
+        Registers callback(symbol, exchange_id), called each time expire_quotes withdraws a quote.
+        """
+        self.exclusion_listeners.append(callback)
 
     async def fetch_all_tickers_periodically(self):
         """
         Continuously fetches tickers for all target symbols across all configured exchanges.
+        Each exchange is polled independently, so a slow one does not delay the others.
         This runs as a background task.
         """
-        while True:
-            tasks = []
-            for ex_id in EXCHANGE_IDS:
-                for symbol in TARGET_SYMBOLS:
-                    tasks.append(self._fetch_and_update_ticker(ex_id, symbol))
-            
-            await asyncio.gather(*tasks)
-            await asyncio.sleep(CHECK_INTERVAL_SECONDS) # Wait before next fetch cycle
+        await asyncio.gather(*(self._poll_exchange(ex_id) for ex_id in self.exchange_ids))
+
+    async def stream_all_tickers(self, stream_urls=None):
+        """
+        Continuously ingests tickers from per-exchange websocket streams.
+        Exchanges without a stream url, and streams that are unhealthy, are
+        served by the polling path instead. This runs as a background task.
+        """
+        stream_urls = STREAM_URLS if stream_urls is None else stream_urls
+        tasks = []
+        for ex_id in self.exchange_ids:
+            url = stream_urls.get(ex_id)
+            if url:
+                tasks.append(self._stream_exchange(ex_id, url))
+            else:
+                tasks.append(self._poll_exchange(ex_id))
+        await asyncio.gather(*tasks)
+
+    async def _poll_exchange(self, ex_id):
+        """
+        Polls one exchange forever on its own cadence.
+
+        Requests are paced by the exchange's token bucket, which holds
+        RATE_LIMIT_HEADROOM of its rate limit and also pays for hedged requests.
+        A PollScheduler picks the symbols, favouring those whose spread is
+        close to MIN_PROFIT_PERCENT. Exchanges with batched
+        fetch_tickers get every symbol due soon in one request; others get one
+        request per symbol, earliest deadline first. Polling pauses while the
+        exchange's circuit is open.
+        """
+        bucket = self.exchange_manager.request_bucket(ex_id)
+        scheduler = self.pollers[ex_id] = PollScheduler(self.symbols_for(ex_id), self.spread_fn)
+        batched = self.exchange_manager.supports_batch(ex_id)
+        in_flight = asyncio.Semaphore(POLL_MAX_IN_FLIGHT)
+        tasks = set()
+        try:
+            while True:
+                # Poll ahead of the deadlines only while half the burst is left unspent
+                spare = bucket.available() >= bucket.capacity / 2
+                delay = scheduler.wait_time(spare)
+                if delay > 0:
+                    await asyncio.sleep(min(delay, scheduler.min_interval / 2))
+                    continue
+                if not self.exchange_manager.accepts_requests(ex_id):
+                    await asyncio.sleep(scheduler.min_interval / 2)
+                    continue
+                if batched:
+                    await bucket.acquire()
+                    # The request costs the same however many symbols it carries
+                    symbols = scheduler.due(spare=True)
+                    for symbol in symbols:
+                        scheduler.mark_polled(symbol)
+                    await self._fetch_and_update_exchange(ex_id, symbols)
+                else:
+                    await in_flight.acquire()
+                    symbols = scheduler.due(spare)
+                    if not symbols:
+                        in_flight.release()
+                        continue
+                    # Only a request that will be sent spends a token
+                    await bucket.acquire()
+                    scheduler.mark_polled(symbols[0])
+                    task = asyncio.create_task(self._poll_ticker(ex_id, symbols[0], in_flight))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _poll_ticker(self, ex_id, symbol, in_flight):
+        try:
+            await self._fetch_and_update_ticker(ex_id, symbol)
+        finally:
+            in_flight.release()
+
+    async def _stream_exchange(self, ex_id, url):
+        """
+        Runs one exchange's stream and supervises it, polling the exchange
+        whenever the stream is disconnected, stale or resyncing after a gap.
+        """
+        stream = TickerStream(ex_id, url, self.symbols, self._store_ticker)
+        self.streams[ex_id] = stream
+        stream_task = asyncio.create_task(stream.run())
+        was_healthy = True
+        try:
+            # Give the stream one interval to connect before judging it
+            await asyncio.sleep(CHECK_INTERVAL_SECONDS)
+            while True:
+                healthy = stream.is_healthy()
+                if healthy != was_healthy:
+                    if healthy:
+                        Logger.info("Stream for %s recovered. Stopping polling fallback.", ex_id)
+                    else:
+                        Logger.warning("Stream for %s unhealthy. Falling back to polling.", ex_id)
+                    was_healthy = healthy
+                if not healthy:
+                    await self._fetch_and_update_exchange(ex_id, self.symbols_for(ex_id))
+                await asyncio.sleep(CHECK_INTERVAL_SECONDS)
+        finally:
+            stream_task.cancel()
+
+    async def fetch_all_tickers_once(self):
+        """
+        Runs one fetch cycle: one batched request per exchange, in parallel.
+        """
+        await asyncio.gather(*(self._fetch_and_update_exchange(ex_id, self.symbols_for(ex_id))
+                               for ex_id in self.exchange_ids))
+
+    async def _fetch_and_update_exchange(self, ex_id, symbols):
+        """
+        Fetches all symbols from one exchange and updates the in-memory market_data.
+        """
+        if not self.exchange_manager.accepts_requests(ex_id):
+            return # Circuit open, its quotes are withdrawn by expire_quotes
+        tickers = await self.exchange_manager.fetch_tickers(ex_id, symbols)
+        for symbol in symbols:
+            ticker_data = tickers.get(symbol)
+            if ticker_data:
+                self._store_ticker(symbol, ex_id, ticker_data)
+            else:
+                Logger.warning("Failed to fetch ticker for %s on %s.", symbol, ex_id)
 
     async def _fetch_and_update_ticker(self, ex_id, symbol):
         """
         Fetches a single ticker and updates the in-memory market_data.
         """
+        if not self.exchange_manager.accepts_requests(ex_id):
+            return
         ticker_data = await self.exchange_manager.fetch_ticker(ex_id, symbol)
         if ticker_data:
-            key = (symbol, ex_id)
-            self.market_data[key] = ticker_data
-            self.last_fetch_time[key] = asyncio.get_event_loop().time() # Record fetch time
-            # logger.debug(f"Updated {symbol} on {ex_id}: Bid={ticker_data['bid']}, Ask={ticker_data['ask']}")
+            self._store_ticker(symbol, ex_id, ticker_data)
         else:
             Logger.warning("Failed to fetch ticker for %s on %s.", symbol, ex_id)
 
+    def _store_ticker(self, symbol, ex_id, ticker_data):
+        """
+        Writes a ticker into market_data and notifies ticker listeners.
+        """
+        # Receive time on the perf_counter clock, carried through to detection and execution
+        ticker_data['received_at'] = time.perf_counter()
+        if ticker_data.get('timestamp'):
+            Metrics.observe('exchange_to_receive', ex_id, time.time() - ticker_data['timestamp'] / 1000)
+        self.market_data.record(symbol, ex_id, ticker_data.get('bid'), ticker_data.get('ask'),
+                                ticker_data.get('timestamp'), ticker_data['received_at'],
+                                asyncio.get_event_loop().time()) # Record fetch time
+        for callback in self.ticker_listeners:
+            try:
+                callback(symbol, ex_id, ticker_data)
+            except Exception as e:
+                Logger.error("Ticker listener failed for %s on %s: %s", symbol, ex_id, e)
+        if not self.ready.is_set():
+            self.quoted_exchanges.add(ex_id)
+            if self.quoted_exchanges.issuperset(self.exchange_ids):
+                self.ready.set()
+        # logger.debug(f"Updated {symbol} on {ex_id}: Bid={ticker_data['bid']}, Ask={ticker_data['ask']}")
+
+    def spread_percent(self, symbol):
+        """
+        Estimates a symbol's best net spread in percent from the stored tickers,
+        using DEFAULT_TAKER_FEE_PERCENT on both legs and never pairing one exchange's
+        bid with its own ask. None until two exchanges quote it.
+        """
+        store = self.market_data
+        row = store.symbol_index.get(symbol)
+        if row is None:
+            return None
+        n_ex = len(store.exchange_ids)
+        return cross_spread_percent(store.bids[row, :n_ex], store.asks[row, :n_ex], DEFAULT_TAKER_FEE_PERCENT)
+
+    async def wait_until_ready(self, timeout):
+        """
+        Waits until every exchange has delivered at least one ticker.
+
+        Returns:
+            bool: False if timeout seconds passed first.
+        """
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
     def get_latest_market_data(self):
         """
-        Returns a copy of the current in-memory market data.
+        Returns the current in-memory market data. This is the live TickerStore,
+        not a copy: it is consistent until the caller next awaits.
         """
-        return self.market_data.copy()
+        return self.market_data
+
+    def _is_excluded(self, exchange_id):
+        return self.exchange_manager is not None and self.exchange_manager.is_excluded(exchange_id)
 
-    def is_data_stale(self, symbol, exchange_id, max_staleness_seconds=10):
+    def is_data_stale(self, symbol, exchange_id, max_staleness_seconds=QUOTE_MAX_AGE_SECONDS):
         """
-        Checks if the data for a specific symbol on an exchange is stale.
+        Checks if the data for a specific symbol on an exchange is stale, or
+        comes from an exchange whose circuit breaker is open.
         """
-        key = (symbol, exchange_id)
-        if key not in self.last_fetch_time:
+        last_update = self.market_data.last_update(symbol, exchange_id)
+        if last_update is None:
             return True # No data ever fetched
+        if self._is_excluded(exchange_id):
+            return True
         
         current_time = asyncio.get_event_loop().time()
-        if (current_time - self.last_fetch_time[key]) > max_staleness_seconds:
+        if (current_time - last_update) > max_staleness_seconds:
             Logger.warning(
                 "Data for %s on %s is stale (last updated %.2fs ago).",
-                symbol, exchange_id, current_time - self.last_fetch_time[key]
+                symbol, exchange_id, current_time - last_update
             )
             return True
         return False
+
+    def expire_quotes(self, max_staleness_seconds=QUOTE_MAX_AGE_SECONDS):
+        """
+        Withdraws every quote is_data_stale rejects: those not updated for
+        max_staleness_seconds and all quotes of exchanges whose circuit is open.
+        They are removed from market_data, so find_top_opportunities skips them,
+        and reported to the exclusion listeners, e.g. ArbitrageFinder.exclude_quote.
+        Candidates are picked from the update times in one vectorized pass.
+
+        Returns:
+            list: The (symbol, exchange_id) pairs withdrawn.
+        """
+        store = self.market_data
+        n_sym, n_ex = len(store.symbols), len(store.exchange_ids)
+        updated_at = store.updated_at[:n_sym, :n_ex]
+        written = ~np.isnan(updated_at)
+        candidates = written & (updated_at < asyncio.get_event_loop().time() - max_staleness_seconds)
+        for col, ex_id in enumerate(store.exchange_ids):
+            if self._is_excluded(ex_id):
+                candidates[:, col] = written[:, col]
+        expired = []
+        for row, col in zip(*np.nonzero(candidates)):
+            key = (store.symbols[row], store.exchange_ids[col])
+            if self.is_data_stale(*key, max_staleness_seconds):
+                del store[key]
+                expired.append(key)
+        for symbol, ex_id in expired:
+            for callback in self.exclusion_listeners:
+                try:
+                    callback(symbol, ex_id)
+                except Exception as e:
+                    Logger.error("Exclusion listener failed for %s on %s: %s", symbol, ex_id, e)
+        return expired
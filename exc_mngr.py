@@ -1,23 +1,130 @@
 "for exchange interactions"
 
+import importlib.metadata
 import os
-import ccxt
-from dotenv import load_dotenv
-from utils import Logger
+import sys
+import time
+import asyncio
+from collections import deque
+from utils import Logger, LazyModule
+from config import (ORDER_BOOK_DEPTH, DEFAULT_TAKER_FEE_PERCENT, PAPER_TRADING, CACHE_MAX_ENTRIES,
+                    BALANCE_CACHE_TTL, FEE_CACHE_TTL, MARKET_CACHE_TTL, RATE_LIMITS, DEFAULT_RATE_LIMIT,
+                    RATE_LIMIT_HEADROOM,
+                    MARKETS_CACHE_DIR, MARKETS_CACHE_VERSION, MARKETS_CACHE_MAX_AGE, FETCH_TIMEOUT_SECONDS,
+                    HEDGE_REQUESTS, HEDGE_QUANTILE, HEDGE_MIN_SAMPLES, HEDGE_WINDOW)
+from order_book import OrderBook
+from metrics import Metrics
+from sim_exc import SimulatedExchange, apply_fill
+from ttl_cache import TTLCache
+from mkts_cache import MarketsCache
+from circ_brkr import CircuitBreaker
+from poll_sched import TokenBucket
+
+# Importing ccxt costs about a second; ExchangeManager.connect does it off the event loop
+ccxt = LazyModule('ccxt.async_support')
+
+def _ccxt_version():
+    # Read from the installed package's metadata, so stamping the markets cache does not import ccxt
+    try:
+        return importlib.metadata.version('ccxt')
+    except importlib.metadata.PackageNotFoundError:
+        return 'unknown'
+
+def _is_outage(error):
+    """
+    Whether a failed request says the exchange is unreachable: a timeout or a
+    ccxt network error. A rate limit (HTTP 429) is a network error in ccxt but
+    an answer from a live exchange, which the token bucket backs off from.
+    Only looks ccxt up once it is imported, as it is whenever a ccxt error exists.
+    """
+    if isinstance(error, asyncio.TimeoutError):
+        return True
+    errors = sys.modules.get('ccxt.base.errors')
+    return (errors is not None and isinstance(error, errors.NetworkError)
+            and not isinstance(error, errors.RateLimitExceeded))
+
+def _is_rate_limited(error):
+    errors = sys.modules.get('ccxt.base.errors')
+    return errors is not None and isinstance(error, errors.RateLimitExceeded)
+
+def _error_kind(error):
+    """
+    'Network', 'Exchange' or 'Unexpected', after the ccxt class of error.
+    Like _is_outage, never imports ccxt: without it no ccxt error can exist.
+    """
+    errors = sys.modules.get('ccxt.base.errors')
+    if errors is not None:
+        if isinstance(error, errors.NetworkError):
+            return 'Network'
+        if isinstance(error, errors.ExchangeError):
+            return 'Exchange'
+    return 'Unexpected'
 
 class ExchangeManager:
     """
     Manages connections and interactions with multiple cryptocurrency exchanges.
+    Clients are async ccxt instances; each one owns a single pooled aiohttp
+    session that is reused for every request to that exchange.
+
+    Balances, fee tiers and market metadata are kept in a shared TTLCache,
+    so hot paths read them without a round-trip. Market metadata is also
+    kept on disk: the first load after a restart is served from there and
+    refreshed from the exchange in the background.
+
+    Ticker and order book requests have a deadline of fetch_timeout seconds.
+    With hedge_requests, a request still unanswered after HEDGE_QUANTILE of
+    the exchange's recent latencies gets a duplicate and the first answer
+    wins; the duplicate spends a token of the exchange's request bucket and
+    is skipped when none is left. Each exchange has a CircuitBreaker: after repeated timeouts or
+    network errors its requests are refused locally and its quotes excluded
+    until a probe succeeds.
     """
-    def __init__(self, exchange_ids):
+    def __init__(self, exchange_ids, clients=None, simulator=None, paper_trading=PAPER_TRADING,
+                 connect=True, markets_cache_dir=MARKETS_CACHE_DIR):
         """
         Initializes exchange instances for the given IDs.
         Loads API keys from environment variables.
+
+        Args:
+            exchange_ids (list): Exchange ids to initialize.
+            clients (dict, optional): Prebuilt {exchange_id: client} objects with the
+                                      ccxt async interface (e.g. fake_exc.FakeExchangeClient).
+                                      When given, no ccxt clients are created.
+            simulator (SimulatedExchange, optional): Executes the simulated orders.
+                                                     Defaults to one configured from config.
+            paper_trading (bool): Read balances from the simulator's paper accounts.
+            connect (bool): Create the ccxt clients now. When False, await connect() instead.
+            markets_cache_dir (str, optional): Directory of the on-disk markets cache. None disables it.
         """
+        self.exchange_ids = list(exchange_ids)
         self.exchanges = {}
+        self.simulator = simulator or SimulatedExchange()
+        self.paper_trading = paper_trading
+        self.cache = TTLCache(CACHE_MAX_ENTRIES)
+        self.order_books = {} # {(symbol, exchange_id): OrderBook}
+        self.markets_cache_dir = markets_cache_dir
+        self.markets_cache = None # Created on first use, its version includes ccxt's
+        self.markets_from_disk = set() # Exchanges whose markets were already served from disk
+        self.background_tasks = set()
+        self.fetch_timeout = FETCH_TIMEOUT_SECONDS
+        self.hedge_requests = HEDGE_REQUESTS
+        self.breakers = {ex_id: CircuitBreaker(ex_id) for ex_id in self.exchange_ids} # Empty disables them
+        self.latencies = {} # {(exchange_id, kind): deque of recent successful request durations}
+        self.buckets = {} # {exchange_id: TokenBucket} pacing the requests to each exchange
+        self.fetch_stats = dict.fromkeys(('hedged', 'hedge_wins', 'hedges_skipped', 'timeouts', 'refused'), 0)
+        if clients is not None:
+            self.exchanges = {ex_id: clients[ex_id] for ex_id in exchange_ids if ex_id in clients}
+            return
+        if connect:
+            self._create_clients()
+
+    def _create_clients(self):
+        from dotenv import load_dotenv
         load_dotenv() # Load .env file
 
-        for ex_id in exchange_ids:
+        for ex_id in self.exchange_ids:
+            if ex_id in self.exchanges:
+                continue
             try:
                 # Get API key and secret from environment variables
                 api_key = os.getenv(f"{ex_id.upper()}_API_KEY")
@@ -38,6 +145,58 @@ class ExchangeManager:
             except (AttributeError, TypeError, ccxt.BaseError) as e:
                 Logger.error("Error initializing %s exchange: %s", ex_id, e)
 
+    async def connect(self):
+        """
+        Creates the ccxt clients and loads every exchange's markets concurrently.
+        ccxt is imported in a worker thread, so the event loop keeps running
+        meanwhile, and markets come from the on-disk cache when it has them.
+        """
+        start = time.perf_counter()
+        await asyncio.to_thread(ccxt.load)
+        self._create_clients()
+        await asyncio.gather(*(self.fetch_markets(ex_id) for ex_id in self.exchanges))
+        Logger.info("Connected to %s in %.3fs (markets from disk: %s).", list(self.exchanges),
+                    time.perf_counter() - start, sorted(self.markets_from_disk) or 'none')
+        return self
+
+    def rate_limit(self, exchange_id):
+        """
+        Sustained requests per second an exchange allows: the RATE_LIMITS override,
+        else the client's ccxt rateLimit (milliseconds between requests),
+        else DEFAULT_RATE_LIMIT.
+        """
+        if exchange_id in RATE_LIMITS:
+            return RATE_LIMITS[exchange_id]
+        interval_ms = getattr(self.exchanges.get(exchange_id), 'rateLimit', None)
+        return 1000 / interval_ms if interval_ms else DEFAULT_RATE_LIMIT
+
+    def request_bucket(self, exchange_id):
+        """
+        The token bucket of an exchange, holding RATE_LIMIT_HEADROOM of its rate
+        limit. Pollers and hedged duplicates spend from the same one.
+        """
+        bucket = self.buckets.get(exchange_id)
+        if bucket is None:
+            bucket = self.buckets[exchange_id] = TokenBucket(self.rate_limit(exchange_id) * RATE_LIMIT_HEADROOM)
+        return bucket
+
+    def supports_batch(self, exchange_id):
+        """
+        Whether fetch_tickers can fetch several symbols in one request.
+        """
+        exchange = self.exchanges.get(exchange_id)
+        return bool(exchange and exchange.has.get('fetchTickers'))
+
+    def listed_symbols(self, exchange_id, symbols):
+        """
+        The symbols an exchange lists, according to its loaded markets.
+        All of them while its markets are not loaded.
+        """
+        markets = getattr(self.exchanges.get(exchange_id), 'markets', None)
+        if not markets:
+            return list(symbols)
+        return [symbol for symbol in symbols if symbol in markets]
+
     async def fetch_ticker(self, exchange_id, symbol):
         """
         Fetches the ticker for a given symbol from a specific exchange.
@@ -49,73 +208,438 @@ class ExchangeManager:
             return None
         
         try:
-            ticker = await exchange.fetch_ticker(symbol)
-            return {
-                'bid': ticker['bid'],
-                'ask': ticker['ask'],
-                'timestamp': ticker['timestamp'],
-                'exchange_id': exchange_id,
-                'symbol': symbol
-            }
-        except ccxt.NetworkError as e:
-            Logger.error("Network error fetching %s from %s: %s", symbol, exchange_id, e)
+            start = time.perf_counter()
+            ticker = await self._request(exchange_id, 'ticker', lambda: exchange.fetch_ticker(symbol))
+            if ticker is None:
+                return None
+            Metrics.observe('fetch', exchange_id, time.perf_counter() - start)
+            return self._normalize_ticker(exchange_id, symbol, ticker)
+        except asyncio.TimeoutError:
+            Logger.error("Timed out fetching %s from %s after %.1fs", symbol, exchange_id, self.fetch_timeout)
             return None
-        except ccxt.ExchangeError as e:
-            Logger.error("Exchange error fetching %s from %s: %s", symbol, exchange_id, e)
+        except Exception as e:
+            Logger.error("%s error fetching %s from %s: %s", _error_kind(e), symbol, exchange_id, e)
             return None
+
+    def is_excluded(self, exchange_id):
+        """
+        Whether the exchange's circuit is open or probing, so its quotes must not be traded on.
+        """
+        breaker = self.breakers.get(exchange_id)
+        return breaker is not None and breaker.excluded
+
+    def accepts_requests(self, exchange_id):
+        """
+        Whether a request to the exchange would be sent now rather than refused by its circuit.
+        """
+        breaker = self.breakers.get(exchange_id)
+        return breaker is None or breaker.available()
+
+    def hedge_delay(self, exchange_id, kind):
+        """
+        Seconds after which a request of this kind gets a duplicate: the
+        HEDGE_QUANTILE of its recent latencies, or None until HEDGE_MIN_SAMPLES
+        have been seen.
+        """
+        latencies = self.latencies.get((exchange_id, kind))
+        if latencies is None or len(latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(latencies)
+        return ordered[min(len(ordered) - 1, int(HEDGE_QUANTILE * len(ordered)))]
+
+    async def _request(self, exchange_id, kind, call):
+        """
+        Runs call() under the exchange's circuit breaker, with a deadline of
+        self.fetch_timeout seconds and, when enabled, one hedged duplicate.
+        Only timeouts and network errors count as failures: an exchange error
+        or a rate limit is an answer, so the exchange is up. A rate limit
+        empties the exchange's token bucket instead.
+
+        Args:
+            kind (str): Request kind; latencies are tracked per (exchange_id, kind).
+            call (callable): Returns a new awaitable of the request each time.
+
+        Returns:
+            The first successful result, or None if the circuit refused the request.
+
+        Raises:
+            asyncio.TimeoutError: Nothing succeeded before the deadline.
+            Exception: What the request raised, when every attempt failed.
+        """
+        breaker = self.breakers.get(exchange_id)
+        if breaker is not None and not breaker.allow():
+            self.fetch_stats['refused'] += 1
+            return None
+        start = time.perf_counter()
+        deadline = start + self.fetch_timeout if self.fetch_timeout is not None else None
+        hedge_delay = self.hedge_delay(exchange_id, kind) if self.hedge_requests else None
+        hedge_at = start + hedge_delay if hedge_delay is not None else None
+        attempts = {asyncio.ensure_future(call()): start} # {task: perf_counter start}
+        pending = set(attempts)
+        error = None
+        try:
+            while pending:
+                wake_ats = [t for t in (deadline, hedge_at) if t is not None]
+                timeout = max(0.0, min(wake_ats) - time.perf_counter()) if wake_ats else None
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        now = time.perf_counter()
+                        self.latencies.setdefault((exchange_id, kind), deque(maxlen=HEDGE_WINDOW)).append(
+                            now - attempts[task])
+                        if attempts[task] != start:
+                            self.fetch_stats['hedge_wins'] += 1
+                        if breaker is not None:
+                            breaker.record_success()
+                        return task.result()
+                    error = error or task.exception()
+                now = time.perf_counter()
+                if deadline is not None and now >= deadline:
+                    self.fetch_stats['timeouts'] += 1
+                    error = asyncio.TimeoutError()
+                    break
+                if pending and hedge_at is not None and now >= hedge_at:
+                    hedge_at = None
+                    if not self.request_bucket(exchange_id).try_acquire():
+                        self.fetch_stats['hedges_skipped'] += 1
+                        continue
+                    hedge = asyncio.ensure_future(call())
+                    attempts[hedge] = now
+                    pending.add(hedge)
+                    self.fetch_stats['hedged'] += 1
+            if _is_rate_limited(error):
+                self.request_bucket(exchange_id).drain()
+            if breaker is not None:
+                if _is_outage(error):
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+            raise error
+        except asyncio.CancelledError:
+            if breaker is not None:
+                breaker.abandon()
+            raise
+        finally:
+            for task in pending:
+                task.cancel()
+
+    @staticmethod
+    def _normalize_ticker(exchange_id, symbol, ticker):
+        """
+        Reduces a ccxt ticker to the fields the bot uses.
+        """
+        return {
+            'bid': ticker['bid'],
+            'ask': ticker['ask'],
+            'timestamp': ticker['timestamp'],
+            'exchange_id': exchange_id,
+            'symbol': symbol
+        }
+
+    async def fetch_tickers(self, exchange_id, symbols):
+        """
+        Fetches tickers for several symbols from one exchange.
+        Uses a single batched fetch_tickers request when the exchange supports it,
+        otherwise falls back to concurrent per-symbol fetch_ticker calls.
+        Returns a dictionary {symbol: ticker_data}; symbols that failed are omitted.
+        """
+        exchange = self.exchanges.get(exchange_id)
+        if not exchange:
+            Logger.warning("Exchange %s not initialized.", exchange_id)
+            return {}
+
+        if not self.supports_batch(exchange_id):
+            results = await asyncio.gather(*(self.fetch_ticker(exchange_id, symbol) for symbol in symbols))
+            return {symbol: ticker for symbol, ticker in zip(symbols, results) if ticker}
+
+        try:
+            start = time.perf_counter()
+            tickers = await self._request(exchange_id, 'tickers', lambda: exchange.fetch_tickers(symbols))
+            if tickers is None:
+                return {}
+            Metrics.observe('fetch', exchange_id, time.perf_counter() - start)
+        except asyncio.TimeoutError:
+            Logger.error("Timed out fetching tickers from %s after %.1fs", exchange_id, self.fetch_timeout)
+            return {}
         except Exception as e:
-            Logger.error("Unexpected error fetching %s from %s: %s", symbol, exchange_id, e)
+            Logger.error("%s error fetching tickers from %s: %s", _error_kind(e), exchange_id, e)
+            return {}
+        return {
+            symbol: self._normalize_ticker(exchange_id, symbol, tickers[symbol])
+            for symbol in symbols if symbol in tickers
+        }
+
+    def get_order_book(self, exchange_id, symbol):
+        """
+        Returns the stored OrderBook for (symbol, exchange), creating an empty one if needed.
+        """
+        key = (symbol, exchange_id)
+        book = self.order_books.get(key)
+        if book is None:
+            book = self.order_books[key] = OrderBook()
+        return book
+
+    async def fetch_order_book(self, exchange_id, symbol, limit=ORDER_BOOK_DEPTH):
+        """
+        Fetches an order book snapshot and stores it in the preallocated book
+        for (symbol, exchange). Returns the OrderBook, or None on failure.
+        """
+        exchange = self.exchanges.get(exchange_id)
+        if not exchange:
+            Logger.warning("Exchange %s not initialized.", exchange_id)
             return None
+        try:
+            snapshot = await self._request(exchange_id, 'order_book', lambda: exchange.fetch_order_book(symbol, limit))
+            if snapshot is None:
+                return None
+        except asyncio.TimeoutError:
+            Logger.error("Timed out fetching order book for %s from %s after %.1fs", symbol, exchange_id,
+                         self.fetch_timeout)
+            return None
+        except Exception as e:
+            Logger.error("Error fetching order book for %s from %s: %s", symbol, exchange_id, e)
+            return None
+        book = self.get_order_book(exchange_id, symbol)
+        book.apply_snapshot(snapshot['bids'], snapshot['asks'], snapshot.get('timestamp'))
+        return book
+
+    def apply_order_book_delta(self, exchange_id, symbol, side, price, size, timestamp=None):
+        """
+        Applies an incremental level update ('bids' or 'asks') to a stored book.
+        A size of 0 removes the level.
+        """
+        self.get_order_book(exchange_id, symbol).apply_delta(side, price, size, timestamp)
+
+    async def close(self):
+        """
+        Closes the pooled connection session of every exchange client.
+        """
+        for task in self.background_tasks:
+            task.cancel()
+        await asyncio.gather(*self.background_tasks, return_exceptions=True)
+        for ex_id, exchange in self.exchanges.items():
+            try:
+                await exchange.close()
+            except Exception as e:
+                Logger.error("Error closing %s exchange: %s", ex_id, e)
 
     async def fetch_balance(self, exchange_id, currency):
         """
         Fetches the available balance for a specific currency on an exchange.
+        The whole account is fetched once and cached for BALANCE_CACHE_TTL
+        seconds; concurrent callers share one request and fills update it.
         """
         exchange = self.exchanges.get(exchange_id)
         if not exchange:
             Logger.warning("Exchange %s not initialized.", exchange_id)
             return 0.0
         try:
-            balance = await exchange.fetch_balance()
-            return balance['free'].get(currency, 0.0)
+            balances = await self.cache.get_or_fetch(
+                ('balance', exchange_id), lambda: self._fetch_free_balances(exchange_id), BALANCE_CACHE_TTL)
+            return balances.get(currency, 0.0)
         except Exception as e:
             Logger.error("Error fetching balance for %s on %s: %s", currency, exchange_id, e)
             return 0.0
 
-    async def create_market_buy_order(self, exchange_id, symbol, amount):
+    async def fetch_balances(self, keys):
         """
-        Simulates placing a market buy order.
-        In a real bot, this would interact with the exchange API.
+        Fetches several balances concurrently.
+
+        Args:
+            keys (iterable): (exchange_id, currency) pairs.
+
+        Returns:
+            dict: {(exchange_id, currency): free amount}.
+        """
+        keys = list(keys)
+        amounts = await asyncio.gather(*(self.fetch_balance(ex_id, currency) for ex_id, currency in keys))
+        return dict(zip(keys, amounts))
+
+    async def _fetch_free_balances(self, exchange_id):
+        if self.paper_trading:
+            balance = await self.simulator.fetch_balance(exchange_id)
+        else:
+            balance = await self.exchanges[exchange_id].fetch_balance()
+        return dict(balance['free'])
+
+    def apply_fill(self, exchange_id, order):
+        """
+        Moves a reported fill into the cached balances of an exchange, so the
+        cache stays accurate until its next refresh.
+        """
+        balances = self.cache.get(('balance', exchange_id))
+        if balances is not None and order:
+            apply_fill(balances, order)
+
+    async def fetch_markets(self, exchange_id):
+        """
+        Returns the ccxt market metadata (precision, limits, fees) of an exchange,
+        cached for MARKET_CACHE_TTL seconds. Empty if the client cannot load markets.
         """
         exchange = self.exchanges.get(exchange_id)
         if not exchange:
             Logger.warning("Exchange %s not initialized.", exchange_id)
-            return None
+            return {}
+        return await self.cache.get_or_fetch(
+            ('markets', exchange_id), lambda: self._load_markets(exchange_id), MARKET_CACHE_TTL)
+
+    def _get_markets_cache(self):
+        if self.markets_cache is None and self.markets_cache_dir:
+            self.markets_cache = MarketsCache(self.markets_cache_dir, f'{MARKETS_CACHE_VERSION}-ccxt{_ccxt_version()}',
+                                              MARKETS_CACHE_MAX_AGE)
+        return self.markets_cache
+
+    async def _load_markets(self, exchange_id):
+        exchange = self.exchanges[exchange_id]
+        markets_cache = self._get_markets_cache()
+        # Only the first load of a run may come from disk; later ones are TTL refreshes
+        if markets_cache and exchange_id not in self.markets_from_disk and hasattr(exchange, 'set_markets'):
+            markets = markets_cache.load(exchange_id)
+            if markets:
+                self.markets_from_disk.add(exchange_id)
+                exchange.set_markets(markets)
+                task = asyncio.create_task(self._refresh_markets(exchange_id))
+                self.background_tasks.add(task)
+                task.add_done_callback(self.background_tasks.discard)
+                return exchange.markets
         try:
-            # THIS IS A SIMULATED ORDER. Replace with actual API call for live trading.
-            # order = await exchange.create_market_buy_order(symbol, amount)
-            Logger.info("SIMULATED BUY ORDER: %s - %s - Amount: %s", exchange_id, symbol, amount)
-            # Simulate a successful order response
-            return {'id': f'sim_buy_order_{exchange_id}_{symbol}_{amount}', 'status': 'closed', 'amount': amount}
+            markets = await exchange.load_markets(True)
         except Exception as e:
-            Logger.error("Error simulating buy order on %s for %s amount %s: %s", exchange_id, symbol, amount, e)
-            return None
+            Logger.warning("Could not load markets for %s: %s", exchange_id, e)
+            return {}
+        if markets_cache:
+            await asyncio.to_thread(markets_cache.save, exchange_id, markets)
+        return markets
+
+    async def _refresh_markets(self, exchange_id):
+        """
+        Replaces markets served from disk with the exchange's current ones.
+        """
+        markets = await self._load_markets(exchange_id)
+        if markets:
+            self.cache.set(('markets', exchange_id), markets, MARKET_CACHE_TTL)
+
+    async def fetch_fee_table(self, exchange_id):
+        """
+        Returns {symbol: taker fee percent} for an exchange, cached for FEE_CACHE_TTL
+        seconds. Uses the account's fee tier where the exchange reports it and the
+        market metadata otherwise.
+        """
+        exchange = self.exchanges.get(exchange_id)
+        if not exchange:
+            Logger.warning("Exchange %s not initialized.", exchange_id)
+            return {}
+        return await self.cache.get_or_fetch(
+            ('fees', exchange_id), lambda: self._load_fee_table(exchange_id), FEE_CACHE_TTL)
+
+    async def _load_fee_table(self, exchange_id):
+        exchange = self.exchanges[exchange_id]
+        if exchange.has.get('fetchTradingFees'):
+            try:
+                fees = await exchange.fetch_trading_fees()
+                return {symbol: fee['taker'] * 100 for symbol, fee in fees.items() if fee.get('taker') is not None}
+            except Exception as e:
+                Logger.warning("Could not fetch trading fees from %s, using market fees: %s", exchange_id, e)
+        markets = await self.fetch_markets(exchange_id)
+        return {symbol: market['taker'] * 100 for symbol, market in markets.items() if market.get('taker') is not None}
+
+    async def fetch_fee_percent(self, exchange_id, symbol):
+        """
+        Returns the taker fee percent for a symbol, or DEFAULT_TAKER_FEE_PERCENT if unknown.
+        """
+        fees = await self.fetch_fee_table(exchange_id)
+        return fees.get(symbol, DEFAULT_TAKER_FEE_PERCENT)
 
-    async def create_market_sell_order(self, exchange_id, symbol, amount):
+    async def load_fee_table(self, symbols):
         """
-        Simulates placing a market sell order.
+        Fetches the fees of every initialized exchange concurrently.
+
+        Returns:
+            dict: {(symbol, exchange_id): taker fee percent}.
+        """
+        exchange_ids = list(self.exchanges)
+        tables = await asyncio.gather(*(self.fetch_fee_table(ex_id) for ex_id in exchange_ids))
+        return {(symbol, ex_id): table.get(symbol, DEFAULT_TAKER_FEE_PERCENT)
+                for ex_id, table in zip(exchange_ids, tables) for symbol in symbols}
+
+    async def normalize_amount(self, exchange_id, symbol, amount, price):
+        """
+        Rounds an order amount down to the market's precision.
+
+        Returns:
+            float: The rounded amount, or 0.0 if it falls below the market's
+                   minimum order amount or cost.
+        """
+        market = (await self.fetch_markets(exchange_id)).get(symbol)
+        if not market:
+            return amount
+        try:
+            amount = float(self.exchanges[exchange_id].amount_to_precision(symbol, amount))
+        except Exception as e: # ccxt raises InvalidOrder when the amount rounds to zero
+            Logger.debug("Cannot round %s amount %s on %s: %s", symbol, amount, exchange_id, e)
+            return 0.0
+        limits = market.get('limits') or {}
+        min_amount = (limits.get('amount') or {}).get('min')
+        min_cost = (limits.get('cost') or {}).get('min')
+        if (min_amount and amount < min_amount) or (min_cost and amount * price < min_cost):
+            return 0.0
+        return amount
+
+    async def create_market_buy_order(self, exchange_id, symbol, amount, price=None, reference_time=None,
+                                      client_order_id=None):
+        """
+        Simulates placing a market buy order through self.simulator.
+        In a real bot, this would interact with the exchange API.
+
+        Args:
+            price (float, optional): Expected price, used to model slippage.
+            reference_time (float, optional): perf_counter time the trade started.
+            client_order_id (str, optional): Our id of the order, for cancel_order.
+        """
+        return await self._create_market_order(exchange_id, symbol, 'buy', amount, price, reference_time,
+                                               client_order_id)
+
+    async def create_market_sell_order(self, exchange_id, symbol, amount, price=None, reference_time=None,
+                                       client_order_id=None):
+        """
+        Simulates placing a market sell order through self.simulator.
         In a real bot, this would interact with the exchange API.
         """
+        return await self._create_market_order(exchange_id, symbol, 'sell', amount, price, reference_time,
+                                               client_order_id)
+
+    async def cancel_order(self, exchange_id, symbol, client_order_id):
+        """
+        Simulates cancelling an order placed with client_order_id whose response
+        never came, and returns how it ended: canceled, or filled before the
+        cancel landed. Fills it reports are applied to the cached balances.
+        """
+        try:
+            # THIS IS A SIMULATED CANCEL. For live trading, cancel by client order id,
+            # then fetch the order to read what filled before the cancel.
+            order = await self.simulator.cancel_order(exchange_id, symbol, client_order_id)
+        except Exception as e:
+            Logger.error("Error simulating cancel of %s on %s for %s: %s", client_order_id, exchange_id, symbol, e)
+            return None
+        if order:
+            self.apply_fill(exchange_id, order)
+        return order
+
+    async def _create_market_order(self, exchange_id, symbol, side, amount, price, reference_time,
+                                   client_order_id=None):
         exchange = self.exchanges.get(exchange_id)
         if not exchange:
             Logger.warning("Exchange %s not initialized.", exchange_id)
             return None
         try:
             # THIS IS A SIMULATED ORDER. Replace with actual API call for live trading.
-            # order = await exchange.create_market_sell_order(symbol, amount)
-            Logger.info("SIMULATED SELL ORDER: %s - %s - Amount: %s", exchange_id, symbol, amount)
-            # Simulate a successful order response
-            return {'id': f'sim_sell_order_{exchange_id}_{symbol}_{amount}', 'status': 'closed', 'amount': amount}
-        except ccxt.BaseError as e:
-            Logger.error("Error simulating sell order on %s for %s amount %s: %s", exchange_id, symbol, amount, e)
+            # order = await exchange.create_order(symbol, 'market', side, amount)
+            Logger.info("SIMULATED %s ORDER: %s - %s - Amount: %s", side.upper(), exchange_id, symbol, amount)
+            fee_percent = await self.fetch_fee_percent(exchange_id, symbol)
+            order = await self.simulator.create_market_order(exchange_id, symbol, side, amount, price, reference_time,
+                                                             fee_percent, client_order_id)
+            self.apply_fill(exchange_id, order)
+            return order
+        except Exception as e:
+            Logger.error("Error simulating %s order on %s for %s amount %s: %s", side, exchange_id, symbol, amount, e)
             return None
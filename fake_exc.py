@@ -0,0 +1,269 @@
+"local fake exchange server and client for offline testing"
+
+import asyncio
+import math
+import random
+import time
+import aiohttp
+from aiohttp import web
+import ccxt.async_support as ccxt
+from poll_sched import TokenBucket
+
+class FakeExchangeServer:
+    """
+    Serves ticker and order book endpoints for several fake exchanges from one local HTTP server.
+    Prices follow a seeded random walk, and request/connection counters let
+    benchmarks measure how many requests and sockets a fetch cycle costs.
+    With rate_limit set, each exchange answers requests beyond its limit with
+    HTTP 429, like a real exchange. Faults can be injected: random HTTP 503
+    errors, stragglers delayed by tail_latency, and exchanges in self.down,
+    which hang for hang_seconds before failing.
+    """
+    def __init__(self, exchange_ids, symbols, host='127.0.0.1', port=0, latency=0.0, seed=0,
+                 rate_limit=None, exchange_latency=None, dispersion=0.005, markets_latency=None,
+                 market_info_size=0, error_rate=0.0, tail_probability=0.0, tail_latency=0.0, hang_seconds=30.0):
+        """
+        Args:
+            latency (float): Seconds added to every response.
+            rate_limit (float, optional): Requests per second allowed per exchange, with a
+                                          one-second burst. None disables enforcement.
+            exchange_latency (dict, optional): Per-exchange latency overrides.
+            dispersion (float): Maximum relative offset of each exchange's starting price.
+            markets_latency (float, optional): Latency of the markets endpoint, which is
+                                               slow on real exchanges. Defaults to latency.
+            market_info_size (int): Bytes of raw 'info' payload per market, to model the
+                                    size of real market downloads.
+            error_rate (float): Probability of answering a request with HTTP 503.
+            tail_probability (float): Probability of delaying a request by tail_latency more.
+            tail_latency (float): Extra seconds of a straggler.
+            hang_seconds (float): How long requests to an exchange in self.down hang.
+        """
+        self.exchange_ids = list(exchange_ids)
+        self.symbols = list(symbols)
+        self.host = host
+        self.port = port
+        self.latency = latency # Seconds added to every response
+        self.exchange_latency = exchange_latency or {}
+        self.rate_limit = rate_limit
+        self.buckets = {ex_id: TokenBucket(rate_limit) for ex_id in self.exchange_ids} if rate_limit else {}
+        self.rng = random.Random(seed)
+        self.mids = {
+            (symbol, ex_id): 100 * (1 + self.rng.uniform(-dispersion, dispersion))
+            for symbol in self.symbols for ex_id in self.exchange_ids
+        }
+        self.request_count = 0
+        self.rejected_count = 0 # Requests refused with 429
+        self.exchange_requests = dict.fromkeys(self.exchange_ids, 0)
+        self.peers = set() # Distinct client sockets seen since the last reset
+        self.markets_latency = markets_latency
+        self.market_info_size = market_info_size
+        self.markets_requests = 0
+        self.error_rate = error_rate
+        self.tail_probability = tail_probability
+        self.tail_latency = tail_latency
+        self.hang_seconds = hang_seconds
+        self.down = set() # Exchanges whose requests hang, to simulate an outage
+        self.fault_rng = random.Random(seed + 1) # Separate stream, so faults do not change prices
+        self.fault_count = 0 # Errors and stragglers injected
+        self._runner = None
+
+        self.app = web.Application()
+        self.app.router.add_get('/{exchange_id}/ticker', self._handle_ticker)
+        self.app.router.add_get('/{exchange_id}/tickers', self._handle_tickers)
+        self.app.router.add_get('/{exchange_id}/order_book', self._handle_order_book)
+        self.app.router.add_get('/{exchange_id}/markets', self._handle_markets)
+
+    @property
+    def url(self):
+        return f'http://{self.host}:{self.port}'
+
+    async def start(self):
+        """
+        Starts listening. When port is 0 a free port is picked and stored in self.port.
+        """
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        # Hung handlers are cancelled on stop instead of being waited for
+        site = web.TCPSite(self._runner, self.host, self.port, shutdown_timeout=0.1)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def reset_stats(self):
+        self.request_count = 0
+        self.rejected_count = 0
+        self.exchange_requests = dict.fromkeys(self.exchange_ids, 0)
+        self.peers.clear()
+
+    def _ticker(self, exchange_id, symbol):
+        """
+        Advances the random walk for (symbol, exchange) and returns a ccxt-shaped ticker.
+        """
+        key = (symbol, exchange_id)
+        mid = self.mids[key] * (1 + self.rng.gauss(0, 0.0005))
+        self.mids[key] = mid
+        return {
+            'symbol': symbol,
+            'bid': mid * 0.9998,
+            'ask': mid * 1.0002,
+            'timestamp': int(time.time() * 1000)
+        }
+
+    async def _begin_request(self, request):
+        exchange_id = request.match_info['exchange_id']
+        if exchange_id not in self.exchange_ids:
+            raise web.HTTPNotFound(text=f'unknown exchange {exchange_id}')
+        self.request_count += 1
+        self.exchange_requests[exchange_id] += 1
+        self.peers.add(request.transport.get_extra_info('peername'))
+        if self.buckets and not self.buckets[exchange_id].try_acquire():
+            self.rejected_count += 1
+            raise web.HTTPTooManyRequests(text=f'{exchange_id} rate limit exceeded')
+        latency = self.exchange_latency.get(exchange_id, self.latency)
+        if exchange_id in self.down:
+            await asyncio.sleep(self.hang_seconds)
+            raise web.HTTPServiceUnavailable(text=f'{exchange_id} is down')
+        if self.tail_probability and self.fault_rng.random() < self.tail_probability:
+            self.fault_count += 1
+            latency += self.tail_latency
+        if latency:
+            await asyncio.sleep(latency)
+        if self.error_rate and self.fault_rng.random() < self.error_rate:
+            self.fault_count += 1
+            raise web.HTTPServiceUnavailable(text=f'{exchange_id} injected error')
+        return exchange_id
+
+    async def _handle_ticker(self, request):
+        exchange_id = await self._begin_request(request)
+        symbol = request.query.get('symbol')
+        if symbol not in self.symbols:
+            raise web.HTTPBadRequest(text=f'unknown symbol {symbol}')
+        return web.json_response(self._ticker(exchange_id, symbol))
+
+    async def _handle_tickers(self, request):
+        exchange_id = await self._begin_request(request)
+        requested = request.query.get('symbols')
+        symbols = requested.split(',') if requested else self.symbols
+        return web.json_response({
+            symbol: self._ticker(exchange_id, symbol) for symbol in symbols if symbol in self.symbols
+        })
+
+    async def _handle_order_book(self, request):
+        exchange_id = await self._begin_request(request)
+        symbol = request.query.get('symbol')
+        if symbol not in self.symbols:
+            raise web.HTTPBadRequest(text=f'unknown symbol {symbol}')
+        limit = int(request.query.get('limit', 20))
+        ticker = self._ticker(exchange_id, symbol)
+        # Levels widen by 1 bp each, with sizes growing away from the top of book
+        bids = [[ticker['bid'] * (1 - i * 0.0001), 0.5 * (1 + i)] for i in range(limit)]
+        asks = [[ticker['ask'] * (1 + i * 0.0001), 0.5 * (1 + i)] for i in range(limit)]
+        return web.json_response({'symbol': symbol, 'bids': bids, 'asks': asks,
+                                  'timestamp': ticker['timestamp']})
+
+    async def _handle_markets(self, request):
+        exchange_id = await self._begin_request(request)
+        self.markets_requests += 1
+        if self.markets_latency is not None:
+            await asyncio.sleep(max(0.0, self.markets_latency - self.exchange_latency.get(exchange_id, self.latency)))
+        markets = {}
+        for symbol in self.symbols:
+            base, quote = symbol.split('/')
+            markets[symbol] = {
+                'id': base + quote, 'symbol': symbol, 'base': base, 'quote': quote, 'baseId': base, 'quoteId': quote,
+                'type': 'spot', 'spot': True, 'active': True, 'taker': 0.001, 'maker': 0.001,
+                'precision': {'amount': 1e-6, 'price': 1e-4},
+                'limits': {'amount': {'min': 1e-6, 'max': None}, 'cost': {'min': 1.0, 'max': None}},
+                'info': {'raw': 'x' * self.market_info_size},
+            }
+        return web.json_response(markets)
+
+class FakeExchangeClient:
+    """
+    Minimal client with the ccxt async interface used by ExchangeManager,
+    talking to a FakeExchangeServer.
+    """
+    def __init__(self, exchange_id, base_url, batch=True, pooled=True, rate_limit=None):
+        """
+        Args:
+            exchange_id (str): Exchange id served by the fake server.
+            base_url (str): FakeExchangeServer.url.
+            batch (bool): Whether to advertise fetchTickers support.
+            pooled (bool): Reuse keep-alive connections. When False every
+                           request opens a new socket.
+            rate_limit (float, optional): Requests per second to advertise through
+                                          ccxt's rateLimit attribute.
+        """
+        self.id = exchange_id
+        if rate_limit:
+            self.rateLimit = 1000 / rate_limit # ccxt convention: milliseconds between requests
+        self.base_url = f'{base_url}/{exchange_id}'
+        self.has = {'fetchTickers': batch}
+        self.pooled = pooled
+        self.session = None
+        self.markets = None
+
+    def _get_session(self):
+        # Created lazily so the session binds to the running event loop
+        if self.session is None:
+            connector = aiohttp.TCPConnector(force_close=not self.pooled)
+            self.session = aiohttp.ClientSession(connector=connector)
+        return self.session
+
+    async def _get(self, path, params):
+        try:
+            async with self._get_session().get(self.base_url + path, params=params) as response:
+                if response.status == 429:
+                    raise ccxt.RateLimitExceeded(f'{self.id} 429: {await response.text()}')
+                if response.status == 503:
+                    raise ccxt.ExchangeNotAvailable(f'{self.id} 503: {await response.text()}')
+                if response.status >= 400:
+                    raise ccxt.ExchangeError(f'{self.id} {response.status}: {await response.text()}')
+                return await response.json()
+        except aiohttp.ClientError as e:
+            raise ccxt.NetworkError(f'{self.id} {e}') from e
+
+    async def fetch_ticker(self, symbol):
+        return await self._get('/ticker', {'symbol': symbol})
+
+    async def fetch_tickers(self, symbols=None):
+        params = {'symbols': ','.join(symbols)} if symbols else {}
+        return await self._get('/tickers', params)
+
+    async def fetch_order_book(self, symbol, limit=None):
+        params = {'symbol': symbol}
+        if limit:
+            params['limit'] = limit
+        return await self._get('/order_book', params)
+
+    async def load_markets(self, reload=False):
+        if self.markets is None or reload:
+            self.set_markets(await self._get('/markets', {}))
+        return self.markets
+
+    def set_markets(self, markets, currencies=None):
+        self.markets = markets
+
+    def amount_to_precision(self, symbol, amount):
+        # Truncates to the market's amount step, like ccxt's TICK_SIZE mode
+        step = self.markets[symbol]['precision']['amount']
+        return str(math.floor(amount / step + 1e-9) * step)
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+def make_clients(server, batch=True, pooled=True):
+    """
+    Returns {exchange_id: FakeExchangeClient} for every exchange on the server,
+    suitable for ExchangeManager(exchange_ids, clients=...).
+    """
+    return {
+        ex_id: FakeExchangeClient(ex_id, server.url, batch=batch, pooled=pooled, rate_limit=server.rate_limit)
+        for ex_id in server.exchange_ids
+    }
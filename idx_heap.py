@@ -0,0 +1,112 @@
+"indexed binary heap with in-place priority updates"
+
+class IndexedHeap:
+    """
+    Min-heap of (priority, key) entries where each key appears at most once.
+    A key -> position index lets push/update/remove run in O(log n) instead
+    of rebuilding the heap when one key's priority changes.
+    """
+    def __init__(self):
+        self._keys = []
+        self._priorities = []
+        self._positions = {}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._positions
+
+    def push(self, key, priority):
+        """
+        Inserts key with the given priority, or updates it if already present.
+        """
+        pos = self._positions.get(key)
+        if pos is None:
+            pos = len(self._keys)
+            self._keys.append(key)
+            self._priorities.append(priority)
+            self._positions[key] = pos
+            self._sift_up(pos)
+            return
+
+        old_priority = self._priorities[pos]
+        self._priorities[pos] = priority
+        if priority < old_priority:
+            self._sift_up(pos)
+        elif priority > old_priority:
+            self._sift_down(pos)
+
+    def remove(self, key):
+        """
+        Removes key from the heap. Does nothing if the key is not present.
+        """
+        pos = self._positions.pop(key, None)
+        if pos is None:
+            return
+        last = len(self._keys) - 1
+        if pos != last:
+            self._keys[pos] = self._keys[last]
+            self._priorities[pos] = self._priorities[last]
+            self._positions[self._keys[pos]] = pos
+        self._keys.pop()
+        self._priorities.pop()
+        if pos < len(self._keys):
+            self._sift_up(pos)
+            self._sift_down(pos)
+
+    def peek(self):
+        """
+        Returns (key, priority) of the smallest entry, or None if empty.
+        """
+        if not self._keys:
+            return None
+        return self._keys[0], self._priorities[0]
+
+    def smallest_two(self):
+        """
+        Returns up to two (key, priority) entries in ascending priority order.
+        The second smallest is always one of the root's children.
+        """
+        n = len(self._keys)
+        if n == 0:
+            return []
+        result = [(self._keys[0], self._priorities[0])]
+        if n > 1:
+            child = 1
+            if n > 2 and self._priorities[2] < self._priorities[1]:
+                child = 2
+            result.append((self._keys[child], self._priorities[child]))
+        return result
+
+    def _swap(self, i, j):
+        keys, priorities = self._keys, self._priorities
+        keys[i], keys[j] = keys[j], keys[i]
+        priorities[i], priorities[j] = priorities[j], priorities[i]
+        self._positions[keys[i]] = i
+        self._positions[keys[j]] = j
+
+    def _sift_up(self, pos):
+        priorities = self._priorities
+        while pos > 0:
+            parent = (pos - 1) >> 1
+            if priorities[pos] >= priorities[parent]:
+                break
+            self._swap(pos, parent)
+            pos = parent
+
+    def _sift_down(self, pos):
+        priorities = self._priorities
+        n = len(priorities)
+        while True:
+            smallest = pos
+            left = 2 * pos + 1
+            right = left + 1
+            if left < n and priorities[left] < priorities[smallest]:
+                smallest = left
+            if right < n and priorities[right] < priorities[smallest]:
+                smallest = right
+            if smallest == pos:
+                return
+            self._swap(pos, smallest)
+            pos = smallest
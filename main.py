@@ -2,44 +2,185 @@
 
 import asyncio
 import time
-from config import EXCHANGE_IDS, CHECK_INTERVAL_SECONDS, TARGET_SYMBOLS
+# Deliberately taken before the imports below: loading them is part of the
+# cold start that time-to-ready and time-to-first-opportunity measure
+LAUNCHED_AT = time.perf_counter()
+from config import (EXCHANGE_IDS, CHECK_INTERVAL_SECONDS, TARGET_SYMBOLS, INCREMENTAL_EVALUATION,
+                    STREAMING_MODE, SLIPPAGE_AWARE_SIZING, CYCLE_DETECTION, CROSS_QUOTE_DETECTION, RECORD_TICKS_PATH,
+                    METRICS_HOST, METRICS_PORT, FEE_CACHE_TTL, SHARDED_INGESTION_WORKERS,
+                    SHARDED_SCAN_INTERVAL_SECONDS, TRADE_JOURNAL_PATH, BATCH_EXECUTION, BATCH_CANDIDATES,
+                    TOP_K_OPPORTUNITIES)
 from utils import Logger
 from exc_mngr import ExchangeManager
 from data_mngr import DataManager
 from arb_fndr import ArbitrageFinder
+from metrics import Metrics
 from trade_exec import TradeExecutor
+from cap_alloc import allocate_trades
+# Optional features import their modules only when enabled
 
 async def main():
     """
     Main function to run the crypto arbitrage bot.
     """
     Logger.info("Starting Crypto Arbitrage Bot...")
+    if SHARDED_INGESTION_WORKERS:
+        unsupported = sharding_conflicts()
+        if unsupported:
+            Logger.critical("SHARDED_INGESTION_WORKERS cannot be combined with %s: ingestion workers do not "
+                            "record ticks or feed the cycle and cross-quote finders. Exiting.", ', '.join(unsupported))
+            return
 
-    # 1. Initialize Exchange Manager
-    exchange_manager = ExchangeManager(EXCHANGE_IDS)
+    # 1. Initialize Exchange Manager: clients and markets of all exchanges concurrently
+    exchange_manager = ExchangeManager(EXCHANGE_IDS, connect=False)
+    await exchange_manager.connect()
     if not exchange_manager.exchanges:
         Logger.critical("No exchanges initialized. Exiting.")
         return
 
-    # 2. Initialize Data Manager and start fetching tickers in background
-    data_manager = DataManager(exchange_manager)
-    # Start the periodic ticker fetching as a background task
-    asyncio.create_task(data_manager.fetch_all_tickers_periodically())
-    Logger.info("Started background data fetching for %s on %s.", TARGET_SYMBOLS, EXCHANGE_IDS)
+    if METRICS_PORT:
+        asyncio.create_task(Metrics.serve(METRICS_HOST, METRICS_PORT))
+
+    # Written by a background thread, so journaling never waits on disk
+    journal = None
+    if TRADE_JOURNAL_PATH:
+        from trd_jrnl import TradeJournal
+        journal = TradeJournal(TRADE_JOURNAL_PATH)
 
-    # Give some time for initial data to be fetched
-    Logger.info("Waiting %d seconds for initial market data...", CHECK_INTERVAL_SECONDS * 2)
-    await asyncio.sleep(CHECK_INTERVAL_SECONDS * 2) 
+    if SHARDED_INGESTION_WORKERS:
+        try:
+            await run_sharded(exchange_manager, journal)
+        finally:
+            if journal:
+                journal.close()
+            await exchange_manager.close()
+        return
 
-    # 3. Initialize Arbitrage Finder and Trade Executor
+    # 2. Initialize Data Manager and start fetching tickers in background
     arbitrage_finder = ArbitrageFinder()
-    trade_executor = TradeExecutor(exchange_manager)
+    symbols = TARGET_SYMBOLS
+    if CROSS_QUOTE_DETECTION:
+        from xquote_fndr import cross_quote_symbols
+        # Every base in each quote currency, plus the stablecoin pairs the conversion rates come from
+        symbols = cross_quote_symbols(TARGET_SYMBOLS)
+    # Polling favours symbols whose spread is near the profit threshold
+    data_manager = DataManager(exchange_manager, symbols,
+                               spread_fn=arbitrage_finder.spread_percent if INCREMENTAL_EVALUATION else None)
+    fee_finders = [arbitrage_finder] # Finders given the exact fee tiers
+    recorder = None
+    if RECORD_TICKS_PATH:
+        from tick_rec import TickRecorder
+        # Registered first so ticks are recorded before any evaluation
+        recorder = TickRecorder(RECORD_TICKS_PATH)
+        data_manager.add_ticker_listener(recorder.on_ticker_update)
+        asyncio.create_task(recorder.flush_periodically())
+    if INCREMENTAL_EVALUATION:
+        # Each stored ticker re-evaluates its symbol and wakes the main loop
+        data_manager.add_ticker_listener(arbitrage_finder.on_ticker_update)
+        # Stale quotes and those of exchanges with an open circuit leave the finder
+        data_manager.add_exclusion_listener(arbitrage_finder.exclude_quote)
+    if CYCLE_DETECTION:
+        from cycle_fndr import CycleFinder
+        cycle_finder = CycleFinder()
+        data_manager.add_ticker_listener(cycle_finder.on_ticker_update)
+        data_manager.add_exclusion_listener(cycle_finder.exclude_quote)
+        fee_finders.append(cycle_finder)
+        asyncio.create_task(report_cycles(cycle_finder))
+    if CROSS_QUOTE_DETECTION:
+        from xquote_fndr import CrossQuoteFinder
+        cross_quote_finder = CrossQuoteFinder()
+        data_manager.add_ticker_listener(cross_quote_finder.on_ticker_update)
+        data_manager.add_exclusion_listener(cross_quote_finder.exclude_quote)
+        fee_finders.append(cross_quote_finder)
+        asyncio.create_task(report_cross_quote(cross_quote_finder))
+    # Start streaming or periodic ticker fetching as a background task
+    if STREAMING_MODE:
+        asyncio.create_task(data_manager.stream_all_tickers())
+    else:
+        asyncio.create_task(data_manager.fetch_all_tickers_periodically())
+    Logger.info("Started background data fetching for %s on %s.", data_manager.symbols, EXCHANGE_IDS)
+
+    # Exact fee tiers, looked up once here instead of on every evaluation, while the first quotes arrive
+    Logger.info("Waiting up to %d seconds for initial market data...", CHECK_INTERVAL_SECONDS * 2)
+    fee_table, _ = await asyncio.gather(exchange_manager.load_fee_table(data_manager.symbols),
+                                        data_manager.wait_until_ready(CHECK_INTERVAL_SECONDS * 2))
+    for finder in fee_finders:
+        finder.set_fee_percents(fee_table)
+    asyncio.create_task(refresh_fees(exchange_manager, data_manager.symbols, fee_finders))
+    Logger.info("Ready to trade %.3fs after launch.", time.perf_counter() - LAUNCHED_AT)
+
+    # 3. Initialize Trade Executor
+    trade_executor = TradeExecutor(exchange_manager, journal=journal)
 
     Logger.info("Bot is now actively looking for opportunities...")
 
+    try:
+        await run_main_loop(exchange_manager, data_manager, arbitrage_finder, trade_executor)
+    finally:
+        if recorder:
+            recorder.close()
+        if journal:
+            journal.close()
+        await exchange_manager.close()
+
+def sharding_conflicts():
+    """
+    Names of the enabled options that sharded ingestion does not support.
+    """
+    options = {'RECORD_TICKS_PATH': RECORD_TICKS_PATH, 'CYCLE_DETECTION': CYCLE_DETECTION,
+               'CROSS_QUOTE_DETECTION': CROSS_QUOTE_DETECTION}
+    return [name for name, value in options.items() if value]
+
+async def run_sharded(exchange_manager, journal=None):
+    """
+    Runs ingestion in SHARDED_INGESTION_WORKERS processes writing into a shared
+    price matrix, and scans that matrix in place whenever a worker wrote to it.
+    The workers withdraw stale quotes and those of exchanges with an open
+    circuit themselves; see sharding_conflicts for what this mode lacks.
+    """
+    from shard_ingest import ShardedIngestion
+    ingestion = ShardedIngestion(TARGET_SYMBOLS, list(exchange_manager.exchanges), SHARDED_INGESTION_WORKERS)
+    arbitrage_finder = ArbitrageFinder(price_matrix=ingestion.matrix)
+    arbitrage_finder.set_fee_percents(await exchange_manager.load_fee_table(TARGET_SYMBOLS))
+    trade_executor = TradeExecutor(exchange_manager, journal=journal)
+    ingestion.start()
+    last_versions = None
+    first_reported = False
+    try:
+        while True:
+            await asyncio.sleep(SHARDED_SCAN_INTERVAL_SECONDS)
+            # Per-exchange write counters tell whether anything changed since the last scan
+            versions = ingestion.matrix.versions.copy()
+            if last_versions is not None and (versions == last_versions).all():
+                continue
+            last_versions = versions
+            try:
+                opportunities = arbitrage_finder.find_top_opportunities(k=candidate_count())
+                opportunities = await size_opportunities(opportunities, exchange_manager, arbitrage_finder)
+                if await execute_opportunities(opportunities, exchange_manager, trade_executor) and not first_reported:
+                    first_reported = True
+                    report_first_opportunity()
+            except Exception as e:
+                Logger.error("An unexpected error occurred in the main loop: %s", e)
+    finally:
+        ingestion.stop()
+
+async def run_main_loop(exchange_manager, data_manager, arbitrage_finder, trade_executor):
+    """
+    Repeatedly looks for opportunities and executes them.
+    """
+    first_reported = False
     while True:
+        if INCREMENTAL_EVALUATION:
+            if await run_incremental_cycle(exchange_manager, data_manager, arbitrage_finder,
+                                           trade_executor) and not first_reported:
+                first_reported = True
+                report_first_opportunity()
+            continue
+
         try:
-            # Get the latest market data
+            # Get the latest market data, without stale quotes or those of failing exchanges
+            data_manager.expire_quotes()
             current_market_data = data_manager.get_latest_market_data()
 
             if not current_market_data:
@@ -47,18 +188,17 @@ async def main():
                 await asyncio.sleep(CHECK_INTERVAL_SECONDS)
                 continue
 
-            # 4. Find the best arbitrage opportunity
-            best_opportunity = arbitrage_finder.find_best_opportunity(current_market_data)
-
-            if best_opportunity:
-                Logger.info("Potential Arbitrage Found: %s - Buy on %s @ %s | Sell on %s @ %s | Net Profit: %.4f%%",
-                            best_opportunity['symbol'], best_opportunity['buy_exchange'], best_opportunity['buy_price'],
-                            best_opportunity['sell_exchange'], best_opportunity['sell_price'], best_opportunity['net_profit_percent'])
-                
-                # 5. Execute the trade (SIMULATED)
-                await trade_executor.execute_arbitrage_trade(best_opportunity)
-            else:
+            # 4. Find the best arbitrage opportunities
+            opportunities = arbitrage_finder.find_top_opportunities(current_market_data, k=candidate_count())
+            opportunities = arbitrage_finder.filter_outliers(opportunities, current_market_data)
+            opportunities = await size_opportunities(opportunities, exchange_manager, arbitrage_finder)
+
+            # 5. Execute the trades (SIMULATED)
+            if not await execute_opportunities(opportunities, exchange_manager, trade_executor):
                 Logger.info("No profitable arbitrage opportunities found at the moment.")
+            elif not first_reported:
+                first_reported = True
+                report_first_opportunity()
 
         except Exception as e:
             Logger.error("An unexpected error occurred in the main loop: %s",e)
@@ -66,6 +206,138 @@ async def main():
         # Wait before the next check
         await asyncio.sleep(CHECK_INTERVAL_SECONDS)
 
+def candidate_count():
+    """
+    Opportunities to look at per cycle: the allocator can use many, single execution only the best.
+    """
+    return max(BATCH_CANDIDATES, TOP_K_OPPORTUNITIES) if BATCH_EXECUTION else TOP_K_OPPORTUNITIES
+
+async def execute_opportunities(opportunities, exchange_manager, trade_executor):
+    """
+    Executes the best opportunity, or with BATCH_EXECUTION every trade the
+    allocator fits into the balances, all at once.
+
+    Returns:
+        int: Number of trades dispatched.
+    """
+    if not opportunities:
+        return 0
+    if BATCH_EXECUTION:
+        keys = set()
+        for opportunity in opportunities:
+            base, quote = opportunity['symbol'].split('/')
+            keys.add((opportunity['buy_exchange'], quote))
+            keys.add((opportunity['sell_exchange'], base))
+        # Served from the balance cache, so allocating costs no round-trips
+        balances = await exchange_manager.fetch_balances(keys)
+        chosen = allocate_trades(opportunities, balances)
+    else:
+        chosen = opportunities[:1]
+    for opportunity in chosen:
+        Logger.info("Potential Arbitrage Found: %s - Buy on %s @ %s | Sell on %s @ %s | Net Profit: %.4f%%",
+                    opportunity['symbol'], opportunity['buy_exchange'], opportunity['buy_price'],
+                    opportunity['sell_exchange'], opportunity['sell_price'], opportunity['net_profit_percent'])
+    if chosen:
+        await asyncio.gather(*(trade_executor.execute_arbitrage_trade(opportunity) for opportunity in chosen))
+    return len(chosen)
+
+def report_first_opportunity():
+    """
+    Logs the time from launch to the first opportunity. The loops call it
+    once, after their first dispatched trade.
+    """
+    Logger.info("First opportunity %.3fs after launch.", time.perf_counter() - LAUNCHED_AT)
+
+async def refresh_fees(exchange_manager, symbols, finders):
+    """
+    Reloads the finders' fee tables each time the cached fee tiers expire.
+    """
+    while True:
+        await asyncio.sleep(FEE_CACHE_TTL)
+        try:
+            fee_table = await exchange_manager.load_fee_table(symbols)
+            for finder in finders:
+                finder.set_fee_percents(fee_table)
+        except Exception as e:
+            Logger.error("Error refreshing fees: %s", e)
+
+async def report_cycles(cycle_finder):
+    """
+    Periodically runs cycle detection and logs profitable cycles.
+    Cycles are reported only; TradeExecutor handles two-leg trades.
+    """
+    while True:
+        await asyncio.sleep(CHECK_INTERVAL_SECONDS)
+        try:
+            for cycle in cycle_finder.find_cycles():
+                Logger.info("Profitable Cycle Found: %s | Net Profit: %.4f%%",
+                            ' -> '.join(f'{ex_id}:{currency}' for ex_id, currency in cycle['nodes']),
+                            cycle['profit_percent'])
+        except Exception as e:
+            Logger.error("Error during cycle detection: %s", e)
+
+async def report_cross_quote(cross_quote_finder):
+    """
+    Periodically logs the best opportunities across quote currencies.
+    They are reported only: their legs trade different symbols and settle
+    in different currencies, which TradeExecutor does not handle.
+    """
+    while True:
+        await asyncio.sleep(CHECK_INTERVAL_SECONDS)
+        try:
+            for opportunity in cross_quote_finder.find_opportunities():
+                Logger.info("Cross-Quote Arbitrage Found: Buy %s on %s @ %s | Sell %s on %s @ %s | "
+                            "Net Profit: %.4f%% in %s", opportunity['buy_symbol'], opportunity['buy_exchange'],
+                            opportunity['buy_price'], opportunity['sell_symbol'], opportunity['sell_exchange'],
+                            opportunity['sell_price'], opportunity['net_profit_percent'],
+                            opportunity['common_quote'])
+        except Exception as e:
+            Logger.error("Error during cross-quote detection: %s", e)
+
+async def size_opportunities(opportunities, exchange_manager, arbitrage_finder):
+    """
+    Fetches order books for the exchanges involved and re-ranks the
+    opportunities by profit executable after slippage.
+    """
+    if not SLIPPAGE_AWARE_SIZING or not opportunities:
+        return opportunities
+
+    keys = set()
+    for opportunity in opportunities:
+        keys.add((opportunity['symbol'], opportunity['buy_exchange']))
+        keys.add((opportunity['symbol'], opportunity['sell_exchange']))
+    keys = list(keys)
+    books = await asyncio.gather(*(exchange_manager.fetch_order_book(ex_id, symbol) for symbol, ex_id in keys))
+    # Only rank against books fetched just now
+    fresh_books = {key: book for key, book in zip(keys, books) if book is not None}
+    return arbitrage_finder.rank_by_executable_profit(opportunities, fresh_books)
+
+async def run_incremental_cycle(exchange_manager, data_manager, arbitrage_finder, trade_executor):
+    """
+    Waits for the finder to flag opportunities from ticker updates and
+    executes them, instead of polling on a fixed interval.
+
+    Returns:
+        int: Number of trades dispatched.
+    """
+    try:
+        woken = await arbitrage_finder.wait_for_opportunity(timeout=CHECK_INTERVAL_SECONDS)
+        # Re-evaluates the symbols of stale quotes and of exchanges with an open circuit
+        data_manager.expire_quotes()
+        if not woken:
+            Logger.info("No profitable arbitrage opportunities found at the moment.")
+            return 0
+
+        opportunities = arbitrage_finder.pop_pending_opportunities()
+        opportunities = arbitrage_finder.filter_outliers(opportunities, data_manager.market_data)
+        opportunities = await size_opportunities(opportunities, exchange_manager, arbitrage_finder)
+
+        # Execute the trades (SIMULATED)
+        return await execute_opportunities(opportunities, exchange_manager, trade_executor)
+    except Exception as e:
+        Logger.error("An unexpected error occurred in the main loop: %s", e)
+        return 0
+
 if __name__ == "__main__":
     # Run the asyncio event loop
     try:
@@ -0,0 +1,134 @@
+"low-overhead latency histograms and a Prometheus text endpoint"
+
+import asyncio
+import math
+from utils import Logger
+from config import METRICS_ENABLED
+
+SUB_BUCKETS = 8 # Per power of two, i.e. about 9% relative precision
+MIN_EXPONENT = -20 # 2**-20 s ~ 1 microsecond; smaller values go to the first bucket
+MAX_EXPONENT = 8 # 2**8 s ~ 4 minutes; larger values go to the last bucket
+BUCKET_COUNT = (MAX_EXPONENT - MIN_EXPONENT) * SUB_BUCKETS
+
+def _bucket_upper_bound(index):
+    exponent, sub = divmod(index, SUB_BUCKETS)
+    return math.ldexp(1 + (sub + 1) / SUB_BUCKETS, MIN_EXPONENT + exponent - 1)
+
+BUCKET_BOUNDS = [_bucket_upper_bound(i) for i in range(BUCKET_COUNT)]
+
+class LogHistogram:
+    """
+    HDR-style histogram of durations in seconds with log-spaced buckets.
+    Recording is a frexp and a list increment, with no allocation.
+    """
+    __slots__ = ('counts', 'count', 'total', 'max')
+
+    def __init__(self):
+        self.counts = [0] * BUCKET_COUNT
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        mantissa, exponent = math.frexp(seconds) # seconds = mantissa * 2**exponent, 0.5 <= mantissa < 1
+        index = (exponent - MIN_EXPONENT) * SUB_BUCKETS + int((mantissa - 0.5) * 2 * SUB_BUCKETS)
+        if index < 0 or seconds <= 0:
+            index = 0
+        elif index >= BUCKET_COUNT:
+            index = BUCKET_COUNT - 1
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q):
+        """
+        Returns the upper bound of the bucket holding the q-th quantile (0..1).
+        """
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for index, c in enumerate(self.counts):
+            seen += c
+            if c and seen >= target:
+                return min(BUCKET_BOUNDS[index], self.max)
+        return self.max
+
+class LatencyMetrics:
+    """
+    Registry of LogHistograms keyed by (stage, exchange_id).
+
+    Stages along the tick-to-trade path:
+        fetch               - request duration of ExchangeManager ticker fetches
+        exchange_to_receive - exchange timestamp -> ticker stored by DataManager
+        receive_to_detect   - ticker stored -> opportunity flagged by ArbitrageFinder
+        detect_to_submit    - opportunity flagged -> orders submitted by TradeExecutor
+        submit_to_ack       - order submitted -> order response received
+        tick_to_trade       - ticker stored -> both legs acknowledged
+    """
+    def __init__(self, enabled=True):
+        self.histograms = {}
+        if not enabled:
+            self.observe = self._observe_disabled
+
+    def observe(self, stage, exchange_id, seconds):
+        """
+        Records one duration. Negative durations (clock skew) are clamped to 0.
+        """
+        histogram = self.histograms.get((stage, exchange_id))
+        if histogram is None:
+            histogram = self.histograms[(stage, exchange_id)] = LogHistogram()
+        histogram.record(seconds if seconds > 0 else 0.0)
+
+    def _observe_disabled(self, stage, exchange_id, seconds):
+        pass
+
+    def render_prometheus(self):
+        """
+        Renders every histogram in the Prometheus text exposition format.
+        Only buckets up to the largest populated one are emitted.
+        """
+        lines = [
+            '# HELP arb_stage_latency_seconds Latency of each tick-to-trade stage.',
+            '# TYPE arb_stage_latency_seconds histogram',
+        ]
+        for (stage, exchange_id), histogram in sorted(self.histograms.items()):
+            labels = f'stage="{stage}",exchange="{exchange_id}"'
+            last = max((i for i, c in enumerate(histogram.counts) if c), default=-1)
+            cumulative = 0
+            for index in range(last + 1):
+                cumulative += histogram.counts[index]
+                lines.append(f'arb_stage_latency_seconds_bucket{{{labels},le="{BUCKET_BOUNDS[index]:.9g}"}} {cumulative}')
+            lines.append(f'arb_stage_latency_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f'arb_stage_latency_seconds_sum{{{labels}}} {histogram.total:.9g}')
+            lines.append(f'arb_stage_latency_seconds_count{{{labels}}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    async def serve(self, host, port):
+        """
+        Serves the metrics over HTTP on host:port until cancelled.
+        Every request gets the current Prometheus text, whatever its path.
+        """
+        async def handle(reader, writer):
+            try:
+                await reader.readuntil(b'\r\n\r\n')
+                body = self.render_prometheus().encode()
+                writer.write(b'HTTP/1.1 200 OK\r\n'
+                             b'Content-Type: text/plain; version=0.0.4\r\n'
+                             b'Content-Length: ' + str(len(body)).encode() + b'\r\n'
+                             b'Connection: close\r\n\r\n' + body)
+                await writer.drain()
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                pass
+            finally:
+                writer.close()
+
+        server = await asyncio.start_server(handle, host, port)
+        Logger.info("Serving latency metrics on http://%s:%d/metrics", host, port)
+        async with server:
+            await server.serve_forever()
+
+# Shared registry used by the hot-path instrumentation
+Metrics = LatencyMetrics(METRICS_ENABLED)
@@ -0,0 +1,67 @@
+"versioned on-disk cache of exchange market metadata"
+
+import json
+import os
+import time
+from utils import Logger
+
+class MarketsCache:
+    """
+    Keeps each exchange's ccxt markets (precision, limits, fees and the
+    id/symbol maps) in one JSON file, so a restart can trade on the last
+    known metadata instead of downloading it again. The raw 'info' payloads,
+    most of the download, are not stored.
+
+    Files are stamped with a version; a file written under another version
+    (a new cache format or ccxt release) or older than max_age is ignored.
+    """
+    def __init__(self, directory, version, max_age):
+        """
+        Args:
+            directory (str): Where the per-exchange files live. Created on first save.
+            version (str): Stamp that must match for a file to be used.
+            max_age (float): Seconds after which a file is too old to use.
+        """
+        self.directory = directory
+        self.version = version
+        self.max_age = max_age
+
+    def _path(self, exchange_id):
+        return os.path.join(self.directory, f'{exchange_id}.json')
+
+    def load(self, exchange_id):
+        """
+        Returns the cached markets of an exchange, or None if there is no usable copy.
+        """
+        path = self._path(exchange_id)
+        try:
+            with open(path, encoding='utf-8') as f:
+                cached = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            Logger.warning("Ignoring unreadable markets cache %s: %s", path, e)
+            return None
+        if cached.get('version') != self.version:
+            Logger.info("Markets cache for %s is from version %s, expected %s.",
+                        exchange_id, cached.get('version'), self.version)
+            return None
+        if time.time() - cached.get('saved_at', 0) > self.max_age:
+            return None
+        return cached['markets']
+
+    def save(self, exchange_id, markets):
+        """
+        Writes the markets of an exchange, replacing the previous file atomically.
+        """
+        stripped = {symbol: {key: value for key, value in market.items() if key != 'info'}
+                    for symbol, market in markets.items()}
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(exchange_id)
+        tmp_path = f'{path}.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': self.version, 'saved_at': time.time(), 'markets': stripped}, f, default=str)
+            os.replace(tmp_path, path) # Readers never see a half-written file
+        except OSError as e:
+            Logger.warning("Could not write markets cache %s: %s", path, e)
@@ -0,0 +1,190 @@
+"compact order books and slippage-aware trade sizing"
+
+import numpy as np
+from config import ORDER_BOOK_DEPTH
+
+class BookSide:
+    """
+    One side of an order book held in preallocated price/size arrays.
+    Levels are kept sorted best-first: descending for bids, ascending for asks.
+    """
+    def __init__(self, descending, depth=ORDER_BOOK_DEPTH):
+        self.descending = descending
+        self.prices = np.zeros(depth)
+        self.sizes = np.zeros(depth)
+        self.count = 0
+
+    @property
+    def depth(self):
+        return self.prices.shape[0]
+
+    def levels(self):
+        """
+        Returns (prices, sizes) views of the populated levels, best first.
+        """
+        return self.prices[:self.count], self.sizes[:self.count]
+
+    def load(self, levels):
+        """
+        Replaces the side with [[price, size], ...] levels as returned by ccxt.
+        Levels beyond the preallocated depth are dropped.
+        """
+        n = min(len(levels), self.depth)
+        if n:
+            arr = np.asarray(levels[:n], dtype=float)[:, :2]
+            order = np.argsort(-arr[:, 0] if self.descending else arr[:, 0], kind='stable')
+            self.prices[:n] = arr[order, 0]
+            self.sizes[:n] = arr[order, 1]
+        self.count = n
+
+    def _position(self, price):
+        """
+        Binary-searches the index where price belongs in the sorted levels.
+        """
+        prices = self.prices[:self.count]
+        if self.descending:
+            # searchsorted needs ascending order, so search the negated prices
+            return int(np.searchsorted(-prices, -price))
+        return int(np.searchsorted(prices, price))
+
+    def apply(self, price, size):
+        """
+        Applies one incremental update: sets the size at price, inserting the
+        level if new, or removing it when size is 0.
+        """
+        pos = self._position(price)
+        exists = pos < self.count and self.prices[pos] == price
+
+        if size <= 0:
+            if exists:
+                self.prices[pos:self.count - 1] = self.prices[pos + 1:self.count]
+                self.sizes[pos:self.count - 1] = self.sizes[pos + 1:self.count]
+                self.count -= 1
+            return
+        if exists:
+            self.sizes[pos] = size
+            return
+        if pos >= self.depth:
+            return # Worse than every level we keep
+
+        # Shift worse levels down by one; the worst falls off when the side is full
+        end = min(self.count, self.depth - 1)
+        self.prices[pos + 1:end + 1] = self.prices[pos:end]
+        self.sizes[pos + 1:end + 1] = self.sizes[pos:end]
+        self.prices[pos] = price
+        self.sizes[pos] = size
+        self.count = end + 1
+
+class OrderBook:
+    """
+    Top-N order book for one (symbol, exchange), stored in compact NumPy arrays.
+    """
+    def __init__(self, depth=ORDER_BOOK_DEPTH):
+        self.bids = BookSide(descending=True, depth=depth)
+        self.asks = BookSide(descending=False, depth=depth)
+        self.timestamp = None
+
+    def apply_snapshot(self, bids, asks, timestamp=None):
+        """
+        Replaces the book with full bid/ask level lists.
+        """
+        self.bids.load(bids)
+        self.asks.load(asks)
+        self.timestamp = timestamp
+
+    def apply_delta(self, side, price, size, timestamp=None):
+        """
+        Applies an incremental level update to 'bids' or 'asks'.
+        """
+        (self.bids if side == 'bids' else self.asks).apply(price, size)
+        if timestamp is not None:
+            self.timestamp = timestamp
+
+def _cumulative(side):
+    """
+    Returns cumulative (base quantity, quote notional) at each level boundary, starting at 0.
+    """
+    prices, sizes = side.levels()
+    qty = np.concatenate(([0.0], np.cumsum(sizes)))
+    notional = np.concatenate(([0.0], np.cumsum(prices * sizes)))
+    return qty, notional
+
+def size_trade(buy_book, sell_book, buy_fee_percent, sell_fee_percent,
+               min_amount, max_amount, min_profit_percent):
+    """
+    Walks the buy exchange's asks and the sell exchange's bids to find the
+    largest trade that stays above min_profit_percent after slippage and fees.
+
+    Both fills are piecewise linear in the base quantity, so the profit margin
+    only shrinks as size grows. The margin is evaluated at every level boundary
+    in one vectorized pass, and the exact crossing point is interpolated inside
+    the first segment where it turns negative.
+
+    Args:
+        buy_book (OrderBook): Book on the exchange we buy on (asks are consumed).
+        sell_book (OrderBook): Book on the exchange we sell on (bids are consumed).
+        buy_fee_percent (float): Taker fee on the buy exchange.
+        sell_fee_percent (float): Taker fee on the sell exchange.
+        min_amount (float): Minimum trade notional in quote currency.
+        max_amount (float): Maximum trade notional in quote currency.
+        min_profit_percent (float): Required net profit percent.
+
+    Returns:
+        dict or None: {'amount', 'cost', 'revenue', 'buy_vwap', 'sell_vwap',
+                      'net_profit_percent', 'expected_profit'} for the largest
+                      executable size, or None if even min_amount is not profitable.
+    """
+    ask_qty, ask_notional = _cumulative(buy_book.asks)
+    bid_qty, bid_notional = _cumulative(sell_book.bids)
+    if ask_qty[-1] <= 0 or bid_qty[-1] <= 0:
+        return None
+
+    # Largest base quantity both books can fill and that costs at most max_amount
+    q_limit = min(ask_qty[-1], bid_qty[-1], np.interp(max_amount, ask_notional, ask_qty))
+
+    # Breakpoints where either side moves to a new price level
+    q = np.union1d(ask_qty, bid_qty)
+    q = np.append(q[q < q_limit], q_limit)
+
+    buy_mult = 1 + buy_fee_percent / 100
+    sell_mult = 1 - sell_fee_percent / 100
+    required = 1 + min_profit_percent / 100
+    cost = np.interp(q, ask_qty, ask_notional)
+    revenue = np.interp(q, bid_qty, bid_notional)
+    # margin >= 0 means net profit percent >= min_profit_percent; it is non-increasing in q
+    margin = revenue * sell_mult - required * cost * buy_mult
+
+    ok = margin[1:] >= 0
+    if ok.all():
+        amount = q[-1]
+    else:
+        # margin[0] is 0 at q=0, so the crossing lies in the segment ending at the first failure
+        i = int(np.argmin(ok))
+        amount = _root(q[i], q[i + 1], margin[i], margin[i + 1])
+
+    amount = float(amount)
+    if amount <= 0:
+        return None
+    cost = float(np.interp(amount, ask_qty, ask_notional))
+    if cost < min_amount:
+        return None
+    revenue = float(np.interp(amount, bid_qty, bid_notional))
+    fee_cost = cost * buy_mult
+    fee_revenue = revenue * sell_mult
+    return {
+        'amount': amount,
+        'cost': cost,
+        'revenue': revenue,
+        'buy_vwap': cost / amount,
+        'sell_vwap': revenue / amount,
+        'net_profit_percent': (fee_revenue - fee_cost) / fee_cost * 100,
+        'expected_profit': fee_revenue - fee_cost
+    }
+
+def _root(q0, q1, m0, m1):
+    """
+    Linear root of the margin between two breakpoints where m0 >= 0 > m1.
+    """
+    if m0 <= 0:
+        return q0
+    return q0 + (q1 - q0) * m0 / (m0 - m1)
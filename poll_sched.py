@@ -0,0 +1,147 @@
+"token buckets and per-symbol deadlines for rate-limit-aware polling"
+
+import asyncio
+import math
+import time
+from config import (MIN_PROFIT_PERCENT, POLL_MIN_INTERVAL_SECONDS, POLL_MAX_INTERVAL_SECONDS,
+                    POLL_SPREAD_SCALE_PERCENT)
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens per second accumulate up to `capacity`,
+    and every request spends one.
+    """
+    def __init__(self, rate, capacity=None, clock=time.monotonic):
+        """
+        Args:
+            rate (float): Tokens added per second, i.e. the sustained request rate.
+            capacity (float, optional): Burst size. Defaults to one second of tokens.
+            clock (callable): Time source.
+        """
+        self.rate = rate
+        self.capacity = max(1.0, rate if capacity is None else capacity)
+        self.clock = clock
+        self.tokens = self.capacity
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, cost=1.0):
+        """
+        Spends cost tokens if available. Returns True on success.
+        """
+        self._refill()
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return True
+        return False
+
+    def available(self):
+        """
+        Tokens currently in the bucket.
+        """
+        self._refill()
+        return self.tokens
+
+    def delay(self, cost=1.0):
+        """
+        Seconds until cost tokens will be available.
+        """
+        self._refill()
+        return max(0.0, (cost - self.tokens) / self.rate)
+
+    def drain(self):
+        """
+        Spends every token, e.g. after the server answered 429, so the next
+        request waits for the bucket to refill.
+        """
+        self._refill()
+        self.tokens = 0.0
+
+    async def acquire(self, cost=1.0):
+        """
+        Waits until cost tokens are available and spends them.
+        """
+        while not self.try_acquire(cost):
+            await asyncio.sleep(self.delay(cost))
+
+class PollScheduler:
+    """
+    Decides which symbols of one exchange to poll next.
+
+    Every symbol has its own deadline. Its polling interval shrinks from
+    max_interval to min_interval as its spread approaches MIN_PROFIT_PERCENT,
+    where a fresh quote is most likely to turn into an opportunity. Symbols
+    are served earliest deadline first, so low-priority symbols are polled
+    less often but never starved when the request budget is tight. When the
+    budget has room to spare, symbols are polled ahead of their deadline, but
+    never more often than min_interval.
+    """
+    def __init__(self, symbols, spread_fn, min_interval=POLL_MIN_INTERVAL_SECONDS,
+                 max_interval=POLL_MAX_INTERVAL_SECONDS, spread_scale=POLL_SPREAD_SCALE_PERCENT,
+                 clock=time.monotonic):
+        """
+        Args:
+            symbols (list): Symbols polled on this exchange.
+            spread_fn (callable): spread_fn(symbol) -> best net spread percent across
+                                  exchanges, or None while it is unknown.
+            min_interval (float): Interval for symbols right at the profit threshold.
+            max_interval (float): Interval for symbols spread_scale or more away from it.
+            spread_scale (float): Distance in percent at which the interval reaches max_interval.
+        """
+        self.symbols = list(symbols)
+        self.spread_fn = spread_fn
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.spread_scale = spread_scale
+        self.clock = clock
+        now = clock()
+        self.deadlines = dict.fromkeys(self.symbols, now) # Everything is due at start
+        self.last_polled = dict.fromkeys(self.symbols, -math.inf)
+
+    def interval(self, symbol):
+        """
+        Polling interval of a symbol given its current spread.
+        """
+        spread = self.spread_fn(symbol)
+        if spread is None:
+            return self.min_interval
+        closeness = min(1.0, abs(spread - MIN_PROFIT_PERCENT) / self.spread_scale)
+        return self.min_interval + (self.max_interval - self.min_interval) * closeness
+
+    def _ready_at(self, symbol, spare):
+        if spare:
+            return min(self.deadlines[symbol], self.last_polled[symbol] + self.min_interval)
+        return self.deadlines[symbol]
+
+    def due(self, spare=False):
+        """
+        Symbols that may be polled now, earliest deadline first.
+
+        Args:
+            spare (bool): Budget is plentiful, so also include symbols that are not
+                          yet due but were last polled at least min_interval ago.
+        """
+        now = self.clock()
+        return sorted((s for s in self.symbols if self._ready_at(s, spare) <= now),
+                      key=self.deadlines.__getitem__)
+
+    def wait_time(self, spare=False):
+        """
+        Seconds until due(spare) returns at least one symbol, or max_interval
+        when the exchange lists none of them.
+        """
+        if not self.symbols:
+            return self.max_interval
+        return max(0.0, min(self._ready_at(s, spare) for s in self.symbols) - self.clock())
+
+    def mark_polled(self, symbol):
+        """
+        Schedules the next poll of symbol one interval from now.
+        """
+        now = self.clock()
+        self.last_polled[symbol] = now
+        self.deadlines[symbol] = now + self.interval(symbol)
@@ -0,0 +1,217 @@
+"dense price matrix for vectorized arbitrage detection"
+
+import numpy as np
+from config import DEFAULT_TAKER_FEE_PERCENT
+from tkr_store import TickerStore
+
+def cross_spread_percent(bids, asks, fee_percents):
+    """
+    Best fee-adjusted spread in percent of buying on one exchange and selling
+    on another. The bid and ask of one exchange are never paired.
+
+    Args:
+        bids (np.ndarray): Bid per exchange, NaN where unquoted.
+        asks (np.ndarray): Ask per exchange, NaN where unquoted.
+        fee_percents (np.ndarray or float): Taker fee percent per exchange, or one for all.
+
+    Returns:
+        float: The spread, or None until two exchanges quote the symbol.
+    """
+    fees = np.asarray(fee_percents) / 100
+    cost = asks * (1 + fees)
+    revenue = bids * (1 - fees)
+    spreads = (revenue[None, :] - cost[:, None]) / cost[:, None] * 100 # [buy, sell]
+    np.fill_diagonal(spreads, np.nan)
+    if np.isnan(spreads).all():
+        return None
+    return float(np.nanmax(spreads))
+
+class PriceMatrix:
+    """
+    Keeps bids, asks and taker fees in dense symbol x exchange arrays so the
+    whole buy/sell profit tensor can be computed in one batched pass.
+    """
+    def __init__(self, symbols=(), exchange_ids=(), fee_percent=DEFAULT_TAKER_FEE_PERCENT):
+        self.default_fee_percent = fee_percent
+        self.symbols = []
+        self.exchange_ids = []
+        self.symbol_index = {}
+        self.exchange_index = {}
+        # Arrays are preallocated with spare capacity and grown by doubling,
+        # so adding a symbol or exchange does not reallocate on every call.
+        self.bids = np.full((0, 0), np.nan)
+        self.asks = np.full((0, 0), np.nan)
+        self.fees = np.full((0, 0), fee_percent)
+        self._reserve(max(len(symbols), 8), max(len(exchange_ids), 4))
+
+        for symbol in symbols:
+            self.symbol_id(symbol)
+        for ex_id in exchange_ids:
+            self.exchange_id(ex_id)
+
+    def _reserve(self, symbol_capacity, exchange_capacity):
+        """
+        Grows the backing arrays to at least the given capacity, keeping existing values.
+        """
+        rows, cols = self.bids.shape
+        if symbol_capacity <= rows and exchange_capacity <= cols:
+            return
+        new_rows, new_cols = max(symbol_capacity, rows), max(exchange_capacity, cols)
+
+        bids = np.full((new_rows, new_cols), np.nan)
+        asks = np.full((new_rows, new_cols), np.nan)
+        fees = np.full((new_rows, new_cols), self.default_fee_percent)
+        bids[:rows, :cols] = self.bids
+        asks[:rows, :cols] = self.asks
+        fees[:rows, :cols] = self.fees
+        self.bids, self.asks, self.fees = bids, asks, fees
+
+    def symbol_id(self, symbol):
+        """
+        Returns the row index for a symbol, adding a new row if needed.
+        """
+        idx = self.symbol_index.get(symbol)
+        if idx is None:
+            idx = len(self.symbols)
+            if idx >= self.bids.shape[0]:
+                self._reserve(idx * 2, self.bids.shape[1])
+            self.symbols.append(symbol)
+            self.symbol_index[symbol] = idx
+        return idx
+
+    def exchange_id(self, exchange_id):
+        """
+        Returns the column index for an exchange, adding a new column if needed.
+        """
+        idx = self.exchange_index.get(exchange_id)
+        if idx is None:
+            idx = len(self.exchange_ids)
+            if idx >= self.bids.shape[1]:
+                self._reserve(self.bids.shape[0], idx * 2)
+            self.exchange_ids.append(exchange_id)
+            self.exchange_index[exchange_id] = idx
+        return idx
+
+    def update(self, symbol, exchange_id, bid, ask):
+        """
+        Writes the latest top-of-book for a (symbol, exchange) cell.
+        Missing prices are stored as NaN and never produce an opportunity.
+        """
+        row = self.symbol_id(symbol)
+        col = self.exchange_id(exchange_id)
+        self.bids[row, col] = np.nan if bid is None else bid
+        self.asks[row, col] = np.nan if ask is None else ask
+
+    def set_fee(self, symbol, exchange_id, fee_percent):
+        """
+        Overrides the taker fee used for a (symbol, exchange) cell.
+        """
+        # Indices first: adding a row or column reallocates self.fees
+        row = self.symbol_id(symbol)
+        col = self.exchange_id(exchange_id)
+        self.fees[row, col] = fee_percent
+
+    def spread_percent(self, symbol):
+        """
+        Best fee-adjusted spread in percent of buying a symbol on one exchange
+        and selling it on another, or None until two exchanges quote it. Like
+        ArbitrageFinder.spread_percent, the bid and ask of one exchange are
+        never paired.
+        """
+        row = self.symbol_index.get(symbol)
+        if row is None:
+            return None
+        n_ex = len(self.exchange_ids)
+        return cross_spread_percent(self.bids[row, :n_ex], self.asks[row, :n_ex], self.fees[row, :n_ex])
+
+    def clear(self):
+        """
+        Marks every cell as having no price, keeping the symbol/exchange layout.
+        """
+        self.bids.fill(np.nan)
+        self.asks.fill(np.nan)
+
+    def load(self, all_market_data):
+        """
+        Replaces the matrix contents with a {(symbol, exchange_id): ticker} dict.
+        A TickerStore is copied array to array instead of ticker by ticker.
+        """
+        if isinstance(all_market_data, TickerStore):
+            self._load_store(all_market_data)
+            return
+        self.clear()
+        for (symbol, ex_id), ticker in all_market_data.items():
+            self.update(symbol, ex_id, ticker.get('bid'), ticker.get('ask'))
+
+    def _load_store(self, store):
+        # Ids first: interning can reallocate the arrays
+        rows = [self.symbol_id(symbol) for symbol in store.symbols]
+        cols = [self.exchange_id(ex_id) for ex_id in store.exchange_ids]
+        self.clear()
+        cells = np.ix_(rows, cols)
+        self.bids[cells] = store.bids[:len(rows), :len(cols)]
+        self.asks[cells] = store.asks[:len(rows), :len(cols)]
+
+    def profit_tensor(self):
+        """
+        Computes net profit percent for every (symbol, buy_exchange, sell_exchange).
+
+        Returns:
+            numpy.ndarray: Array of shape (symbols, exchanges, exchanges). Cells
+                           that cannot be traded (missing prices, same exchange,
+                           sell price not above buy price) are -inf.
+        """
+        n_sym, n_ex = len(self.symbols), len(self.exchange_ids)
+        asks = self.asks[:n_sym, :n_ex]
+        bids = self.bids[:n_sym, :n_ex]
+        fees = self.fees[:n_sym, :n_ex]
+
+        # Same per-unit formulas as ArbitrageFinder.find_best_opportunity
+        cost_per_unit = asks * (1 + fees / 100)
+        revenue_per_unit = bids * (1 - fees / 100)
+
+        cost = cost_per_unit[:, :, None]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            net = ((revenue_per_unit[:, None, :] - cost) / cost) * 100
+            tradable = (bids[:, None, :] > asks[:, :, None]) & (revenue_per_unit[:, None, :] > cost)
+
+        tradable &= ~np.eye(n_ex, dtype=bool)[None, :, :]
+        return np.where(tradable, net, -np.inf)
+
+    def top_opportunities(self, k, min_profit_percent):
+        """
+        Returns up to k opportunities above min_profit_percent, best first.
+
+        Returns:
+            list: Opportunity dicts in the same format as
+                  ArbitrageFinder.find_best_opportunity.
+        """
+        if k <= 0 or len(self.exchange_ids) < 2 or not self.symbols:
+            return []
+
+        net = self.profit_tensor()
+        flat = net.ravel()
+        candidates = np.flatnonzero(flat > min_profit_percent)
+        if candidates.size == 0:
+            return []
+
+        if candidates.size > k:
+            part = np.argpartition(flat[candidates], -k)[-k:]
+            candidates = candidates[part]
+        candidates = candidates[np.argsort(-flat[candidates], kind='stable')]
+
+        sym_idx, buy_idx, sell_idx = np.unravel_index(candidates, net.shape)
+        opportunities = []
+        for s, b, x, profit in zip(sym_idx.tolist(), buy_idx.tolist(), sell_idx.tolist(),
+                                   flat[candidates].tolist()):
+            opportunities.append({
+                'symbol': self.symbols[s],
+                'buy_exchange': self.exchange_ids[b],
+                'sell_exchange': self.exchange_ids[x],
+                'buy_price': float(self.asks[s, b]),
+                'sell_price': float(self.bids[s, x]),
+                'net_profit_percent': profit,
+                'estimated_buy_fee_percent': float(self.fees[s, b]),
+                'estimated_sell_fee_percent': float(self.fees[s, x])
+            })
+        return opportunities
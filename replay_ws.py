@@ -0,0 +1,146 @@
+"local websocket stand-in that replays recorded ticks"
+
+import asyncio
+import json
+import random
+import time
+from aiohttp import web, WSMsgType
+
+def load_ticks(path):
+    """
+    Loads recorded ticks from a JSONL file with one
+    {exchange_id, symbol, bid, ask} object per line.
+    """
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def synthetic_ticks(exchange_ids, symbols, count, seed=0):
+    """
+    Generates count ticks as a seeded random walk, round-robin over (exchange, symbol).
+    """
+    rng = random.Random(seed)
+    keys = [(ex_id, symbol) for ex_id in exchange_ids for symbol in symbols]
+    mids = {key: 100 * (1 + rng.uniform(-0.005, 0.005)) for key in keys}
+    ticks = []
+    for i in range(count):
+        ex_id, symbol = keys[i % len(keys)]
+        mid = mids[(ex_id, symbol)] * (1 + rng.gauss(0, 0.0005))
+        mids[(ex_id, symbol)] = mid
+        ticks.append({'exchange_id': ex_id, 'symbol': symbol, 'bid': mid * 0.9998, 'ask': mid * 1.0002})
+    return ticks
+
+class ReplayStreamServer:
+    """
+    Serves one websocket per exchange at /ws/{exchange_id} and replays that
+    exchange's recorded ticks to subscribers, speaking the protocol expected by
+    ws_feed.TickerStream. Timestamps are restamped at send time so clients can
+    measure end-to-end latency.
+    """
+    def __init__(self, ticks, rate=0.0, host='127.0.0.1', port=0, loop_forever=True,
+                 drop_every=0, disconnect_after=0):
+        """
+        Args:
+            ticks (list): Recorded ticks, see load_ticks.
+            rate (float): Messages per second per connection; 0 replays as fast as possible.
+            loop_forever (bool): Restart the recording when it is exhausted.
+            drop_every (int): Skip every Nth seq number to create gaps (0 disables).
+            disconnect_after (int): Close each connection after N messages (0 disables).
+        """
+        self.ticks_by_exchange = {}
+        for tick in ticks:
+            self.ticks_by_exchange.setdefault(tick['exchange_id'], []).append(tick)
+        self.rate = rate
+        self.host = host
+        self.port = port
+        self.loop_forever = loop_forever
+        self.drop_every = drop_every
+        self.disconnect_after = disconnect_after
+        self.messages_sent = 0
+        self.connections = 0
+        self._runner = None
+
+        self.app = web.Application()
+        self.app.router.add_get('/ws/{exchange_id}', self._handle_ws)
+
+    def url_for(self, exchange_id):
+        return f'ws://{self.host}:{self.port}/ws/{exchange_id}'
+
+    async def start(self):
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle_ws(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.connections += 1
+        exchange_id = request.match_info['exchange_id']
+
+        # Wait for the subscribe message before replaying anything
+        symbols = None
+        async for msg in ws:
+            if msg.type == WSMsgType.TEXT:
+                message = json.loads(msg.data)
+                if message.get('op') == 'subscribe':
+                    symbols = set(message.get('symbols', []))
+                    break
+        if symbols is None:
+            return ws
+
+        ticks = [t for t in self.ticks_by_exchange.get(exchange_id, []) if t['symbol'] in symbols]
+        # Keep reading so close frames from the client are handled while replaying
+        reader = asyncio.create_task(self._drain(ws))
+        try:
+            await self._replay(ws, ticks)
+        except ConnectionResetError:
+            pass
+        finally:
+            reader.cancel()
+        await ws.close()
+        return ws
+
+    @staticmethod
+    async def _drain(ws):
+        async for _ in ws:
+            pass
+
+    async def _replay(self, ws, ticks):
+        seq = 0
+        sent = 0
+        interval = 1 / self.rate if self.rate else 0
+        next_send = time.perf_counter()
+        while ticks and not ws.closed:
+            for tick in ticks:
+                if ws.closed:
+                    return
+                seq += 1
+                if self.drop_every and seq % self.drop_every == 0:
+                    continue
+                if interval:
+                    next_send += interval
+                    delay = next_send - time.perf_counter()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                await ws.send_json({
+                    'seq': seq,
+                    'channel': 'ticker',
+                    'symbol': tick['symbol'],
+                    'bid': tick['bid'],
+                    'ask': tick['ask'],
+                    'timestamp': time.time() * 1000
+                })
+                self.messages_sent += 1
+                sent += 1
+                if self.disconnect_after and sent >= self.disconnect_after:
+                    return
+                if not interval and sent % 256 == 0:
+                    await asyncio.sleep(0) # Let other connections make progress
+            if not self.loop_forever:
+                return
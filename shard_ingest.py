@@ -0,0 +1,108 @@
+"multi-process ticker ingestion sharded by exchange"
+
+import asyncio
+import multiprocessing
+from config import STREAMING_MODE, CHECK_INTERVAL_SECONDS
+from utils import Logger
+from shm_mtrx import SharedPriceMatrix
+
+def shard_exchanges(exchange_ids, n_workers):
+    """
+    Splits exchanges round-robin into at most n_workers non-empty shards.
+    """
+    shards = [list(exchange_ids[i::n_workers]) for i in range(min(n_workers, len(exchange_ids)))]
+    return [shard for shard in shards if shard]
+
+def ingest_worker(matrix_name, symbols, exchange_ids, shard, client_factory=None, streaming=STREAMING_MODE):
+    """
+    Process entry point: runs a DataManager for the shard's exchanges and
+    writes every ticker into the shared matrix.
+
+    Args:
+        matrix_name (str): SharedPriceMatrix.name to attach to.
+        symbols (list): Matrix row layout, also the symbols to fetch.
+        exchange_ids (list): Matrix column layout.
+        shard (list): Exchanges this worker ingests.
+        client_factory (callable, optional): client_factory(shard) -> {exchange_id: client},
+                                             must be picklable. Defaults to ccxt clients.
+        streaming (bool): Use websocket streams instead of polling.
+    """
+    try:
+        asyncio.run(_ingest(matrix_name, symbols, exchange_ids, shard, client_factory, streaming))
+    except KeyboardInterrupt:
+        pass
+
+async def _ingest(matrix_name, symbols, exchange_ids, shard, client_factory, streaming):
+    # Imported here so the parent process does not pay for ccxt when it only reads the matrix
+    from exc_mngr import ExchangeManager
+    from data_mngr import DataManager
+
+    matrix = SharedPriceMatrix(symbols, exchange_ids, name=matrix_name)
+    clients = client_factory(shard) if client_factory else None
+    exchange_manager = ExchangeManager(shard, clients=clients)
+    # Polling priorities come from every exchange's quotes, not just this shard's
+    data_manager = DataManager(exchange_manager, symbols, shard, spread_fn=matrix.spread_percent)
+    data_manager.add_ticker_listener(matrix.on_ticker_update)
+    # The shard's circuits live in this process, so its quotes are expired here too
+    data_manager.add_exclusion_listener(matrix.exclude_quote)
+    expiry = asyncio.create_task(_expire_quotes_periodically(data_manager))
+    try:
+        if streaming:
+            await data_manager.stream_all_tickers()
+        else:
+            await data_manager.fetch_all_tickers_periodically()
+    finally:
+        expiry.cancel()
+        await exchange_manager.close()
+        matrix.close()
+
+async def _expire_quotes_periodically(data_manager):
+    """
+    Withdraws stale quotes and those of exchanges with an open circuit from
+    the shared matrix, as the main loop does when it ingests itself.
+    """
+    while True:
+        await asyncio.sleep(CHECK_INTERVAL_SECONDS)
+        try:
+            data_manager.expire_quotes()
+        except Exception as e:
+            Logger.error("Error expiring quotes: %s", e)
+
+class ShardedIngestion:
+    """
+    Owns a SharedPriceMatrix and the worker processes that fill it,
+    one shard of exchanges per worker.
+    """
+    def __init__(self, symbols, exchange_ids, n_workers, client_factory=None, streaming=STREAMING_MODE):
+        self.matrix = SharedPriceMatrix(symbols, exchange_ids)
+        self.symbols = list(symbols)
+        self.exchange_ids = list(exchange_ids)
+        self.shards = shard_exchanges(self.exchange_ids, n_workers)
+        self.client_factory = client_factory
+        self.streaming = streaming
+        self.processes = []
+
+    def start(self):
+        """
+        Starts one worker process per shard.
+        """
+        # spawn gives every worker a fresh interpreter and event loop
+        context = multiprocessing.get_context('spawn')
+        for shard in self.shards:
+            process = context.Process(
+                target=ingest_worker, daemon=True, name=f"ingest-{'-'.join(shard)}",
+                args=(self.matrix.name, self.symbols, self.exchange_ids, shard, self.client_factory, self.streaming))
+            process.start()
+            self.processes.append(process)
+        Logger.info("Started %d ingestion workers for shards %s.", len(self.processes), self.shards)
+
+    def stop(self):
+        """
+        Stops the workers and frees the shared matrix.
+        """
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            process.join()
+        self.processes = []
+        self.matrix.close()
@@ -0,0 +1,163 @@
+"shared-memory price matrix with per-cell seqlocks for multi-process ingestion"
+
+import math
+import multiprocessing
+from multiprocessing import shared_memory, resource_tracker
+import numpy as np
+from config import DEFAULT_TAKER_FEE_PERCENT
+from price_mtrx import PriceMatrix
+
+READ_RETRIES = 5 # Optimistic read attempts before a torn cell or opportunity is given up on
+
+class SharedPriceMatrix(PriceMatrix):
+    """
+    PriceMatrix whose bids, asks and timestamps live in a
+    multiprocessing.shared_memory block, so ingestion workers in other
+    processes can write into it and the finder reads it in place.
+
+    Every (symbol, exchange) cell has a seqlock version: the writer makes it
+    odd, writes the cell, then makes it even again. Each exchange column has
+    exactly one writer process, so no locks are needed. Readers compute on
+    the shared arrays directly and afterwards check that the versions of the
+    cells they used are even and unchanged, retrying otherwise. Only the
+    version array is copied per read; prices never are.
+
+    The symbol and exchange layout is fixed when the block is created.
+    """
+    def __init__(self, symbols, exchange_ids, name=None, fee_percent=DEFAULT_TAKER_FEE_PERCENT):
+        """
+        Args:
+            symbols (list): Row layout.
+            exchange_ids (list): Column layout.
+            name (str, optional): Attach to the existing block with this name
+                                  instead of creating a new one.
+        """
+        self.default_fee_percent = fee_percent
+        self.symbols = list(symbols)
+        self.exchange_ids = list(exchange_ids)
+        self.symbol_index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.exchange_index = {ex_id: i for i, ex_id in enumerate(self.exchange_ids)}
+        shape = (len(self.symbols), len(self.exchange_ids))
+        cells = shape[0] * shape[1]
+
+        # Layout: per-cell versions, per-exchange write counters, then bids, asks, timestamps
+        size = 8 * (cells + shape[1] + 3 * cells)
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size)
+        if not self.owner and multiprocessing.parent_process() is None:
+            # Only the creator may unlink the block; see bpo-39959. Child processes
+            # share their parent's resource tracker, where the creator's entry already is.
+            resource_tracker.unregister(self.shm._name, 'shared_memory')
+        buf = self.shm.buf
+        self.seq = np.ndarray(shape, np.uint64, buf, 0)
+        self.versions = np.ndarray((shape[1],), np.uint64, buf, 8 * cells)
+        offset = 8 * (cells + shape[1])
+        self.bids = np.ndarray(shape, np.float64, buf, offset)
+        self.asks = np.ndarray(shape, np.float64, buf, offset + 8 * cells)
+        self.timestamps = np.ndarray(shape, np.float64, buf, offset + 16 * cells)
+        if self.owner:
+            self.seq.fill(0)
+            self.versions.fill(0)
+            self.bids.fill(np.nan)
+            self.asks.fill(np.nan)
+            self.timestamps.fill(np.nan)
+        self.fees = np.full(shape, fee_percent) # Private to each process
+        self.torn_reads = 0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def _reserve(self, symbol_capacity, exchange_capacity):
+        if symbol_capacity > self.bids.shape[0] or exchange_capacity > self.bids.shape[1]:
+            raise ValueError("SharedPriceMatrix layout is fixed at creation")
+
+    def write(self, row, col, bid, ask, timestamp):
+        """
+        Seqlock write of one cell. Must only be called by the column's writer.
+        """
+        seq = self.seq
+        seq[row, col] += 1 # Odd: write in progress
+        self.bids[row, col] = bid
+        self.asks[row, col] = ask
+        self.timestamps[row, col] = timestamp
+        seq[row, col] += 1 # Even: cell is consistent again
+        self.versions[col] += 1
+
+    def update(self, symbol, exchange_id, bid, ask, timestamp=None):
+        """
+        Writes the latest top-of-book for a (symbol, exchange) cell.
+        Missing values are stored as NaN.
+        """
+        self.write(self.symbol_index[symbol], self.exchange_index[exchange_id],
+                   math.nan if bid is None else bid, math.nan if ask is None else ask,
+                   math.nan if timestamp is None else timestamp)
+
+    def on_ticker_update(self, symbol, exchange_id, ticker):
+        """
+        DataManager ticker listener for ingestion workers.
+        """
+        self.update(symbol, exchange_id, ticker.get('bid'), ticker.get('ask'), ticker.get('timestamp'))
+
+    def exclude_quote(self, symbol, exchange_id):
+        """
+        DataManager exclusion listener for ingestion workers: withdraws a
+        stale quote or one of an exchange whose circuit is open.
+        """
+        self.update(symbol, exchange_id, None, None)
+
+    def clear(self):
+        raise TypeError("SharedPriceMatrix cells are owned by their ingestion workers and cannot be cleared")
+
+    def load(self, all_market_data):
+        raise TypeError("SharedPriceMatrix is filled by its ingestion workers; "
+                        "call find_top_opportunities() without market data to read it in place")
+
+    def read(self, symbol, exchange_id):
+        """
+        Consistent (bid, ask, timestamp) of one cell, or None if it was still
+        being written after READ_RETRIES attempts, e.g. because its writer died
+        mid-write.
+        """
+        row, col = self.symbol_index[symbol], self.exchange_index[exchange_id]
+        for _ in range(READ_RETRIES):
+            before = int(self.seq[row, col])
+            value = (float(self.bids[row, col]), float(self.asks[row, col]), float(self.timestamps[row, col]))
+            if not before & 1 and int(self.seq[row, col]) == before:
+                return value
+        self.torn_reads += 1
+        return None
+
+    def top_opportunities(self, k, min_profit_percent):
+        """
+        PriceMatrix.top_opportunities on the live shared arrays. Opportunities
+        built from a cell that was written during the read are retried, and
+        dropped if they are still torn after READ_RETRIES attempts.
+        """
+        for _ in range(READ_RETRIES):
+            before = self.seq.copy()
+            opportunities = super().top_opportunities(k, min_profit_percent)
+            torn = [opp for opp in opportunities if not self._unchanged(before, opp)]
+            if not torn:
+                return opportunities
+            self.torn_reads += 1
+        return [opp for opp in opportunities if opp not in torn]
+
+    def _unchanged(self, before, opportunity):
+        row = self.symbol_index[opportunity['symbol']]
+        for ex_id in (opportunity['buy_exchange'], opportunity['sell_exchange']):
+            col = self.exchange_index[ex_id]
+            version = before[row, col]
+            if version & 1 or self.seq[row, col] != version:
+                return False
+        return True
+
+    def close(self):
+        """
+        Detaches from the block, and frees it if this process created it.
+        """
+        # Views must be released before the buffer can be closed
+        self.seq = self.versions = self.bids = self.asks = self.timestamps = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
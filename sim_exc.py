@@ -0,0 +1,176 @@
+"latency-modelled simulated order execution"
+
+import asyncio
+import itertools
+import math
+import random
+import time
+from config import (SIM_LATENCY_SECONDS, SIM_LATENCY_JITTER, SIM_FILL_PROBABILITY,
+                    SIM_PARTIAL_FILL_PROBABILITY, SIM_SLIPPAGE_PERCENT, SIM_VOLATILITY_PERCENT,
+                    SIM_STARTING_BALANCES)
+
+def apply_fill(balances, order):
+    """
+    Applies a filled order to a {currency: free amount} dict in place.
+    Orders without a fill or an average price leave the balances unchanged.
+    """
+    filled, average = order.get('filled') or 0.0, order.get('average')
+    if not filled or average is None:
+        return
+    base, quote = order['symbol'].split('/')
+    fee = (order.get('fee') or {}).get('cost') or 0.0
+    if order['side'] == 'buy':
+        balances[base] = balances.get(base, 0.0) + filled
+        balances[quote] = balances.get(quote, 0.0) - filled * average - fee
+    else:
+        balances[base] = balances.get(base, 0.0) - filled
+        balances[quote] = balances.get(quote, 0.0) + filled * average - fee
+
+class SimulatedExchange:
+    """
+    Simulates market order execution for ExchangeManager.
+
+    Each order waits a log-normally distributed latency, then is rejected,
+    partially filled or fully filled. The fill price is the reference price
+    moved against us by a random slippage plus a drift that grows with the
+    square root of the time since the trade started, so a leg that executes
+    later is exposed to more adverse price movement.
+
+    It also keeps a paper account per exchange: fills move its balances and
+    orders the account cannot cover are rejected, like a real exchange would.
+
+    Like on a real exchange, an order keeps going when its caller stops
+    waiting for it: a leg that timed out can still fill until cancel_order
+    reaches the exchange.
+    """
+    def __init__(self, latency=SIM_LATENCY_SECONDS, latency_jitter=SIM_LATENCY_JITTER,
+                 fill_probability=SIM_FILL_PROBABILITY, partial_fill_probability=SIM_PARTIAL_FILL_PROBABILITY,
+                 slippage_percent=SIM_SLIPPAGE_PERCENT, volatility_percent=SIM_VOLATILITY_PERCENT,
+                 exchange_latency=None, starting_balances=None, seed=None):
+        """
+        Args:
+            latency (float): Median order round-trip in seconds.
+            latency_jitter (float): Sigma of the log-normal latency distribution.
+            fill_probability (float): Chance an order is accepted at all.
+            partial_fill_probability (float): Chance an accepted order fills only partly.
+            slippage_percent (float): Mean adverse slippage per order.
+            volatility_percent (float): Price volatility per sqrt(second) of exposure.
+            exchange_latency (dict, optional): Per-exchange median latency overrides.
+            starting_balances (dict, optional): {currency: amount} each paper account starts
+                                                with. Defaults to SIM_STARTING_BALANCES.
+            seed (int, optional): Seed for reproducible runs.
+        """
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.fill_probability = fill_probability
+        self.partial_fill_probability = partial_fill_probability
+        self.slippage = slippage_percent / 100
+        self.volatility = volatility_percent / 100
+        self.exchange_latency = exchange_latency or {}
+        self.starting_balances = dict(SIM_STARTING_BALANCES if starting_balances is None else starting_balances)
+        self.accounts = {} # {exchange_id: {currency: free amount}}
+        self.orders = {} # {(exchange_id, client_order_id): task of an order its caller stopped waiting for}
+        self.rng = random.Random(seed)
+        self._ids = itertools.count(1)
+
+    def _account(self, exchange_id):
+        account = self.accounts.get(exchange_id)
+        if account is None:
+            account = self.accounts[exchange_id] = dict(self.starting_balances)
+        return account
+
+    async def _round_trip(self, exchange_id):
+        median = self.exchange_latency.get(exchange_id, self.latency)
+        await asyncio.sleep(median * math.exp(self.rng.gauss(0, self.latency_jitter)))
+
+    async def fetch_balance(self, exchange_id):
+        """
+        Returns the paper account of an exchange in ccxt's balance shape.
+        """
+        await self._round_trip(exchange_id)
+        account = self._account(exchange_id)
+        return {'free': dict(account), 'total': dict(account)}
+
+    async def create_market_order(self, exchange_id, symbol, side, amount, price=None, reference_time=None,
+                                  fee_percent=0.0, client_order_id=None):
+        """
+        Simulates one market order.
+
+        Args:
+            side (str): 'buy' or 'sell'.
+            price (float, optional): Reference price; without it no average price is
+                                     reported and the paper account is not checked.
+            reference_time (float, optional): perf_counter time the trade started.
+            fee_percent (float): Taker fee charged in the quote currency.
+            client_order_id (str, optional): Lets cancel_order find the order if the
+                                             caller stops waiting for it.
+
+        Returns:
+            dict: ccxt-shaped order with 'id', 'status', 'side', 'amount', 'filled', 'average', 'fee'.
+        """
+        order_id = f'sim_{side}_{exchange_id}_{next(self._ids)}'
+        processing = self._process_order(exchange_id, order_id, symbol, side, amount, price, reference_time, fee_percent)
+        if client_order_id is None:
+            return await processing
+        processing = asyncio.ensure_future(processing)
+        key = (exchange_id, client_order_id)
+        self.orders[key] = (processing, order_id, side, amount)
+        # Shielded: cancelling the caller leaves the order live on the exchange
+        order = await asyncio.shield(processing)
+        del self.orders[key]
+        return order
+
+    async def cancel_order(self, exchange_id, symbol, client_order_id):
+        """
+        Cancels an order its caller stopped waiting for. The cancel takes a
+        round-trip, so the order may fill before it lands.
+
+        Returns:
+            dict: The order as it ended, 'canceled' with nothing filled if the cancel
+                  arrived first, or None if no such order is pending.
+        """
+        await self._round_trip(exchange_id)
+        pending = self.orders.pop((exchange_id, client_order_id), None)
+        if pending is None:
+            return None
+        processing, order_id, side, amount = pending
+        if processing.done():
+            return processing.result() # Filled before the cancel landed
+        processing.cancel()
+        return {'id': order_id, 'status': 'canceled', 'side': side, 'symbol': symbol,
+                'amount': amount, 'filled': 0.0, 'average': None, 'fee': None}
+
+    async def _process_order(self, exchange_id, order_id, symbol, side, amount, price, reference_time, fee_percent):
+        rng = self.rng
+        await self._round_trip(exchange_id)
+
+        account = self._account(exchange_id)
+        base, quote = symbol.split('/')
+        if price is not None:
+            if side == 'buy':
+                insufficient = account.get(quote, 0.0) < amount * price * (1 + fee_percent / 100)
+            else:
+                insufficient = account.get(base, 0.0) < amount
+        else:
+            insufficient = False
+        if insufficient or rng.random() >= self.fill_probability:
+            return {'id': order_id, 'status': 'rejected', 'side': side, 'symbol': symbol,
+                    'amount': amount, 'filled': 0.0, 'average': None, 'fee': None}
+
+        filled = amount
+        if rng.random() < self.partial_fill_probability:
+            filled = amount * rng.uniform(0.1, 0.9)
+
+        average = None
+        if price is not None:
+            exposure = time.perf_counter() - reference_time if reference_time is not None else 0.0
+            adverse = rng.expovariate(1 / self.slippage) if self.slippage else 0.0
+            adverse += abs(rng.gauss(0, self.volatility * math.sqrt(max(exposure, 0.0))))
+            average = price * (1 + adverse) if side == 'buy' else price * (1 - adverse)
+        fee = None
+        if average is not None:
+            fee = {'cost': filled * average * fee_percent / 100, 'currency': quote}
+        order = {'id': order_id, 'status': 'closed' if filled == amount else 'canceled', 'side': side,
+                 'symbol': symbol, 'amount': amount, 'filled': filled, 'average': average, 'fee': fee}
+        apply_fill(account, order)
+        return order
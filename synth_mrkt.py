@@ -0,0 +1,66 @@
+"seeded synthetic market generator for benchmarks"
+
+import random
+
+class SyntheticMarket:
+    """
+    Generates tickers for a configurable symbol x exchange universe.
+
+    Each symbol has a fair price that follows a random walk with the given
+    volatility. Every exchange quotes around it with a small mean-reverting
+    offset, and with probability dislocation_rate a quote update jumps by
+    dislocation_percent, which is what opens arbitrage windows.
+    """
+    def __init__(self, n_symbols, n_exchanges, volatility=0.0005, dislocation_rate=0.01,
+                 dislocation_percent=1.0, spread_percent=0.04, seed=0):
+        self.rng = random.Random(seed)
+        self.symbols = [f'SYM{i}/USDT' for i in range(n_symbols)]
+        self.exchange_ids = [f'ex{i}' for i in range(n_exchanges)]
+        self.volatility = volatility
+        self.dislocation_rate = dislocation_rate
+        self.dislocation = dislocation_percent / 100
+        self.half_spread = spread_percent / 200
+        self.keys = [(symbol, ex_id) for symbol in self.symbols for ex_id in self.exchange_ids]
+        self.fair = {symbol: self.rng.uniform(0.1, 50000) for symbol in self.symbols}
+        self.offsets = {key: self.rng.gauss(0, volatility) for key in self.keys}
+        self.timestamp = 0
+
+    def _ticker(self, symbol, ex_id):
+        rng = self.rng
+        key = (symbol, ex_id)
+        offset = 0.9 * self.offsets[key] + rng.gauss(0, self.volatility)
+        if rng.random() < self.dislocation_rate:
+            offset += self.dislocation if rng.random() < 0.5 else -self.dislocation
+        self.offsets[key] = offset
+        mid = self.fair[symbol] * (1 + offset)
+        return {
+            'bid': mid * (1 - self.half_spread),
+            'ask': mid * (1 + self.half_spread),
+            'timestamp': self.timestamp,
+            'exchange_id': ex_id,
+            'symbol': symbol
+        }
+
+    def step(self):
+        """
+        Advances every fair price by one random-walk step.
+        """
+        self.timestamp += 1
+        for symbol in self.symbols:
+            self.fair[symbol] *= 1 + self.rng.gauss(0, self.volatility)
+
+    def market_data(self):
+        """
+        Returns a fresh {(symbol, exchange_id): ticker} snapshot shaped like DataManager.market_data.
+        """
+        return {(symbol, ex_id): self._ticker(symbol, ex_id) for symbol, ex_id in self.keys}
+
+    def ticks(self, count):
+        """
+        Yields count (symbol, exchange_id, ticker) updates for random keys.
+        """
+        for i in range(count):
+            if i % len(self.keys) == 0:
+                self.step()
+            symbol, ex_id = self.keys[self.rng.randrange(len(self.keys))]
+            yield symbol, ex_id, self._ticker(symbol, ex_id)
@@ -0,0 +1,121 @@
+"tests for cross-exchange opportunity detection"
+
+import asyncio
+import random
+import pytest
+from config import MIN_PROFIT_PERCENT
+from arb_fndr import ArbitrageFinder
+from price_mtrx import PriceMatrix
+from tkr_store import TickerStore
+
+def random_market(rng, n_symbols=20, n_exchanges=5, missing=0.1):
+    """
+    {(symbol, exchange_id): ticker} with quotes scattered around a mid per
+    symbol, some of them missing a side.
+    """
+    market = {}
+    for s in range(n_symbols):
+        mid = rng.uniform(1, 1000)
+        for e in range(n_exchanges):
+            price = mid * (1 + rng.gauss(0, 0.005))
+            bid, ask = price * 0.9995, price * 1.0005
+            market[f'S{s}/USDT', f'ex{e}'] = {
+                'bid': None if rng.random() < missing else bid,
+                'ask': None if rng.random() < missing else ask,
+                'timestamp': 0
+            }
+    return market
+
+def test_top_opportunity_matches_reference_implementation():
+    rng = random.Random(0)
+    for _ in range(50):
+        market = random_market(rng)
+        finder = ArbitrageFinder()
+        fees = {key: rng.choice([0.05, 0.1, 0.2]) for key in market if rng.random() < 0.3}
+        finder.set_fee_percents(fees)
+        best = finder.find_best_opportunity(market)
+        top = finder.find_top_opportunities(market, k=1)
+        if best is None:
+            assert top == []
+            continue
+        assert len(top) == 1
+        assert top[0]['net_profit_percent'] == pytest.approx(best['net_profit_percent'])
+        for field in ('symbol', 'buy_exchange', 'sell_exchange', 'buy_price', 'sell_price',
+                      'estimated_buy_fee_percent', 'estimated_sell_fee_percent'):
+            assert top[0][field] == best[field]
+
+def test_top_k_are_sorted_distinct_and_above_threshold():
+    market = random_market(random.Random(1), missing=0.0)
+    opportunities = ArbitrageFinder().find_top_opportunities(market, k=10)
+    assert 0 < len(opportunities) <= 10
+    profits = [opp['net_profit_percent'] for opp in opportunities]
+    assert profits == sorted(profits, reverse=True)
+    assert all(profit > MIN_PROFIT_PERCENT for profit in profits)
+    assert len({(opp['symbol'], opp['buy_exchange'], opp['sell_exchange']) for opp in opportunities}) == len(profits)
+    assert all(opp['buy_exchange'] != opp['sell_exchange'] for opp in opportunities)
+
+def test_ticker_store_loads_like_a_dict():
+    market = random_market(random.Random(2))
+    store = TickerStore()
+    for (symbol, ex_id), ticker in market.items():
+        store.record(symbol, ex_id, ticker['bid'], ticker['ask'], updated_at=0.0)
+    from_dict = ArbitrageFinder().find_top_opportunities(market, k=20)
+    from_store = ArbitrageFinder().find_top_opportunities(store, k=20)
+    assert from_store == from_dict
+
+def test_reload_forgets_previous_quotes():
+    finder = ArbitrageFinder()
+    assert finder.find_top_opportunities({('A/USDT', 'ex0'): {'bid': 99.0, 'ask': 100.0},
+                                          ('A/USDT', 'ex1'): {'bid': 105.0, 'ask': 106.0}})
+    assert finder.find_top_opportunities({('A/USDT', 'ex0'): {'bid': 99.0, 'ask': 100.0}}) == []
+
+def test_profit_tensor_never_pairs_an_exchange_with_itself():
+    matrix = PriceMatrix(fee_percent=0.0)
+    matrix.update('A/USDT', 'ex0', 101.0, 99.0) # Crossed book
+    matrix.update('A/USDT', 'ex1', 100.0, 100.5)
+    opportunities = matrix.top_opportunities(10, 0.0)
+    assert [(opp['buy_exchange'], opp['sell_exchange']) for opp in opportunities] == [('ex0', 'ex1'), ('ex1', 'ex0')]
+
+def test_incremental_evaluation_matches_full_scan():
+    rng = random.Random(3)
+    market = random_market(rng, n_symbols=3, n_exchanges=6, missing=0.0)
+    finder = ArbitrageFinder()
+    reference = ArbitrageFinder()
+    live = {}
+    for _ in range(3000):
+        key = rng.choice(list(market))
+        symbol = key[0]
+        if rng.random() < 0.1:
+            finder.exclude_quote(*key)
+            live.pop(key, None)
+        else:
+            ticker = market[key]
+            move = 1 + rng.gauss(0, 0.002)
+            ticker = {'bid': ticker['bid'] * move, 'ask': ticker['ask'] * move}
+            finder.on_ticker_update(symbol, key[1], ticker)
+            live[key] = ticker
+        expected = reference.find_best_opportunity({k: v for k, v in live.items() if k[0] == symbol})
+        actual = finder.symbol_opportunities.get(symbol)
+        if expected is None:
+            assert actual is None
+        else:
+            assert (actual['buy_exchange'], actual['sell_exchange']) == (expected['buy_exchange'],
+                                                                         expected['sell_exchange'])
+            assert actual['net_profit_percent'] == pytest.approx(expected['net_profit_percent'])
+
+def test_ticker_update_wakes_waiter_with_pending_opportunities():
+    async def main():
+        finder = ArbitrageFinder()
+        assert not await finder.wait_for_opportunity(timeout=0.01)
+        finder.on_ticker_update('A/USDT', 'ex0', {'bid': 99.0, 'ask': 100.0})
+        finder.on_ticker_update('A/USDT', 'ex1', {'bid': 105.0, 'ask': 106.0})
+        finder.on_ticker_update('B/USDT', 'ex0', {'bid': 99.0, 'ask': 100.0})
+        finder.on_ticker_update('B/USDT', 'ex1', {'bid': 102.0, 'ask': 103.0})
+        assert await finder.wait_for_opportunity(timeout=0.01)
+        opportunities = finder.pop_pending_opportunities()
+        assert [opp['symbol'] for opp in opportunities] == ['A/USDT', 'B/USDT']
+        assert not finder.opportunity_event.is_set()
+        assert finder.pop_pending_opportunities() == []
+        finder.on_ticker_update('A/USDT', 'ex1', {'bid': 99.5, 'ask': 100.5}) # Gone before it was consumed
+        assert 'A/USDT' not in finder.pending_symbols
+    asyncio.run(main())
@@ -0,0 +1,47 @@
+"tests for recording replays through the finder and executor"
+
+import asyncio
+import math
+import os
+import subprocess
+import sys
+from pathlib import Path
+from backtest import replay
+from tick_rec import TickRecorder
+
+def test_replay_runs_without_market_metadata_or_ccxt(tmp_path):
+    # A fresh interpreter shows whether the replay imports ccxt or logs missing markets
+    script = """
+import asyncio, sys
+from utils import Logger
+from backtest import record_synthetic, replay
+
+warnings = []
+Logger.setLevel('ERROR')
+Logger.warning = lambda msg, *args: warnings.append(msg % args)
+record_synthetic('rec', 3000, n_symbols=5, n_exchanges=3)
+stats = asyncio.run(replay('rec'))
+assert stats['ticks'] == 3000 and stats['trades'] > 0, stats
+assert not [w for w in warnings if 'markets' in w], warnings
+print('ccxt' in sys.modules)
+"""
+    result = subprocess.run([sys.executable, '-c', script], cwd=tmp_path, capture_output=True, text=True,
+                            env={**os.environ, 'PYTHONPATH': str(Path(__file__).parent)})
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == 'False'
+    assert not (tmp_path / '.markets_cache').exists()
+
+def test_standing_opportunity_is_counted_once(tmp_path):
+    path = str(tmp_path / 'rec')
+    recorder = TickRecorder(path)
+    recorder.record('A/USDT', 'ex0', 99.0, 100.0, recv_time=0.0)
+    recorder.record('A/USDT', 'ex1', 105.0, 106.0, recv_time=0.1)
+    for i in range(10): # The same dislocation, re-quoted
+        recorder.record('A/USDT', 'ex0', 99.0 + i / 100, 100.0 + i / 100, recv_time=0.2 + i / 10)
+    recorder.record('A/USDT', 'ex1', 99.5, 100.5, recv_time=2.0) # Closes
+    recorder.record('A/USDT', 'ex1', 105.0, 106.0, recv_time=2.1) # Reopens
+    recorder.close()
+    stats = asyncio.run(replay(path, cooldown=math.inf))
+    assert stats['ticks'] == 14
+    assert stats['opportunities'] == 2
+    assert stats['trades'] + stats['failed_trades'] == 1
@@ -0,0 +1,41 @@
+"tests for the seeded synthetic market and the benchmark regression check"
+
+import json
+import pytest
+from bench_suite import compare
+from synth_mrkt import SyntheticMarket
+
+def test_same_seed_generates_the_same_market():
+    first, second = SyntheticMarket(5, 3, seed=7), SyntheticMarket(5, 3, seed=7)
+    assert first.market_data() == second.market_data()
+    assert list(first.ticks(100)) == list(second.ticks(100))
+    assert SyntheticMarket(5, 3, seed=8).market_data() != SyntheticMarket(5, 3, seed=7).market_data()
+
+def test_snapshot_covers_every_key_with_valid_quotes():
+    market = SyntheticMarket(4, 3, spread_percent=0.04)
+    data = market.market_data()
+    assert sorted(data) == sorted(market.keys)
+    for (symbol, ex_id), ticker in data.items():
+        assert ticker['symbol'] == symbol and ticker['exchange_id'] == ex_id
+        assert ticker['ask'] / ticker['bid'] == pytest.approx(1.0002 / 0.9998)
+
+def test_dislocations_open_arbitrage_windows():
+    def crossed(market):
+        data = market.market_data()
+        # Windows wider than the random-walk noise, which alone stays well under 0.5%
+        return sum(max(data[symbol, ex]['bid'] for ex in market.exchange_ids) >
+                   1.005 * min(data[symbol, ex]['ask'] for ex in market.exchange_ids) for symbol in market.symbols)
+    assert crossed(SyntheticMarket(200, 5, dislocation_rate=0.0)) == 0
+    assert crossed(SyntheticMarket(200, 5, dislocation_rate=0.1)) > 0
+
+def write_baseline(tmp_path, p50_us):
+    path = tmp_path / 'baseline.json'
+    path.write_text(json.dumps({'results': [{'bench': 'find_best', 'symbols': 10, 'exchanges': 3,
+                                             'p50_us': p50_us}]}))
+    return str(path)
+
+def test_compare_flags_p50_regressions_past_threshold(tmp_path):
+    result = [{'bench': 'find_best', 'symbols': 10, 'exchanges': 3, 'p50_us': 125.0}]
+    assert compare(result, write_baseline(tmp_path, 100.0), 0.2)
+    assert not compare(result, write_baseline(tmp_path, 110.0), 0.2)
+    assert not compare([dict(result[0], symbols=100)], write_baseline(tmp_path, 1.0), 0.2)
@@ -0,0 +1,92 @@
+"tests for allocating capital across opportunities"
+
+import asyncio
+import pytest
+import main
+from cap_alloc import allocate_trades
+from trade_exec import DEFAULT_TRADE_AMOUNT_QUOTE
+
+def sized(symbol, buy_exchange, sell_exchange, amount, buy_price, buy_vwap, profit_per_unit, fee_percent=0.1):
+    return {
+        'symbol': symbol, 'buy_exchange': buy_exchange, 'sell_exchange': sell_exchange,
+        'buy_price': buy_price, 'buy_vwap': buy_vwap, 'sell_price': buy_price * 1.01,
+        'net_profit_percent': 1.0, 'estimated_buy_fee_percent': fee_percent, 'estimated_sell_fee_percent': fee_percent,
+        'trade_amount': amount, 'trade_amount_quote': amount * buy_vwap, 'expected_profit': amount * profit_per_unit
+    }
+
+def test_quote_spent_at_vwap_fits_balance():
+    opportunities = [sized('A/USDT', 'ex0', 'ex1', 10.0, 100.0, 105.0, 1.0),
+                     sized('B/USDT', 'ex0', 'ex1', 10.0, 100.0, 110.0, 0.5)]
+    balances = {('ex0', 'USDT'): 1500.0, ('ex1', 'A'): 100.0, ('ex1', 'B'): 100.0}
+    chosen = allocate_trades(opportunities, balances, max_trade_amount=10000.0, min_trade_amount=1.0)
+    spent = sum(opp['trade_amount'] * opp['buy_vwap'] * (1 + opp['estimated_buy_fee_percent'] / 100)
+                for opp in chosen)
+    assert spent == pytest.approx(1500.0)
+    assert chosen[0]['symbol'] == 'A/USDT' and chosen[0]['trade_amount'] == 10.0
+    assert chosen[1]['trade_amount_quote'] == pytest.approx(chosen[1]['trade_amount'] * 110.0)
+
+def test_base_balance_and_shared_books_limit_trades():
+    opportunities = [sized('A/USDT', 'ex0', 'ex1', 10.0, 100.0, 100.0, 1.0),
+                     sized('A/USDT', 'ex0', 'ex2', 10.0, 100.0, 100.0, 0.9)]
+    balances = {('ex0', 'USDT'): 1e6, ('ex1', 'A'): 4.0, ('ex2', 'A'): 100.0}
+    chosen = allocate_trades(opportunities, balances, max_trade_amount=10000.0, min_trade_amount=1.0)
+    # Both buy from the ex0 book, so only the better one runs, shrunk to the A held on ex1
+    assert [(opp['sell_exchange'], opp['trade_amount']) for opp in chosen] == [('ex1', 4.0)]
+    assert chosen[0]['expected_profit'] == pytest.approx(4.0)
+
+def test_trade_below_minimum_is_dropped():
+    opportunities = [sized('A/USDT', 'ex0', 'ex1', 10.0, 100.0, 100.0, 1.0)]
+    balances = {('ex0', 'USDT'): 5.0, ('ex1', 'A'): 100.0}
+    assert allocate_trades(opportunities, balances, max_trade_amount=10000.0, min_trade_amount=10.0) == []
+
+def test_return_pass_wins_when_capital_is_tight():
+    opportunities = [sized('A/USDT', 'ex0', 'ex1', 10.0, 100.0, 100.0, 0.5, fee_percent=0.0),
+                     sized('B/USDT', 'ex0', 'ex1', 5.0, 100.0, 100.0, 0.8, fee_percent=0.0),
+                     sized('C/USDT', 'ex0', 'ex1', 5.0, 100.0, 100.0, 0.8, fee_percent=0.0)]
+    balances = {('ex0', 'USDT'): 1000.0, ('ex1', 'A'): 100.0, ('ex1', 'B'): 100.0, ('ex1', 'C'): 100.0}
+    chosen = allocate_trades(opportunities, balances, max_trade_amount=10000.0, min_trade_amount=1.0)
+    assert sorted(opp['symbol'] for opp in chosen) == ['B/USDT', 'C/USDT']
+    assert sum(opp['expected_profit'] for opp in chosen) == pytest.approx(8.0)
+
+def test_each_trade_is_capped_at_max_amount():
+    opportunities = [sized('A/USDT', 'ex0', 'ex1', 10.0, 100.0, 100.0, 1.0, fee_percent=0.0)]
+    balances = {('ex0', 'USDT'): 1e6, ('ex1', 'A'): 100.0}
+    chosen, = allocate_trades(opportunities, balances, max_trade_amount=250.0, min_trade_amount=1.0)
+    assert chosen['trade_amount'] == pytest.approx(2.5)
+    assert chosen['trade_amount_quote'] == pytest.approx(250.0)
+
+def test_unsized_opportunity_gets_the_default_amount():
+    opportunity = {'symbol': 'A/USDT', 'buy_exchange': 'ex0', 'sell_exchange': 'ex1', 'buy_price': 50.0,
+                   'sell_price': 51.0, 'net_profit_percent': 1.0}
+    balances = {('ex0', 'USDT'): 1e6, ('ex1', 'A'): 1e6}
+    chosen, = allocate_trades([opportunity], balances, max_trade_amount=1e6, min_trade_amount=1.0)
+    assert chosen['trade_amount_quote'] == pytest.approx(DEFAULT_TRADE_AMOUNT_QUOTE)
+    assert chosen['expected_profit'] == pytest.approx(DEFAULT_TRADE_AMOUNT_QUOTE / 100)
+
+class RecordingExecutor:
+    def __init__(self):
+        self.executed = []
+
+    async def execute_arbitrage_trade(self, opportunity):
+        self.executed.append(opportunity)
+        return {'status': 'completed', 'profit': opportunity['expected_profit']}
+
+class BalanceStub:
+    def __init__(self, balances):
+        self.balances = balances
+        self.requested = None
+
+    async def fetch_balances(self, keys):
+        self.requested = set(keys)
+        return {key: self.balances.get(key, 0.0) for key in self.requested}
+
+def test_batch_execution_dispatches_every_allocated_trade(monkeypatch):
+    monkeypatch.setattr(main, 'BATCH_EXECUTION', True)
+    opportunities = [sized('A/USDT', 'ex0', 'ex1', 1.0, 100.0, 100.0, 1.0),
+                     sized('B/USDT', 'ex2', 'ex1', 1.0, 100.0, 100.0, 1.0)]
+    exchange_manager = BalanceStub({('ex0', 'USDT'): 1e6, ('ex2', 'USDT'): 1e6, ('ex1', 'A'): 1e6,
+                                    ('ex1', 'B'): 1e6})
+    executor = RecordingExecutor()
+    assert asyncio.run(main.execute_opportunities(opportunities, exchange_manager, executor)) == 2
+    assert exchange_manager.requested == {('ex0', 'USDT'), ('ex2', 'USDT'), ('ex1', 'A'), ('ex1', 'B')}
+    assert sorted(opp['symbol'] for opp in executor.executed) == ['A/USDT', 'B/USDT']
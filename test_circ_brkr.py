@@ -0,0 +1,71 @@
+"tests for the per-exchange circuit breaker"
+
+from circ_brkr import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+
+def make_breaker(clock):
+    return CircuitBreaker('ex0', failure_threshold=3, open_seconds=10.0, max_open_seconds=25.0, clock=clock)
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = make_breaker(clock)
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == CLOSED and not breaker.excluded
+    breaker.record_failure()
+    assert breaker.state == OPEN and breaker.excluded
+    assert not breaker.allow()
+    assert breaker.opened_count == 1
+
+def test_success_resets_failure_count(clock):
+    breaker = make_breaker(clock)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+def test_half_open_probe_closes_circuit(clock):
+    breaker = make_breaker(clock)
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now = 9.9
+    assert not breaker.available() and not breaker.allow()
+    clock.now = 10.0
+    assert breaker.available()
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN and breaker.excluded
+    assert not breaker.allow() # A single probe at a time
+    breaker.record_success()
+    assert breaker.state == CLOSED and not breaker.excluded
+    assert breaker.open_for == 10.0
+
+def test_failed_probe_doubles_wait_up_to_cap(clock):
+    breaker = make_breaker(clock)
+    for _ in range(3):
+        breaker.record_failure()
+    for expected in (20.0, 25.0, 25.0):
+        clock.now = breaker.retry_at
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == OPEN
+        assert breaker.open_for == expected
+        assert breaker.retry_at == clock.now + expected
+
+def test_late_success_does_not_close_open_circuit(clock):
+    breaker = make_breaker(clock)
+    for _ in range(3):
+        breaker.record_failure()
+    breaker.record_success() # Answer to a request sent before the circuit opened
+    assert breaker.state == OPEN
+
+def test_abandoned_probe_lets_next_request_probe(clock):
+    breaker = make_breaker(clock)
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now = 10.0
+    assert breaker.allow()
+    breaker.abandon()
+    assert breaker.state == OPEN
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
@@ -0,0 +1,62 @@
+"tests for triangular and cross-exchange cycle detection"
+
+import random
+import pytest
+from cycle_fndr import CycleFinder
+
+def triangle(eth_btc):
+    finder = CycleFinder(fee_percent=0.0)
+    finder.update_market('ex0', 'BTC/USDT', 30000.0, 30000.0)
+    finder.update_market('ex0', 'ETH/USDT', 2000.0, 2000.0)
+    finder.update_market('ex0', 'ETH/BTC', eth_btc, eth_btc)
+    return finder
+
+def test_finds_known_triangle():
+    cycles = triangle(0.066).find_cycles(min_profit_percent=0.5)
+    assert len(cycles) == 1
+    # USDT -> BTC -> ETH -> USDT: 30000 USDT buys 1 BTC, 15.15 ETH, 30303 USDT
+    assert cycles[0]['profit_percent'] == pytest.approx((2000 / 0.066 / 30000 - 1) * 100)
+    assert sorted(cycles[0]['legs']) == [('ex0', 'BTC/USDT', 'buy'), ('ex0', 'ETH/BTC', 'buy'),
+                                         ('ex0', 'ETH/USDT', 'sell')]
+
+def test_consistent_prices_have_no_cycle():
+    assert triangle(2000 / 30000).find_cycles(min_profit_percent=0.0) == []
+
+def test_cycle_below_threshold_is_not_reported_until_it_grows():
+    finder = triangle(0.0665)
+    assert finder.find_cycles(min_profit_percent=0.5) == []
+    finder.update_market('ex0', 'ETH/BTC', 0.066, 0.066)
+    assert len(finder.find_cycles(min_profit_percent=0.5)) == 1
+    finder.update_market('ex0', 'ETH/BTC', 2000 / 30000, 2000 / 30000)
+    assert finder.find_cycles(min_profit_percent=0.0) == []
+
+def test_fees_close_a_thin_cycle():
+    finder = triangle(0.066)
+    finder.set_fee_percents({(symbol, 'ex0'): 0.5 for symbol in ('BTC/USDT', 'ETH/USDT', 'ETH/BTC')})
+    assert finder.find_cycles(min_profit_percent=0.0) == []
+
+def test_cross_exchange_cycle_pays_transfers():
+    finder = CycleFinder(fee_percent=0.0, transfer_percent=0.1)
+    finder.update_market('ex0', 'BTC/USDT', 99.0, 100.0)
+    finder.update_market('ex1', 'BTC/USDT', 102.0, 103.0)
+    cycles = finder.find_cycles(min_profit_percent=0.0)
+    assert cycles[0]['profit_percent'] == pytest.approx((102 / 100 * 0.999 ** 2 - 1) * 100)
+    finder.exclude_quote('BTC/USDT', 'ex1')
+    assert finder.find_cycles(min_profit_percent=0.0) == []
+
+def test_incremental_runs_agree_with_a_fresh_graph():
+    rng = random.Random(0)
+    markets = [(f'ex{e}', symbol) for e in range(3) for symbol in ('BTC/USDT', 'ETH/USDT', 'ETH/BTC')]
+    mids = {'BTC/USDT': 30000.0, 'ETH/USDT': 2000.0, 'ETH/BTC': 2000 / 30000}
+    finder = CycleFinder()
+    quotes = {}
+    for step in range(300):
+        ex_id, symbol = rng.choice(markets)
+        mid = mids[symbol] * (1 + rng.gauss(0, 0.004))
+        quotes[ex_id, symbol] = (mid * 0.9999, mid * 1.0001)
+        finder.update_market(ex_id, symbol, *quotes[ex_id, symbol])
+        fresh = CycleFinder()
+        for (fresh_ex, fresh_symbol), (bid, ask) in quotes.items():
+            fresh.update_market(fresh_ex, fresh_symbol, bid, ask)
+        found, expected = finder.find_cycles(), fresh.find_cycles()
+        assert bool(found) == bool(expected), step
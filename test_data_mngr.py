@@ -0,0 +1,28 @@
+"tests for DataManager's ticker storage and polling helpers"
+
+import asyncio
+import pytest
+from config import DEFAULT_TAKER_FEE_PERCENT
+from data_mngr import DataManager
+
+def test_spread_percent_never_pairs_one_exchanges_bid_and_ask():
+    data_manager = DataManager(None, symbols=['BTC/USDT'], exchange_ids=['ex0', 'ex1'])
+    store = data_manager.market_data
+    store.record('BTC/USDT', 'ex0', 101.0, 99.0, None, 0.0, 0.0) # Crossed book
+    assert data_manager.spread_percent('BTC/USDT') is None
+    store.record('BTC/USDT', 'ex1', 100.0, 100.5, None, 0.0, 0.0)
+    fee = DEFAULT_TAKER_FEE_PERCENT / 100
+    cost, revenue = 99.0 * (1 + fee), 100.0 * (1 - fee) # Buy on ex0, sell on ex1
+    assert data_manager.spread_percent('BTC/USDT') == pytest.approx((revenue - cost) / cost * 100)
+
+def test_poller_stays_within_rate_limit(run_with_exchange):
+    async def test(server, exchange_manager):
+        data_manager = DataManager(exchange_manager, symbols=server.symbols, exchange_ids=['ex0'])
+        poller = asyncio.create_task(data_manager.fetch_all_tickers_periodically())
+        await asyncio.sleep(1.0)
+        poller.cancel()
+        await asyncio.gather(poller, return_exceptions=True)
+        assert sorted(symbol for symbol, _ in data_manager.market_data) == sorted(server.symbols)
+        assert server.request_count > len(server.symbols)
+        assert server.rejected_count == 0
+    run_with_exchange(test, batch=False, rate_limit=20)
@@ -0,0 +1,142 @@
+"tests for ExchangeManager against the local fake exchange"
+
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from collections import deque
+from pathlib import Path
+from config import HEDGE_MIN_SAMPLES, HEDGE_WINDOW
+from circ_brkr import CircuitBreaker, CLOSED
+
+def test_fetch_tickers_batches_into_one_request(run_with_exchange):
+    async def test(server, exchange_manager):
+        tickers = await exchange_manager.fetch_tickers('ex0', server.symbols)
+        assert sorted(tickers) == sorted(server.symbols)
+        assert tickers['ETH/USDT']['exchange_id'] == 'ex0'
+        assert tickers['ETH/USDT']['bid'] < tickers['ETH/USDT']['ask']
+        assert server.request_count == 1
+    run_with_exchange(test)
+
+def test_fetch_tickers_falls_back_to_concurrent_fetches(run_with_exchange):
+    async def test(server, exchange_manager):
+        tickers = await exchange_manager.fetch_tickers('ex0', server.symbols)
+        assert sorted(tickers) == sorted(server.symbols)
+        assert server.request_count == len(server.symbols)
+    run_with_exchange(test, batch=False)
+
+def test_pooled_session_reuses_connection(run_with_exchange):
+    async def test(server, exchange_manager):
+        for _ in range(5):
+            assert await exchange_manager.fetch_ticker('ex0', 'BTC/USDT')
+        assert server.request_count == 5
+        assert len(server.peers) == 1
+    run_with_exchange(test)
+
+def prime_hedging(exchange_manager, latency):
+    """
+    Fills the ticker latency window, so requests slower than latency get hedged.
+    """
+    exchange_manager.latencies['ex0', 'ticker'] = deque([latency] * HEDGE_MIN_SAMPLES, maxlen=HEDGE_WINDOW)
+
+def test_request_past_deadline_times_out(run_with_exchange):
+    async def test(server, exchange_manager):
+        exchange_manager.fetch_timeout = 0.2
+        exchange_manager.hedge_requests = False
+        server.down.add('ex0')
+        start = time.perf_counter()
+        assert await exchange_manager.fetch_ticker('ex0', 'BTC/USDT') is None
+        assert time.perf_counter() - start < 1.0
+        assert exchange_manager.fetch_stats['timeouts'] == 1
+        assert exchange_manager.breakers['ex0'].failures == 1
+    run_with_exchange(test, hang_seconds=5.0)
+
+def test_breaker_opens_on_timeouts_and_recovers_through_probe(run_with_exchange):
+    async def test(server, exchange_manager):
+        exchange_manager.fetch_timeout = 0.05
+        exchange_manager.hedge_requests = False
+        breaker = exchange_manager.breakers['ex0'] = CircuitBreaker('ex0', failure_threshold=2, open_seconds=0.2)
+        server.down.add('ex0')
+        for _ in range(2):
+            assert await exchange_manager.fetch_ticker('ex0', 'BTC/USDT') is None
+        assert exchange_manager.is_excluded('ex0')
+        requests = server.request_count
+        assert await exchange_manager.fetch_ticker('ex0', 'BTC/USDT') is None
+        assert server.request_count == requests # Refused without a round-trip
+        assert exchange_manager.fetch_stats['refused'] == 1
+        server.down.discard('ex0')
+        await asyncio.sleep(0.2)
+        assert exchange_manager.accepts_requests('ex0')
+        assert await exchange_manager.fetch_ticker('ex0', 'BTC/USDT')
+        assert breaker.state == CLOSED and not exchange_manager.is_excluded('ex0')
+    run_with_exchange(test, hang_seconds=5.0)
+
+def test_rate_limit_drains_bucket_without_opening_breaker(run_with_exchange):
+    async def test(server, exchange_manager):
+        exchange_manager.breakers['ex0'] = CircuitBreaker('ex0', failure_threshold=1)
+        for _ in range(3):
+            await exchange_manager.fetch_ticker('ex0', 'BTC/USDT')
+        assert server.rejected_count == 2
+        assert not exchange_manager.is_excluded('ex0')
+        assert exchange_manager.request_bucket('ex0').available() < 1.0
+    run_with_exchange(test, rate_limit=1)
+
+def test_hedge_wins_when_first_request_straggles(run_with_exchange):
+    async def test(server, exchange_manager):
+        prime_hedging(exchange_manager, 0.05)
+        server.down.add('ex0') # The first request hangs; the hedge arrives after recovery
+        asyncio.get_running_loop().call_later(0.02, server.down.discard, 'ex0')
+        start = time.perf_counter()
+        assert await exchange_manager.fetch_ticker('ex0', 'BTC/USDT')
+        assert time.perf_counter() - start < 1.0
+        assert exchange_manager.fetch_stats['hedged'] == 1
+        assert exchange_manager.fetch_stats['hedge_wins'] == 1
+    run_with_exchange(test, hang_seconds=5.0)
+
+def test_hedge_loses_when_first_request_answers_first(run_with_exchange):
+    async def test(server, exchange_manager):
+        prime_hedging(exchange_manager, 0.05)
+        assert await exchange_manager.fetch_ticker('ex0', 'BTC/USDT')
+        assert exchange_manager.fetch_stats['hedged'] == 1
+        assert exchange_manager.fetch_stats['hedge_wins'] == 0
+    run_with_exchange(test, latency=0.2)
+
+def test_hedge_skipped_without_rate_limit_token(run_with_exchange):
+    async def test(server, exchange_manager):
+        prime_hedging(exchange_manager, 0.05)
+        exchange_manager.request_bucket('ex0').drain()
+        assert await exchange_manager.fetch_ticker('ex0', 'BTC/USDT')
+        assert exchange_manager.fetch_stats['hedged'] == 0
+        assert exchange_manager.fetch_stats['hedges_skipped'] == 1
+        assert server.request_count == 1
+    run_with_exchange(test, latency=0.2)
+
+def test_failed_fetch_does_not_import_ccxt(tmp_path):
+    # A fresh interpreter, since the fake exchange of the other tests imports ccxt
+    script = """
+import asyncio, sys
+from exc_mngr import ExchangeManager
+
+class FailingClient:
+    has = {}
+    async def fetch_ticker(self, symbol):
+        raise ValueError('boom')
+    async def fetch_tickers(self, symbols):
+        raise ValueError('boom')
+    async def close(self):
+        pass
+
+async def main():
+    exchange_manager = ExchangeManager(['ex0'], clients={'ex0': FailingClient()}, markets_cache_dir=None)
+    assert await exchange_manager.fetch_ticker('ex0', 'BTC/USDT') is None
+    exchange_manager.exchanges['ex0'].has = {'fetchTickers': True}
+    assert await exchange_manager.fetch_tickers('ex0', ['BTC/USDT']) == {}
+
+asyncio.run(main())
+print('ccxt' in sys.modules)
+"""
+    result = subprocess.run([sys.executable, '-c', script], cwd=tmp_path, capture_output=True, text=True,
+                            env={**os.environ, 'PYTHONPATH': str(Path(__file__).parent)})
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == 'False'
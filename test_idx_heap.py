@@ -0,0 +1,41 @@
+"tests for the indexed binary heap"
+
+import random
+from idx_heap import IndexedHeap
+
+def test_smallest_two_track_updates_and_removals():
+    rng = random.Random(0)
+    heap = IndexedHeap()
+    reference = {}
+    for _ in range(2000):
+        key = f'ex{rng.randrange(12)}'
+        if rng.random() < 0.3:
+            heap.remove(key)
+            reference.pop(key, None)
+        else:
+            priority = rng.uniform(0, 100)
+            heap.push(key, priority)
+            reference[key] = priority
+        expected = sorted(reference.items(), key=lambda item: item[1])[:2]
+        assert heap.smallest_two() == expected
+        assert heap.peek() == (expected[0] if expected else None)
+        assert len(heap) == len(reference)
+
+def test_push_updates_existing_key():
+    heap = IndexedHeap()
+    heap.push('a', 5.0)
+    heap.push('b', 3.0)
+    heap.push('a', 1.0)
+    assert heap.smallest_two() == [('a', 1.0), ('b', 3.0)]
+    heap.push('a', 9.0)
+    assert heap.smallest_two() == [('b', 3.0), ('a', 9.0)]
+    assert len(heap) == 2
+
+def test_remove_missing_key_is_a_no_op():
+    heap = IndexedHeap()
+    heap.remove('a')
+    heap.push('a', 1.0)
+    heap.remove('b')
+    assert 'a' in heap and 'b' not in heap
+    heap.remove('a')
+    assert heap.smallest_two() == [] and heap.peek() is None
@@ -0,0 +1,74 @@
+"tests for the latency histograms and their Prometheus endpoint"
+
+import asyncio
+import random
+import socket
+import pytest
+from metrics import BUCKET_BOUNDS, LatencyMetrics, LogHistogram
+
+def test_quantiles_stay_within_bucket_precision():
+    rng = random.Random(0)
+    samples = sorted(rng.lognormvariate(-7, 1.5) for _ in range(10000))
+    histogram = LogHistogram()
+    for seconds in samples:
+        histogram.record(seconds)
+    for q in (0.5, 0.9, 0.99):
+        exact = samples[int(q * len(samples)) - 1]
+        assert exact <= histogram.quantile(q) <= exact * 1.13
+    assert histogram.quantile(1.0) == histogram.max == samples[-1]
+    assert histogram.total == pytest.approx(sum(samples))
+
+def test_every_value_lands_inside_its_bucket():
+    histogram = LogHistogram()
+    for seconds in (1e-6, 3e-5, 0.001, 0.0123, 0.5, 1.0, 7.0):
+        histogram.record(seconds)
+        index = max(i for i, c in enumerate(histogram.counts) if c)
+        assert (BUCKET_BOUNDS[index - 1] if index else 0.0) <= seconds < BUCKET_BOUNDS[index]
+
+def test_out_of_range_values_are_clamped():
+    histogram = LogHistogram()
+    for seconds in (0.0, 1e-12, 1e6):
+        histogram.record(seconds)
+    assert histogram.counts[0] == 2 and histogram.counts[-1] == 1
+
+def test_negative_durations_are_clamped_and_disabled_registry_records_nothing():
+    metrics = LatencyMetrics()
+    metrics.observe('fetch', 'ex0', -0.5)
+    assert metrics.histograms['fetch', 'ex0'].total == 0.0
+    disabled = LatencyMetrics(enabled=False)
+    disabled.observe('fetch', 'ex0', 0.1)
+    assert disabled.histograms == {}
+
+def test_prometheus_buckets_are_cumulative():
+    metrics = LatencyMetrics()
+    for seconds in (0.001, 0.002, 0.004):
+        metrics.observe('fetch', 'ex0', seconds)
+    lines = metrics.render_prometheus().splitlines()
+    counts = [int(line.rsplit(' ', 1)[1]) for line in lines if line.startswith('arb_stage_latency_seconds_bucket')]
+    assert counts == sorted(counts) and counts[-1] == 3
+    assert 'arb_stage_latency_seconds_bucket{stage="fetch",exchange="ex0",le="+Inf"} 3' in lines
+    assert 'arb_stage_latency_seconds_count{stage="fetch",exchange="ex0"} 3' in lines
+
+def test_endpoint_serves_current_metrics():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+
+    async def main():
+        metrics = LatencyMetrics()
+        metrics.observe('fetch', 'ex0', 0.01)
+        server = asyncio.create_task(metrics.serve('127.0.0.1', port))
+        await asyncio.sleep(0.05)
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(b'GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n')
+            response = await reader.read()
+            writer.close()
+        finally:
+            server.cancel()
+            await asyncio.gather(server, return_exceptions=True)
+        return response.decode()
+
+    response = asyncio.run(main())
+    assert response.startswith('HTTP/1.1 200 OK')
+    assert 'arb_stage_latency_seconds_count{stage="fetch",exchange="ex0"} 1' in response
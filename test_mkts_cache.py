@@ -0,0 +1,57 @@
+"tests for the on-disk markets cache and lazy imports"
+
+import asyncio
+import json
+import sys
+from fake_exc import FakeExchangeServer, make_clients
+from exc_mngr import ExchangeManager
+from mkts_cache import MarketsCache
+from utils import LazyModule
+
+MARKETS = {'BTC/USDT': {'symbol': 'BTC/USDT', 'precision': {'amount': 1e-5}, 'info': {'raw': 'payload'}}}
+
+def test_markets_round_trip_without_raw_payloads(tmp_path):
+    cache = MarketsCache(str(tmp_path / 'cache'), 'v1', max_age=60)
+    assert cache.load('ex0') is None
+    cache.save('ex0', MARKETS)
+    assert cache.load('ex0') == {'BTC/USDT': {'symbol': 'BTC/USDT', 'precision': {'amount': 1e-5}}}
+    assert not list((tmp_path / 'cache').glob('*.tmp'))
+
+def test_other_version_or_old_file_is_ignored(tmp_path):
+    MarketsCache(str(tmp_path), 'v1', max_age=60).save('ex0', MARKETS)
+    assert MarketsCache(str(tmp_path), 'v2', max_age=60).load('ex0') is None
+    assert MarketsCache(str(tmp_path), 'v1', max_age=-1).load('ex0') is None
+
+def test_unreadable_file_is_ignored(tmp_path):
+    (tmp_path / 'ex0.json').write_text('{"version": "v1", "mark')
+    assert MarketsCache(str(tmp_path), 'v1', max_age=60).load('ex0') is None
+
+def test_restart_serves_markets_from_disk_and_refreshes_them(tmp_path):
+    async def main():
+        server = FakeExchangeServer(['ex0'], ['BTC/USDT', 'ETH/USDT'])
+        await server.start()
+        try:
+            for run in range(2):
+                exchange_manager = ExchangeManager(['ex0'], clients=make_clients(server),
+                                                   markets_cache_dir=str(tmp_path))
+                markets = await exchange_manager.fetch_markets('ex0')
+                assert sorted(markets) == ['BTC/USDT', 'ETH/USDT']
+                if run:
+                    assert exchange_manager.markets_from_disk == {'ex0'}
+                    assert server.markets_requests == 1 # Answered before any download
+                    await asyncio.gather(*exchange_manager.background_tasks)
+                await exchange_manager.close()
+        finally:
+            await server.stop()
+        return server.markets_requests
+
+    assert asyncio.run(main()) == 2
+    stamp = json.loads((tmp_path / 'ex0.json').read_text())['version']
+    assert stamp.split('-ccxt')[1] != 'unknown'
+
+def test_lazy_module_imports_on_first_attribute():
+    sys.modules.pop('colorsys', None)
+    colorsys = LazyModule('colorsys')
+    assert 'colorsys' not in sys.modules
+    assert colorsys.rgb_to_hsv(1.0, 0.0, 0.0) == (0.0, 1.0, 1.0)
+    assert 'colorsys' in sys.modules
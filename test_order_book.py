@@ -0,0 +1,68 @@
+"tests for the compact order book and slippage-aware trade sizing"
+
+import random
+import pytest
+from order_book import OrderBook, size_trade
+
+def test_snapshot_is_sorted_best_first_and_truncated():
+    book = OrderBook(depth=3)
+    book.apply_snapshot([[99, 1], [101, 2], [100, 3], [98, 4]], [[103, 1], [102, 2]])
+    prices, sizes = book.bids.levels()
+    assert list(prices) == [101, 100, 99] and list(sizes) == [2, 3, 1]
+    assert list(book.asks.levels()[0]) == [102, 103]
+
+def test_deltas_match_a_reference_book():
+    rng = random.Random(0)
+    book = OrderBook(depth=5)
+    reference = {'bids': {}, 'asks': {}}
+    for _ in range(2000):
+        side = rng.choice(['bids', 'asks'])
+        price = float(rng.randint(90, 110))
+        size = rng.choice([0.0, rng.uniform(0.1, 5)])
+        book.apply_delta(side, price, size)
+        if size:
+            reference[side][price] = size
+        else:
+            reference[side].pop(price, None)
+        for name, descending in (('bids', True), ('asks', False)):
+            prices, sizes = getattr(book, name).levels()
+            levels = sorted(reference[name].items(), reverse=descending)
+            # Levels pushed past the depth are forgotten, so only the kept ones must agree
+            assert all(reference[name].get(p) == s for p, s in zip(prices, sizes))
+            assert list(prices) == sorted(prices, reverse=descending)
+            if len(prices) == len(levels):
+                assert [p for p, _ in levels] == list(prices)
+
+def books(asks, bids):
+    buy_book, sell_book = OrderBook(), OrderBook()
+    buy_book.apply_snapshot([], asks)
+    sell_book.apply_snapshot(bids, [])
+    return buy_book, sell_book
+
+def test_size_trade_walks_both_books_at_vwap():
+    buy_book, sell_book = books([[100, 1], [101, 1]], [[102, 1], [100.5, 1]])
+    trade = size_trade(buy_book, sell_book, 0.0, 0.0, 1.0, 1e9, 0.0)
+    assert trade['amount'] == pytest.approx(2.0)
+    assert trade['cost'] == pytest.approx(201.0)
+    assert trade['revenue'] == pytest.approx(202.5)
+    assert trade['buy_vwap'] == pytest.approx(100.5)
+    assert trade['sell_vwap'] == pytest.approx(101.25)
+    assert trade['expected_profit'] == pytest.approx(1.5)
+
+def test_size_trade_stops_where_profit_hits_the_threshold():
+    buy_book, sell_book = books([[100, 1], [101, 1]], [[102, 1], [100.5, 1]])
+    trade = size_trade(buy_book, sell_book, 0.0, 0.0, 1.0, 1e9, 1.0)
+    assert 1.0 < trade['amount'] < 2.0
+    assert trade['net_profit_percent'] == pytest.approx(1.0)
+
+def test_size_trade_respects_max_amount_and_fees():
+    buy_book, sell_book = books([[100, 10]], [[102, 10]])
+    trade = size_trade(buy_book, sell_book, 0.1, 0.1, 1.0, 250.0, 0.0)
+    assert trade['cost'] == pytest.approx(250.0)
+    assert trade['amount'] == pytest.approx(2.5)
+    assert trade['expected_profit'] == pytest.approx(255.0 * 0.999 - 250.0 * 1.001)
+
+def test_size_trade_refuses_unprofitable_or_too_small_trades():
+    assert size_trade(*books([[100, 1]], [[100.1, 1]]), 0.1, 0.1, 1.0, 1e9, 0.0) is None
+    assert size_trade(*books([[100, 0.005]], [[102, 1]]), 0.0, 0.0, 1.0, 1e9, 0.0) is None
+    assert size_trade(*books([], [[102, 1]]), 0.0, 0.0, 1.0, 1e9, 0.0) is None
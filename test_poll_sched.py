@@ -0,0 +1,59 @@
+"tests for the token bucket and the adaptive polling scheduler"
+
+from config import MIN_PROFIT_PERCENT
+from poll_sched import TokenBucket, PollScheduler
+
+def test_token_bucket_rejects_when_empty_and_refills(clock):
+    bucket = TokenBucket(rate=2.0, clock=clock)
+    assert bucket.try_acquire()
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+    assert bucket.delay() == 0.5
+    clock.now = 0.5
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+    clock.now = 10.0
+    assert bucket.available() == bucket.capacity
+
+def test_token_bucket_drain_empties_it(clock):
+    bucket = TokenBucket(rate=4.0, clock=clock)
+    bucket.drain()
+    assert not bucket.try_acquire()
+    clock.now = 0.25
+    assert bucket.try_acquire()
+
+def test_fake_exchange_rejects_requests_over_its_limit(run_with_exchange):
+    async def test(server, exchange_manager):
+        tickers = [await exchange_manager.fetch_ticker('ex0', 'BTC/USDT') for _ in range(4)]
+        assert all(tickers[:2])
+        assert tickers[2:] == [None, None]
+        assert server.rejected_count == 2
+    run_with_exchange(test, rate_limit=2)
+
+def test_scheduler_without_symbols_idles(clock):
+    scheduler = PollScheduler([], lambda symbol: None, min_interval=0.5, max_interval=5.0, clock=clock)
+    assert scheduler.due() == []
+    assert scheduler.due(spare=True) == []
+    assert scheduler.wait_time() == 5.0
+    assert scheduler.wait_time(spare=True) == 5.0
+
+def test_scheduler_polls_symbols_near_threshold_more_often(clock):
+    spreads = {'A/USDT': MIN_PROFIT_PERCENT, 'B/USDT': MIN_PROFIT_PERCENT - 10}
+    scheduler = PollScheduler(list(spreads), spreads.get, min_interval=0.5, max_interval=5.0, clock=clock)
+    assert scheduler.due() == ['A/USDT', 'B/USDT']
+    for symbol in spreads:
+        scheduler.mark_polled(symbol)
+    assert scheduler.wait_time() == 0.5
+    clock.now = 0.5
+    assert scheduler.due() == ['A/USDT']
+    clock.now = 5.0
+    assert scheduler.due() == ['A/USDT', 'B/USDT']
+
+def test_scheduler_polls_early_with_spare_budget(clock):
+    spreads = {'B/USDT': MIN_PROFIT_PERCENT - 10}
+    scheduler = PollScheduler(list(spreads), spreads.get, min_interval=0.5, max_interval=5.0, clock=clock)
+    scheduler.mark_polled('B/USDT')
+    clock.now = 0.5
+    assert scheduler.due() == []
+    assert scheduler.due(spare=True) == ['B/USDT']
+    assert scheduler.wait_time() == 4.5
@@ -0,0 +1,91 @@
+"tests for the shared-memory price matrix and its seqlocks"
+
+import asyncio
+import math
+from functools import partial
+import pytest
+from arb_fndr import ArbitrageFinder
+from data_mngr import DataManager
+from fake_exc import FakeExchangeServer, FakeExchangeClient
+from shard_ingest import ShardedIngestion, shard_exchanges
+from shm_mtrx import SharedPriceMatrix
+
+@pytest.fixture
+def matrix():
+    matrix = SharedPriceMatrix(['BTC/USDT', 'ETH/USDT'], ['ex0', 'ex1'], fee_percent=0.0)
+    yield matrix
+    matrix.close()
+
+def test_read_returns_written_cell(matrix):
+    matrix.update('BTC/USDT', 'ex1', 100.0, 100.5, 1700000000000)
+    assert matrix.read('BTC/USDT', 'ex1') == (100.0, 100.5, 1700000000000.0)
+
+def test_read_gives_up_on_cell_left_mid_write(matrix):
+    matrix.update('BTC/USDT', 'ex0', 100.0, 100.5)
+    matrix.seq[0, 0] += 1 # A writer that died between its two version bumps
+    assert matrix.read('BTC/USDT', 'ex0') is None
+    assert matrix.torn_reads == 1
+
+def test_finder_reads_shared_matrix_in_place(matrix):
+    matrix.update('BTC/USDT', 'ex0', 99.0, 99.5)
+    matrix.update('BTC/USDT', 'ex1', 101.0, 101.5)
+    finder = ArbitrageFinder(matrix)
+    opportunities = finder.find_top_opportunities()
+    assert [(opp['buy_exchange'], opp['sell_exchange']) for opp in opportunities] == [('ex0', 'ex1')]
+    with pytest.raises(TypeError):
+        finder.find_top_opportunities({('BTC/USDT', 'ex0'): {'bid': 99.0, 'ask': 99.5}})
+
+def test_expired_quote_leaves_shared_matrix(matrix):
+    async def main():
+        data_manager = DataManager(None, symbols=['BTC/USDT'], exchange_ids=['ex0'])
+        data_manager.add_ticker_listener(matrix.on_ticker_update)
+        data_manager.add_exclusion_listener(matrix.exclude_quote)
+        data_manager._store_ticker('BTC/USDT', 'ex0', {'bid': 100.0, 'ask': 100.5})
+        assert matrix.read('BTC/USDT', 'ex0')[:2] == (100.0, 100.5)
+        assert data_manager.expire_quotes(max_staleness_seconds=-1.0) == [('BTC/USDT', 'ex0')]
+    asyncio.run(main())
+    bid, ask, _ = matrix.read('BTC/USDT', 'ex0')
+    assert math.isnan(bid) and math.isnan(ask)
+
+def test_sharding_refuses_unsupported_features(monkeypatch):
+    import main
+    assert main.sharding_conflicts() == []
+    monkeypatch.setattr(main, 'CYCLE_DETECTION', True)
+    monkeypatch.setattr(main, 'RECORD_TICKS_PATH', 'recordings')
+    assert main.sharding_conflicts() == ['RECORD_TICKS_PATH', 'CYCLE_DETECTION']
+
+def test_exchanges_are_split_round_robin():
+    assert shard_exchanges(['a', 'b', 'c', 'd', 'e'], 2) == [['a', 'c', 'e'], ['b', 'd']]
+    assert shard_exchanges(['a', 'b'], 4) == [['a'], ['b']]
+
+def test_writes_bump_their_exchange_counter(matrix):
+    matrix.update('BTC/USDT', 'ex1', 100.0, 100.5)
+    matrix.update('ETH/USDT', 'ex1', 10.0, 10.5)
+    matrix.exclude_quote('ETH/USDT', 'ex1')
+    assert list(matrix.versions) == [0, 3]
+
+def fake_clients(url, shard):
+    return {ex_id: FakeExchangeClient(ex_id, url) for ex_id in shard}
+
+def test_worker_processes_fill_shared_matrix():
+    symbols, exchange_ids = ['BTC/USDT', 'ETH/USDT'], ['ex0', 'ex1']
+
+    async def main():
+        server = FakeExchangeServer(exchange_ids, symbols)
+        await server.start()
+        ingestion = ShardedIngestion(symbols, exchange_ids, 2, client_factory=partial(fake_clients, server.url),
+                                     streaming=False)
+        try:
+            ingestion.start()
+            assert ingestion.shards == [['ex0'], ['ex1']]
+            for _ in range(300):
+                if all(ingestion.matrix.versions):
+                    break
+                await asyncio.sleep(0.05)
+            return [ingestion.matrix.read(symbol, ex_id) for symbol in symbols for ex_id in exchange_ids]
+        finally:
+            ingestion.stop()
+            await server.stop()
+
+    for bid, ask, _ in asyncio.run(main()):
+        assert 0 < bid < ask
@@ -0,0 +1,70 @@
+"tests for simulated order execution and paper accounts"
+
+import asyncio
+import pytest
+from sim_exc import SimulatedExchange, apply_fill
+
+def exact_simulator(**kwargs):
+    """
+    A simulator that fills every order in full at the reference price.
+    """
+    return SimulatedExchange(**{'latency': 0.001, 'latency_jitter': 0.0, 'fill_probability': 1.0,
+                                'partial_fill_probability': 0.0, 'slippage_percent': 0.0,
+                                'volatility_percent': 0.0, 'starting_balances': {'USDT': 1000.0, 'BTC': 1.0},
+                                'seed': 0, **kwargs})
+
+def test_fills_move_the_paper_account_and_charge_fees():
+    async def main():
+        simulator = exact_simulator()
+        order = await simulator.create_market_order('ex0', 'BTC/USDT', 'buy', 2.0, price=100.0, fee_percent=0.1)
+        assert (order['status'], order['filled'], order['average']) == ('closed', 2.0, 100.0)
+        assert order['fee'] == {'cost': pytest.approx(0.2), 'currency': 'USDT'}
+        balance = await simulator.fetch_balance('ex0')
+        assert balance['free'] == {'USDT': pytest.approx(799.8), 'BTC': 3.0}
+        assert (await simulator.fetch_balance('ex1'))['free'] == {'USDT': 1000.0, 'BTC': 1.0}
+    asyncio.run(main())
+
+def test_orders_the_account_cannot_cover_are_rejected():
+    async def main():
+        simulator = exact_simulator()
+        buy = await simulator.create_market_order('ex0', 'BTC/USDT', 'buy', 10.0, price=100.0, fee_percent=0.1)
+        sell = await simulator.create_market_order('ex0', 'BTC/USDT', 'sell', 1.5, price=100.0)
+        assert buy['status'] == sell['status'] == 'rejected'
+        assert simulator.accounts['ex0'] == {'USDT': 1000.0, 'BTC': 1.0}
+    asyncio.run(main())
+
+def test_cancel_that_lands_first_leaves_nothing_filled():
+    async def main():
+        simulator = exact_simulator(exchange_latency={'ex0': 0.2})
+        order = asyncio.create_task(simulator.create_market_order('ex0', 'BTC/USDT', 'buy', 1.0, price=100.0,
+                                                                  client_order_id='a'))
+        await asyncio.sleep(0.01)
+        order.cancel() # The caller stops waiting...
+        simulator.exchange_latency['ex0'] = 0.01 # ...and its cancel overtakes the order
+        cancelled = await simulator.cancel_order('ex0', 'BTC/USDT', 'a')
+        assert (cancelled['status'], cancelled['filled']) == ('canceled', 0.0)
+        await asyncio.sleep(0.3)
+        assert (await simulator.fetch_balance('ex0'))['free'] == {'USDT': 1000.0, 'BTC': 1.0}
+    asyncio.run(main())
+
+def test_order_abandoned_by_its_caller_can_still_fill():
+    async def main():
+        simulator = exact_simulator(exchange_latency={'ex0': 0.05})
+        order = asyncio.create_task(simulator.create_market_order('ex0', 'BTC/USDT', 'buy', 1.0, price=100.0,
+                                                                  client_order_id='a'))
+        await asyncio.sleep(0.01)
+        order.cancel()
+        late = await simulator.cancel_order('ex0', 'BTC/USDT', 'a') # Lands after the fill
+        assert (late['status'], late['filled']) == ('closed', 1.0)
+        assert simulator.accounts['ex0']['BTC'] == 2.0
+        assert await simulator.cancel_order('ex0', 'BTC/USDT', 'a') is None
+    asyncio.run(main())
+
+def test_apply_fill_ignores_orders_without_a_fill():
+    balances = {'USDT': 10.0}
+    apply_fill(balances, {'symbol': 'BTC/USDT', 'side': 'buy', 'filled': 0.0, 'average': 5.0})
+    apply_fill(balances, {'symbol': 'BTC/USDT', 'side': 'buy', 'filled': 1.0, 'average': None})
+    assert balances == {'USDT': 10.0}
+    apply_fill(balances, {'symbol': 'BTC/USDT', 'side': 'sell', 'filled': 1.0, 'average': 5.0,
+                          'fee': {'cost': 0.5}})
+    assert balances == {'USDT': 14.5, 'BTC': -1.0}
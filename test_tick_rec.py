@@ -0,0 +1,60 @@
+"tests for the columnar tick recorder and its memory-mapped reader"
+
+import math
+import os
+import numpy as np
+from tick_rec import TickRecorder, TickReader
+
+def read_all(path, chunk_size=65536):
+    reader = TickReader(path)
+    rows = []
+    for chunk in reader.iter_chunks(chunk_size):
+        for i in range(len(chunk['bid'])):
+            rows.append((reader.symbols[chunk['symbol_id'][i]], reader.exchanges[chunk['exchange_id'][i]],
+                         float(chunk['bid'][i]), float(chunk['ask'][i]), int(chunk['timestamp'][i]),
+                         float(chunk['recv_time'][i])))
+    return rows
+
+def test_round_trip_across_chunks(tmp_path):
+    path = str(tmp_path / 'rec')
+    recorder = TickRecorder(path, chunk_size=7, flush_interval=math.inf)
+    expected = []
+    for i in range(50):
+        row = (f'S{i % 3}/USDT', f'ex{i % 2}', 100.0 + i, 101.0 + i, 1000 + i, 5.0 + i)
+        recorder.record(*row[:4], timestamp=row[4], recv_time=row[5])
+        expected.append(row)
+    recorder.close()
+    assert len(TickReader(path)) == 50
+    assert read_all(path, chunk_size=16) == expected
+
+def test_missing_values_are_recorded_as_sentinels(tmp_path):
+    path = str(tmp_path / 'rec')
+    recorder = TickRecorder(path)
+    recorder.on_ticker_update('A/USDT', 'ex0', {'bid': None, 'ask': 2.0})
+    recorder.close()
+    (_, _, bid, ask, timestamp, _), = read_all(path)
+    assert math.isnan(bid) and ask == 2.0 and timestamp == -1
+
+def test_reopened_recording_appends_with_the_same_ids(tmp_path):
+    path = str(tmp_path / 'rec')
+    for ex_id in ('ex0', 'ex1'):
+        recorder = TickRecorder(path)
+        recorder.record('A/USDT', ex_id, 1.0, 2.0, recv_time=0.0)
+        recorder.record('B/USDT', ex_id, 3.0, 4.0, recv_time=0.0)
+        recorder.close()
+    assert [row[:2] for row in read_all(path)] == [('A/USDT', 'ex0'), ('B/USDT', 'ex0'),
+                                                  ('A/USDT', 'ex1'), ('B/USDT', 'ex1')]
+    assert TickReader(path).symbols == ['A/USDT', 'B/USDT']
+
+def test_partially_written_row_is_ignored_and_overwritten(tmp_path):
+    path = str(tmp_path / 'rec')
+    recorder = TickRecorder(path)
+    recorder.record('A/USDT', 'ex0', 1.0, 2.0, recv_time=0.0)
+    recorder.close()
+    with open(os.path.join(path, 'bid.bin'), 'ab') as f: # A crash between two column writes
+        f.write(np.float64(9.0).tobytes())
+    assert len(TickReader(path)) == 1
+    recorder = TickRecorder(path)
+    recorder.record('A/USDT', 'ex0', 3.0, 4.0, recv_time=1.0)
+    recorder.close()
+    assert [row[2:4] for row in read_all(path)] == [(1.0, 2.0), (3.0, 4.0)]
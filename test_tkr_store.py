@@ -0,0 +1,75 @@
+"tests for the interned ticker store and its mapping interface"
+
+import asyncio
+import random
+import numpy as np
+import pytest
+from tkr_store import TickerStore
+from data_mngr import DataManager
+
+def test_mapping_write_is_stamped_and_not_stale():
+    async def main():
+        data_manager = DataManager(None, symbols=['BTC/USDT'], exchange_ids=['ex0'])
+        data_manager.market_data['BTC/USDT', 'ex0'] = {'bid': 100.0, 'ask': 100.1}
+        assert not data_manager.is_data_stale('BTC/USDT', 'ex0')
+        assert data_manager.expire_quotes() == []
+        assert ('BTC/USDT', 'ex0') in data_manager.market_data
+    asyncio.run(main())
+
+def test_deleted_pair_starts_a_new_history():
+    store = TickerStore(['BTC/USDT'], ['ex0', 'ex1'])
+    for price in (100.0, 101.0, 102.0):
+        store.record('BTC/USDT', 'ex0', price, price + 0.1, updated_at=1.0)
+        store.record('BTC/USDT', 'ex1', price, price + 0.1, updated_at=1.0)
+    del store['BTC/USDT', 'ex0']
+    bids, _, counts = store.history()
+    assert counts[0, 0] == 0 and counts[0, 1] == 3
+    store['BTC/USDT', 'ex0'] = {'bid': 50.0, 'ask': 50.1}
+    bids, _, counts = store.history()
+    assert counts[0, 0] == 1
+    assert bids[0, 0, 0] == 50.0
+    _, _, _, samples = store.spread_stats()
+    assert samples[0, 0, 1] == 0 # No window left to compare the new quote against
+
+def test_mapping_matches_a_dict_while_growing():
+    rng = random.Random(0)
+    store = TickerStore()
+    reference = {}
+    for _ in range(2000):
+        key = (f'S{rng.randrange(20)}/USDT', f'ex{rng.randrange(9)}')
+        if rng.random() < 0.2 and key in reference:
+            del store[key], reference[key]
+        else:
+            bid = rng.choice([None, rng.uniform(1, 100)])
+            store.record(*key, bid, 101.0, timestamp=5, received_at=6.0, updated_at=7.0)
+            reference[key] = {'symbol': key[0], 'exchange_id': key[1], 'bid': bid, 'ask': 101.0,
+                              'timestamp': 5.0, 'received_at': 6.0}
+    assert len(store) == len(reference)
+    assert sorted(store) == sorted(reference)
+    assert dict(store.items()) == reference
+    assert ('S0/USDT', 'nowhere') not in store
+    with pytest.raises(KeyError):
+        store['S0/USDT', 'nowhere']
+
+def test_history_ring_keeps_the_latest_samples_first():
+    store = TickerStore(['A/USDT'], ['ex0'], history_size=3)
+    for price in range(1, 6):
+        store.record('A/USDT', 'ex0', float(price), price + 0.5, updated_at=0.0)
+    bids, asks, counts = store.history()
+    assert list(bids[0, 0]) == [5.0, 4.0, 3.0]
+    assert list(asks[0, 0]) == [5.5, 4.5, 3.5]
+    assert counts[0, 0] == 3
+
+def test_spread_stats_score_the_latest_spread_against_the_window():
+    store = TickerStore(['A/USDT'], ['ex0', 'ex1'], history_size=4)
+    for sell_bid in (101.0, 102.0, 103.0, 110.0):
+        store.record('A/USDT', 'ex0', 99.0, 100.0, updated_at=0.0)
+        store.record('A/USDT', 'ex1', sell_bid, sell_bid + 1, updated_at=0.0)
+    mean, std, zscore, samples = store.spread_stats()
+    window = np.array([3.0, 2.0, 1.0]) # Earlier ex0 -> ex1 spreads in percent, latest first
+    assert samples[0, 0, 1] == 3
+    assert mean[0, 0, 1] == pytest.approx(window.mean())
+    assert std[0, 0, 1] == pytest.approx(window.std())
+    assert zscore[0, 0, 1] == pytest.approx((10.0 - window.mean()) / window.std())
+    rows, buys, sells = np.array([0]), np.array([0]), np.array([1])
+    assert store.spread_stats((rows, buys, sells))[2][0] == pytest.approx(zscore[0, 0, 1])
@@ -0,0 +1,87 @@
+"tests for leg deadlines and unwinding in the trade executor"
+
+import asyncio
+import pytest
+from config import UNWIND_ATTEMPTS
+from trade_exec import TradeExecutor
+
+OPPORTUNITY = {'symbol': 'BTC/USDT', 'buy_exchange': 'ex0', 'sell_exchange': 'ex1', 'buy_price': 100.0,
+               'sell_price': 101.0, 'net_profit_percent': 1.0, 'trade_amount': 1.0, 'trade_amount_quote': 100.0}
+
+class ScriptedExchangeManager:
+    """
+    ExchangeManager stand-in whose orders answer from per-(side, exchange) scripts.
+    A script entry is (delay, filled, average); a delay past the leg timeout makes
+    the leg time out, after which the next 'cancel' entry says what filled.
+    """
+    def __init__(self, scripts):
+        self.scripts = {key: list(entries) for key, entries in scripts.items()}
+        self.orders = []
+
+    async def fetch_balance(self, exchange_id, currency):
+        return 1e12
+
+    async def normalize_amount(self, exchange_id, symbol, amount, price):
+        return amount
+
+    def _order(self, key, amount):
+        delay, filled, average = self.scripts[key].pop(0)
+        self.orders.append((key, amount))
+        status = 'rejected' if filled is None else 'closed' if filled >= amount else 'canceled'
+        return delay, {'id': f'{key[0]}_{key[1]}', 'status': status, 'amount': amount,
+                       'filled': 0.0 if filled is None else min(filled, amount), 'average': average}
+
+    async def _create(self, side, exchange_id, amount):
+        delay, order = self._order((side, exchange_id), amount)
+        await asyncio.sleep(delay)
+        return order
+
+    async def create_market_buy_order(self, exchange_id, symbol, amount, price=None, reference_time=None,
+                                      client_order_id=None):
+        return await self._create('buy', exchange_id, amount)
+
+    async def create_market_sell_order(self, exchange_id, symbol, amount, price=None, reference_time=None,
+                                       client_order_id=None):
+        return await self._create('sell', exchange_id, amount)
+
+    async def cancel_order(self, exchange_id, symbol, client_order_id):
+        return self._order(('cancel', exchange_id), self.orders[-1][1])[1]
+
+def execute(scripts):
+    exchange_manager = ScriptedExchangeManager(scripts)
+    executor = TradeExecutor(exchange_manager, concurrent=False, leg_timeout=0.05)
+    return asyncio.run(executor.execute_arbitrage_trade(dict(OPPORTUNITY))), exchange_manager
+
+def test_filled_legs_complete_at_their_averages():
+    result, _ = execute({('buy', 'ex0'): [(0, 1.0, 100.0)], ('sell', 'ex1'): [(0, 1.0, 101.0)]})
+    assert result['status'] == 'completed'
+    assert result['profit'] == pytest.approx(1.0)
+    assert result['filled_amount'] == 1.0
+
+def test_rejected_sell_leg_is_unwound_on_the_buy_exchange():
+    result, exchange_manager = execute({('buy', 'ex0'): [(0, 1.0, 100.0)], ('sell', 'ex1'): [(0, None, None)],
+                                        ('sell', 'ex0'): [(0, 1.0, 99.5)]})
+    assert result['status'] == 'unwound'
+    assert result['unwind_cost'] == pytest.approx(0.5)
+    assert result['profit'] == pytest.approx(-0.5)
+    assert result['open_amount'] == 0.0
+    assert exchange_manager.orders[-1] == (('sell', 'ex0'), 1.0)
+
+def test_timed_out_leg_counts_what_filled_before_the_cancel():
+    result, exchange_manager = execute({('buy', 'ex0'): [(0, 1.0, 100.0)], ('sell', 'ex1'): [(1.0, 1.0, 101.0)],
+                                        ('cancel', 'ex1'): [(0, 0.4, 101.0)], ('sell', 'ex0'): [(0, 0.6, 100.0)]})
+    assert result['status'] == 'unwound'
+    assert result['filled_amount'] == pytest.approx(0.4)
+    assert exchange_manager.orders[-1] == (('sell', 'ex0'), pytest.approx(0.6))
+
+def test_failed_unwind_leaves_the_trade_exposed():
+    result, exchange_manager = execute({('buy', 'ex0'): [(0, 1.0, 100.0)], ('sell', 'ex1'): [(0, None, None)],
+                                        ('sell', 'ex0'): [(0, None, None)] * UNWIND_ATTEMPTS})
+    assert result['status'] == 'exposed'
+    assert result['open_amount'] == pytest.approx(1.0)
+
+def test_nothing_is_sold_when_the_buy_leg_fails():
+    result, exchange_manager = execute({('buy', 'ex0'): [(0, None, None)]})
+    assert result['status'] == 'failed'
+    assert result['profit'] == 0.0
+    assert [key for key, _ in exchange_manager.orders] == [('buy', 'ex0')]
@@ -0,0 +1,49 @@
+"tests for the background trade journal"
+
+import json
+import threading
+import pytest
+from trd_jrnl import TradeJournal
+
+def read_entries(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+def test_entries_round_trip_in_order(tmp_path):
+    path = str(tmp_path / 'journal' / 'trades.jsonl')
+    journal = TradeJournal(path)
+    entry = {'symbol': 'BTC/USDT', 'profit': 1.5}
+    journal.record('opportunity', entry)
+    entry['profit'] = 99.0 # The journal keeps its own copy
+    for i in range(100):
+        journal.record('trade', {'n': i})
+    journal.close()
+    entries = read_entries(path)
+    assert len(entries) == journal.written == journal.recorded == 101
+    assert entries[0]['kind'] == 'opportunity' and entries[0]['profit'] == 1.5
+    assert [entry['n'] for entry in entries[1:]] == list(range(100))
+    assert all(isinstance(entry['time'], float) for entry in entries)
+
+def test_reopened_journal_appends(tmp_path):
+    path = str(tmp_path / 'trades.jsonl')
+    for i in range(2):
+        journal = TradeJournal(path)
+        journal.record('trade', {'n': i})
+        journal.close()
+    assert [entry['n'] for entry in read_entries(path)] == [0, 1]
+
+def test_full_queue_drops_instead_of_blocking(tmp_path, monkeypatch):
+    release = threading.Event()
+    write = TradeJournal._write
+    monkeypatch.setattr(TradeJournal, '_write', lambda self, batch: (release.wait(), write(self, batch)))
+    journal = TradeJournal(str(tmp_path / 'trades.jsonl'), max_pending=2, batch_size=1, policy='drop')
+    results = [journal.record('trade', {'n': i}) for i in range(10)]
+    assert not all(results)
+    assert journal.dropped == results.count(False)
+    release.set()
+    journal.close()
+    assert journal.written == journal.recorded == results.count(True)
+
+def test_unknown_policy_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        TradeJournal(str(tmp_path / 'trades.jsonl'), policy='retry')
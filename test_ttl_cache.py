@@ -0,0 +1,92 @@
+"tests for the TTL/LRU cache and its request coalescing"
+
+import asyncio
+import pytest
+from ttl_cache import TTLCache
+
+def test_entries_expire_after_ttl(clock):
+    cache = TTLCache(ttl=5.0, clock=clock)
+    cache.set('a', 1)
+    cache.set('b', 2, ttl=10.0)
+    clock.now = 5.0
+    assert cache.get('a') is None
+    assert 'a' not in cache
+    assert cache.get('b') == 2
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert 'a' in cache and 'c' in cache
+    assert 'b' not in cache
+
+def test_concurrent_misses_share_one_fetch():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return 'value'
+
+    async def main():
+        cache = TTLCache()
+        results = await asyncio.gather(*(cache.get_or_fetch('key', fetch) for _ in range(10)))
+        assert results == ['value'] * 10
+        assert await cache.get_or_fetch('key', fetch) == 'value'
+        return cache
+
+    cache = asyncio.run(main())
+    assert len(calls) == 1
+    assert (cache.misses, cache.coalesced, cache.hits) == (1, 9, 1)
+
+def test_failed_fetch_reaches_every_waiter_and_is_not_cached():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError('down')
+
+    async def main():
+        cache = TTLCache()
+        results = await asyncio.gather(*(cache.get_or_fetch('key', fetch) for _ in range(3)),
+                                       return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        assert 'key' not in cache
+        with pytest.raises(ValueError):
+            await cache.get_or_fetch('key', fetch)
+
+    asyncio.run(main())
+    assert len(calls) == 2
+
+def test_exchange_markets_are_loaded_once_for_concurrent_callers(run_with_exchange):
+    async def test(server, exchange_manager):
+        results = await asyncio.gather(*(exchange_manager.fetch_markets('ex0') for _ in range(5)))
+        assert all(sorted(markets) == sorted(server.symbols) for markets in results)
+        await exchange_manager.fetch_markets('ex0')
+        assert server.markets_requests == 1
+    run_with_exchange(test, latency=0.01)
+
+def test_cancelled_fetch_is_retried_by_waiter():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    async def main():
+        cache = TTLCache()
+        first = asyncio.create_task(cache.get_or_fetch('key', fetch))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(cache.get_or_fetch('key', fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await second == 2
+        assert first.cancelled()
+        assert cache.get('key') == 2
+
+    asyncio.run(main())
+    assert len(calls) == 2
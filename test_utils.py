@@ -0,0 +1,36 @@
+"tests for the deferred log handler"
+
+import logging
+import queue
+from utils import DeferredQueueHandler
+
+def make_logger(name):
+    records = queue.SimpleQueue()
+    logger = logging.getLogger(name)
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(DeferredQueueHandler(records))
+    return logger, records
+
+def test_message_is_rendered_before_the_caller_moves_on():
+    logger, records = make_logger('test_utils.render')
+    prices = [100.0]
+    logger.info("prices %s", prices)
+    prices.append(101.0)
+    record = records.get_nowait()
+    assert record.msg == 'prices [100.0]' and record.args is None
+
+def test_records_below_level_are_never_queued():
+    logger, records = make_logger('test_utils.level')
+    logger.debug("hidden %s", 1)
+    assert records.empty()
+
+def test_tracebacks_are_rendered_to_text():
+    logger, records = make_logger('test_utils.exc')
+    try:
+        raise ValueError('boom')
+    except ValueError:
+        logger.exception("failed")
+    record = records.get_nowait()
+    assert record.exc_info is None
+    assert 'ValueError: boom' in record.exc_text
@@ -0,0 +1,51 @@
+"tests for the websocket ticker stream against the local replay server"
+
+import asyncio
+from replay_ws import ReplayStreamServer, synthetic_ticks
+from ws_feed import TickerStream
+
+SYMBOLS = ['BTC/USDT', 'ETH/USDT']
+
+def run_stream(seconds, **server_args):
+    """
+    Streams ex0's synthetic ticks for the given time and returns (stream, server, updates).
+    """
+    async def main():
+        server = ReplayStreamServer(synthetic_ticks(['ex0'], SYMBOLS, 100), **server_args)
+        await server.start()
+        updates = []
+        stream = TickerStream('ex0', server.url_for('ex0'), SYMBOLS,
+                              lambda symbol, ex_id, ticker: updates.append((symbol, ex_id, ticker)))
+        task = asyncio.create_task(stream.run())
+        try:
+            await asyncio.sleep(seconds)
+            healthy = stream.is_healthy()
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            await server.stop()
+        return stream, server, updates, healthy
+    return asyncio.run(main())
+
+def test_stream_forwards_every_message():
+    stream, server, updates, _ = run_stream(0.3, loop_forever=False)
+    assert len(updates) == server.messages_sent == 100
+    symbol, ex_id, ticker = updates[0]
+    assert symbol in SYMBOLS and ex_id == 'ex0'
+    assert ticker['bid'] < ticker['ask']
+    assert stream.gap_count == 0 and stream.last_seq == 100
+
+def test_stream_is_healthy_while_messages_arrive():
+    stream, _, updates, healthy = run_stream(0.3, rate=100)
+    assert updates and healthy
+
+def test_sequence_gap_forces_resubscribe():
+    stream, server, _, _ = run_stream(0.8, drop_every=10)
+    assert stream.gap_count >= 1
+    assert server.connections >= 2
+
+def test_dropped_connection_that_delivered_reconnects_without_backoff():
+    # Failing connections would back off 0.5s, 1s, 2s...; healthy ones retry every 0.5s
+    stream, server, _, _ = run_stream(1.8, disconnect_after=5)
+    assert stream.reconnect_count >= 3
+    assert server.connections >= 4
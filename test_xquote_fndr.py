@@ -0,0 +1,90 @@
+"tests for cross-quote arbitrage detection and its conversion rates"
+
+import math
+import random
+import pytest
+from config import DEFAULT_TAKER_FEE_PERCENT, MIN_PROFIT_PERCENT
+from arb_fndr import ArbitrageFinder
+from xquote_fndr import CrossQuoteFinder, cross_quote_symbols
+
+QUOTES = ['USDT', 'USDC', 'USD']
+
+def tick(finder, symbol, exchange_id, bid, ask):
+    finder.on_ticker_update(symbol, exchange_id, {'bid': bid, 'ask': ask})
+
+def test_conversion_uses_the_trading_exchanges_rate():
+    finder = CrossQuoteFinder(['BTC'], ['ex0', 'ex1'], QUOTES, 'USDT', fee_percent=0.0)
+    tick(finder, 'USDC/USDT', 'ex0', 1.0, 1.0)
+    tick(finder, 'USDC/USDT', 'ex1', 1.05, 1.06) # USDC only sells this well on ex1
+    tick(finder, 'BTC/USDT', 'ex0', 99.9, 100.0)
+    tick(finder, 'BTC/USDC', 'ex0', 100.0, 100.1)
+    assert finder.find_opportunities(min_profit_percent=0.0) == []
+    tick(finder, 'BTC/USDC', 'ex1', 100.0, 100.1)
+    opportunities = finder.find_opportunities(min_profit_percent=0.0)
+    assert [(opp['buy_symbol'], opp['buy_exchange'], opp['sell_symbol'], opp['sell_exchange'])
+            for opp in opportunities] == [('BTC/USDT', 'ex0', 'BTC/USDC', 'ex1')]
+    assert opportunities[0]['sell_revenue'] == pytest.approx(105.0)
+
+def test_quote_without_conversion_pair_on_its_exchange_is_not_priced():
+    finder = CrossQuoteFinder(['BTC'], ['ex0', 'ex1'], QUOTES, 'USDT', fee_percent=0.0)
+    tick(finder, 'USDC/USDT', 'ex0', 1.0, 1.0)
+    tick(finder, 'BTC/USDC', 'ex1', 100.0, 100.1)
+    assert math.isnan(finder.costs[0, QUOTES.index('USDC'), 1])
+    tick(finder, 'BTC/USDT', 'ex1', 100.0, 100.1)
+    assert finder.costs[0, QUOTES.index('USDT'), 1] == pytest.approx(100.1)
+
+def test_conversion_chains_through_common_pairs():
+    finder = CrossQuoteFinder(['BTC'], ['ex0'], QUOTES, 'USDT', fee_percent=0.0)
+    tick(finder, 'USDC/USDT', 'ex0', 0.99, 1.0)
+    tick(finder, 'USDT/USD', 'ex0', 1.0, 1.01)
+    # USD -> USDT at 1 / 1.01, so one BTC sold for 101 USD yields 100 USDT
+    tick(finder, 'BTC/USD', 'ex0', 101.0, 101.1)
+    assert finder.revenues[0, QUOTES.index('USD'), 0] == pytest.approx(100.0)
+
+def test_conversion_fee_applies_without_waiting_for_a_tick():
+    finder = CrossQuoteFinder(['BTC'], ['ex0'], QUOTES, 'USDT', fee_percent=0.0)
+    tick(finder, 'USDC/USDT', 'ex0', 1.0, 1.0)
+    tick(finder, 'BTC/USDC', 'ex0', 100.0, 100.0)
+    assert finder.revenues[0, QUOTES.index('USDC'), 0] == pytest.approx(100.0)
+    finder.set_fee_percents({('USDC/USDT', 'ex0'): 1.0})
+    assert finder.revenues[0, QUOTES.index('USDC'), 0] == pytest.approx(99.0)
+    assert finder.costs[0, QUOTES.index('USDC'), 0] == pytest.approx(100.0 / 0.99)
+
+def test_symbols_expand_to_every_quote_without_duplicates():
+    assert cross_quote_symbols(['BTC/USDT', 'ETH/USDT', 'BTC/USDC'], QUOTES, ['USDC/USDT']) == [
+        'BTC/USDT', 'ETH/USDT', 'BTC/USDC', 'BTC/USD', 'ETH/USDC', 'ETH/USD', 'USDC/USDT']
+
+def test_same_quote_pairs_agree_with_arbitrage_finder():
+    rng = random.Random(0)
+    finder = CrossQuoteFinder(fee_percent=DEFAULT_TAKER_FEE_PERCENT, quotes=QUOTES, common_quote='USDT')
+    market = {}
+    for b in range(10):
+        mid = rng.uniform(1, 1000)
+        for e in range(4):
+            price = mid * (1 + rng.gauss(0, 0.005))
+            market[f'B{b}/USDT', f'ex{e}'] = {'bid': price * 0.9995, 'ask': price * 1.0005}
+            finder.on_ticker_update(f'B{b}/USDT', f'ex{e}', market[f'B{b}/USDT', f'ex{e}'])
+    found = {}
+    for opp in finder.find_opportunities(k=1000, min_profit_percent=MIN_PROFIT_PERCENT, include_same_quote=True):
+        found.setdefault(opp['buy_symbol'], opp)
+    for b in range(10):
+        symbol = f'B{b}/USDT'
+        expected = ArbitrageFinder().find_best_opportunity({key: ticker for key, ticker in market.items()
+                                                            if key[0] == symbol})
+        if expected is None:
+            assert symbol not in found
+            continue
+        actual = found[symbol]
+        assert (actual['buy_exchange'], actual['sell_exchange']) == (expected['buy_exchange'],
+                                                                     expected['sell_exchange'])
+        assert actual['net_profit_percent'] == pytest.approx(expected['net_profit_percent'])
+    assert not finder.find_opportunities(k=1000, min_profit_percent=MIN_PROFIT_PERCENT)
+
+def test_excluded_quote_leaves_the_tensor():
+    finder = CrossQuoteFinder(['BTC'], ['ex0'], QUOTES, 'USDT', fee_percent=0.0)
+    tick(finder, 'USDC/USDT', 'ex0', 1.0, 1.0)
+    tick(finder, 'BTC/USDT', 'ex0', 99.0, 100.0)
+    tick(finder, 'BTC/USDC', 'ex0', 101.0, 102.0)
+    assert finder.find_opportunities(min_profit_percent=0.0)
+    finder.exclude_quote('BTC/USDC', 'ex0')
+    assert finder.find_opportunities(min_profit_percent=0.0) == []
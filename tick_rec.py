@@ -0,0 +1,161 @@
+"append-only columnar tick recordings"
+
+import asyncio
+import math
+import os
+import time
+import numpy as np
+from utils import Logger
+
+# One fixed-width file per column; row i of every file is tick i
+COLUMNS = {
+    'timestamp': np.int64,    # Exchange timestamp in ms, -1 if unknown
+    'recv_time': np.float64,  # Local receive time, epoch seconds
+    'symbol_id': np.uint32,
+    'exchange_id': np.uint16,
+    'bid': np.float64,        # NaN if missing
+    'ask': np.float64,
+}
+SYMBOLS_FILE = 'symbols.txt'
+EXCHANGES_FILE = 'exchanges.txt'
+
+def _read_ids(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return [line.rstrip('\n') for line in f if line.strip()]
+
+class TickRecorder:
+    """
+    Records every ticker into an append-only columnar store.
+    Symbols and exchanges are interned to integer ids kept in small text
+    files next to the columns. Rows are buffered in preallocated arrays and
+    appended in chunks, so recording costs no per-tick allocations or syscalls.
+    Buffered rows reach disk when a chunk fills, at most flush_interval
+    seconds after the last flush while flush_periodically runs, and on close.
+    """
+    def __init__(self, path, chunk_size=4096, flush_interval=1.0):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self.symbols = _read_ids(os.path.join(path, SYMBOLS_FILE))
+        self.exchanges = _read_ids(os.path.join(path, EXCHANGES_FILE))
+        self.symbol_ids = {s: i for i, s in enumerate(self.symbols)}
+        self.exchange_ids = {e: i for i, e in enumerate(self.exchanges)}
+
+        self.chunk_size = chunk_size
+        self.flush_interval = flush_interval
+        self.buffers = {name: np.empty(chunk_size, dtype=dtype) for name, dtype in COLUMNS.items()}
+        self.pending = 0
+        self.last_flush = time.monotonic()
+        self._truncate_partial_rows()
+        self.files = {name: open(os.path.join(path, f'{name}.bin'), 'ab') for name in COLUMNS}
+        self.ticks_recorded = 0
+
+    def _truncate_partial_rows(self):
+        """
+        Cuts every column back to the last complete row, in case a previous
+        run crashed halfway through a flush, so appended rows stay aligned.
+        """
+        sizes = {}
+        for name, dtype in COLUMNS.items():
+            filename = os.path.join(self.path, f'{name}.bin')
+            sizes[name] = os.path.getsize(filename) // np.dtype(dtype).itemsize if os.path.exists(filename) else 0
+        rows = min(sizes.values())
+        for name, dtype in COLUMNS.items():
+            if sizes[name] > rows or (rows and sizes[name] * np.dtype(dtype).itemsize !=
+                                      os.path.getsize(os.path.join(self.path, f'{name}.bin'))):
+                os.truncate(os.path.join(self.path, f'{name}.bin'), rows * np.dtype(dtype).itemsize)
+
+    def _intern(self, value, ids, values, filename):
+        idx = ids.get(value)
+        if idx is None:
+            idx = ids[value] = len(values)
+            values.append(value)
+            with open(os.path.join(self.path, filename), 'a', encoding='utf-8') as f:
+                f.write(value + '\n')
+        return idx
+
+    def record(self, symbol, exchange_id, bid, ask, timestamp=None, recv_time=None):
+        """
+        Appends one tick to the buffer, flushing when it is full or old.
+        """
+        i = self.pending
+        buffers = self.buffers
+        buffers['timestamp'][i] = -1 if timestamp is None else timestamp
+        buffers['recv_time'][i] = time.time() if recv_time is None else recv_time
+        buffers['symbol_id'][i] = self._intern(symbol, self.symbol_ids, self.symbols, SYMBOLS_FILE)
+        buffers['exchange_id'][i] = self._intern(exchange_id, self.exchange_ids, self.exchanges, EXCHANGES_FILE)
+        buffers['bid'][i] = np.nan if bid is None else bid
+        buffers['ask'][i] = np.nan if ask is None else ask
+        self.pending += 1
+        self.ticks_recorded += 1
+        if self.pending == self.chunk_size or time.monotonic() - self.last_flush > self.flush_interval:
+            self.flush()
+
+    def on_ticker_update(self, symbol, exchange_id, ticker):
+        """
+        DataManager ticker listener.
+        """
+        self.record(symbol, exchange_id, ticker.get('bid'), ticker.get('ask'), ticker.get('timestamp'))
+
+    def flush(self):
+        """
+        Appends buffered rows to every column file.
+        """
+        if self.pending:
+            for name, f in self.files.items():
+                f.write(self.buffers[name][:self.pending].tobytes())
+                f.flush()
+            self.pending = 0
+        self.last_flush = time.monotonic()
+
+    async def flush_periodically(self):
+        """
+        Flushes every flush_interval seconds, so ticks buffered before a quiet
+        period reach disk without waiting for the next record().
+        """
+        if not math.isfinite(self.flush_interval):
+            return
+        while True:
+            await asyncio.sleep(max(0.0, self.last_flush + self.flush_interval - time.monotonic()))
+            if time.monotonic() - self.last_flush >= self.flush_interval:
+                self.flush()
+
+    def close(self):
+        """
+        Flushes the buffered rows and closes the column files.
+        """
+        self.flush()
+        for f in self.files.values():
+            f.close()
+        Logger.info("Recorded %d ticks to %s.", self.ticks_recorded, self.path)
+
+class TickReader:
+    """
+    Memory-maps a recording made by TickRecorder. Each chunk maps only its
+    own window of the column files and is unmapped once consumed, so replay
+    memory stays constant no matter how large the recording is.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.symbols = _read_ids(os.path.join(path, SYMBOLS_FILE))
+        self.exchanges = _read_ids(os.path.join(path, EXCHANGES_FILE))
+        self.files = {name: os.path.join(path, f'{name}.bin') for name in COLUMNS}
+        # A crash can leave a partially written last chunk; use only complete rows
+        self.length = min(os.path.getsize(filename) // np.dtype(COLUMNS[name]).itemsize
+                          for name, filename in self.files.items())
+
+    def __len__(self):
+        return self.length
+
+    def iter_chunks(self, chunk_size=65536):
+        """
+        Yields {column: array} memory-mapped windows of at most chunk_size rows, in order.
+        """
+        for start in range(0, self.length, chunk_size):
+            rows = min(chunk_size, self.length - start)
+            yield {
+                name: np.memmap(filename, dtype=COLUMNS[name], mode='r',
+                                offset=start * np.dtype(COLUMNS[name]).itemsize, shape=(rows,))
+                for name, filename in self.files.items()
+            }
@@ -0,0 +1,245 @@
+"interned, array-backed store of the latest tickers with rolling bid/ask history"
+
+import asyncio
+import time
+from collections.abc import MutableMapping
+import numpy as np
+from config import TICKER_HISTORY_SIZE
+
+def _loop_time():
+    # The clock update times are compared against; the loop's is time.monotonic by default
+    try:
+        return asyncio.get_running_loop().time()
+    except RuntimeError:
+        return time.monotonic()
+
+class TickerStore(MutableMapping):
+    """
+    Latest bid, ask, timestamp, receive time and update time of every
+    (symbol, exchange) pair in dense symbol x exchange arrays. Symbols and
+    exchanges are interned to integer row and column ids, and each pair has
+    a fixed-size ring buffer of its last history_size bids and asks, so
+    memory per pair is bounded no matter how long the bot runs.
+
+    It is also a {(symbol, exchange_id): ticker dict} mapping, so code
+    written against the old dict keeps working; the dicts are built on
+    access. Hot paths should use the arrays instead.
+    """
+    __slots__ = ('history_size', 'symbols', 'exchange_ids', 'symbol_index', 'exchange_index', 'bids', 'asks',
+                 'timestamps', 'received_at', 'updated_at', 'history_bids', 'history_asks', 'history_head',
+                 'history_count', 'count')
+
+    def __init__(self, symbols=(), exchange_ids=(), history_size=TICKER_HISTORY_SIZE):
+        self.history_size = history_size
+        self.symbols = []
+        self.exchange_ids = []
+        self.symbol_index = {}
+        self.exchange_index = {}
+        self.bids = np.full((0, 0), np.nan)
+        self.asks = np.full((0, 0), np.nan)
+        self.timestamps = np.full((0, 0), np.nan) # Exchange time in ms
+        self.received_at = np.full((0, 0), np.nan) # perf_counter receive time
+        self.updated_at = np.full((0, 0), np.nan) # Event loop time of the last write, NaN if never written
+        # float32 is ample for spread statistics and halves the history's footprint
+        self.history_bids = np.full((0, 0, history_size), np.nan, dtype=np.float32)
+        self.history_asks = np.full((0, 0, history_size), np.nan, dtype=np.float32)
+        self.history_head = np.zeros((0, 0), dtype=np.int32) # Next slot to write
+        self.history_count = np.zeros((0, 0), dtype=np.int32)
+        self.count = 0 # Pairs holding a ticker
+        self._reserve(max(len(symbols), 8), max(len(exchange_ids), 4))
+        for symbol in symbols:
+            self.symbol_id(symbol)
+        for ex_id in exchange_ids:
+            self.exchange_id(ex_id)
+
+    def _reserve(self, symbol_capacity, exchange_capacity):
+        """
+        Grows every array to at least the given capacity, keeping existing values.
+        """
+        rows, cols = self.bids.shape
+        if symbol_capacity <= rows and exchange_capacity <= cols:
+            return
+        shape = (max(symbol_capacity, rows), max(exchange_capacity, cols))
+        for name in ('bids', 'asks', 'timestamps', 'received_at', 'updated_at'):
+            grown = np.full(shape, np.nan)
+            grown[:rows, :cols] = getattr(self, name)
+            setattr(self, name, grown)
+        for name in ('history_bids', 'history_asks'):
+            grown = np.full(shape + (self.history_size,), np.nan, dtype=np.float32)
+            grown[:rows, :cols] = getattr(self, name)
+            setattr(self, name, grown)
+        for name in ('history_head', 'history_count'):
+            grown = np.zeros(shape, dtype=np.int32)
+            grown[:rows, :cols] = getattr(self, name)
+            setattr(self, name, grown)
+
+    def symbol_id(self, symbol):
+        """
+        Returns the row id of a symbol, interning it if needed.
+        """
+        idx = self.symbol_index.get(symbol)
+        if idx is None:
+            idx = len(self.symbols)
+            if idx >= self.bids.shape[0]:
+                self._reserve(idx * 2, self.bids.shape[1])
+            self.symbols.append(symbol)
+            self.symbol_index[symbol] = idx
+        return idx
+
+    def exchange_id(self, exchange_id):
+        """
+        Returns the column id of an exchange, interning it if needed.
+        """
+        idx = self.exchange_index.get(exchange_id)
+        if idx is None:
+            idx = len(self.exchange_ids)
+            if idx >= self.bids.shape[1]:
+                self._reserve(self.bids.shape[0], idx * 2)
+            self.exchange_ids.append(exchange_id)
+            self.exchange_index[exchange_id] = idx
+        return idx
+
+    def record(self, symbol, exchange_id, bid, ask, timestamp=None, received_at=None, updated_at=None):
+        """
+        Stores the latest ticker of a pair and appends its bid and ask to the pair's history.
+        Missing values are stored as NaN.
+        """
+        row = self.symbol_id(symbol)
+        col = self.exchange_id(exchange_id)
+        bid = np.nan if bid is None else bid
+        ask = np.nan if ask is None else ask
+        if self.updated_at[row, col] != self.updated_at[row, col]: # NaN: first write of this pair
+            self.count += 1
+        self.bids[row, col] = bid
+        self.asks[row, col] = ask
+        self.timestamps[row, col] = np.nan if timestamp is None else timestamp
+        self.received_at[row, col] = np.nan if received_at is None else received_at
+        self.updated_at[row, col] = 0.0 if updated_at is None else updated_at
+        head = self.history_head[row, col]
+        self.history_bids[row, col, head] = bid
+        self.history_asks[row, col, head] = ask
+        self.history_head[row, col] = (head + 1) % self.history_size
+        if self.history_count[row, col] < self.history_size:
+            self.history_count[row, col] += 1
+
+    def last_update(self, symbol, exchange_id):
+        """
+        Event loop time a pair was last written, or None if it never was.
+        """
+        row = self.symbol_index.get(symbol)
+        col = self.exchange_index.get(exchange_id)
+        if row is None or col is None:
+            return None
+        updated_at = float(self.updated_at[row, col])
+        return None if updated_at != updated_at else updated_at
+
+    def _ordered(self, history, rows, cols):
+        # Rotates each pair's ring so the most recent sample comes first
+        order = (self.history_head[rows, cols][..., None] - 1 - np.arange(self.history_size)) % self.history_size
+        return np.take_along_axis(history[rows, cols], order, axis=-1)
+
+    def history(self):
+        """
+        Returns (bids, asks, counts): the histories of every pair, most recent
+        sample first, as arrays of shape (symbols, exchanges, history_size),
+        and the number of valid samples per pair. Unused slots are NaN.
+        """
+        cells = (slice(len(self.symbols)), slice(len(self.exchange_ids)))
+        return (self._ordered(self.history_bids, *cells), self._ordered(self.history_asks, *cells),
+                self.history_count[cells])
+
+    def spread_stats(self, cells=None):
+        """
+        Rolling statistics of the gross cross-exchange spread of every
+        (symbol, buy_exchange, sell_exchange), in percent of the ask. The i-th
+        most recent samples of the two pairs are matched up, which lines up
+        well when both exchanges are polled or streamed at similar rates.
+        The window is every sample before the latest, so a spike does not
+        dilute its own z-score.
+
+        Args:
+            cells (tuple, optional): (rows, buy_cols, sell_cols) index arrays to
+                                     compute only those triples.
+
+        Returns:
+            tuple: (mean, std, zscore, samples), arrays of shape (symbols, exchanges,
+                   exchanges), or of the shape of cells. zscore is that of the latest
+                   spread against the window and NaN where std is 0 or the window has
+                   fewer than 2 samples.
+        """
+        if cells is None:
+            bids, asks, _ = self.history()
+            sell_bids = bids[:, None, :, :]
+            buy_asks = asks[:, :, None, :].astype(np.float64)
+        else:
+            rows, buys, sells = cells
+            sell_bids = self._ordered(self.history_bids, rows, sells)
+            buy_asks = self._ordered(self.history_asks, rows, buys).astype(np.float64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            spreads = (sell_bids - buy_asks) / buy_asks * 100
+            latest, window = spreads[..., 0], spreads[..., 1:]
+            valid = ~np.isnan(window)
+            samples = valid.sum(axis=-1)
+            mean = np.where(valid, window, 0.0).sum(axis=-1) / samples
+            deviations = np.where(valid, window - mean[..., None], 0.0)
+            std = np.sqrt((deviations ** 2).sum(axis=-1) / samples)
+            zscore = np.where((samples >= 2) & (std > 0), (latest - mean) / std, np.nan)
+        return mean, std, zscore, samples
+
+    # Mapping interface over the pairs that hold a ticker
+
+    def _cell(self, key):
+        symbol, exchange_id = key
+        row = self.symbol_index.get(symbol)
+        col = self.exchange_index.get(exchange_id)
+        if row is None or col is None or self.updated_at[row, col] != self.updated_at[row, col]:
+            raise KeyError(key)
+        return row, col
+
+    def __getitem__(self, key):
+        row, col = self._cell(key)
+        ticker = {'symbol': key[0], 'exchange_id': key[1]}
+        for field, values in (('bid', self.bids), ('ask', self.asks), ('timestamp', self.timestamps),
+                              ('received_at', self.received_at)):
+            value = float(values[row, col])
+            ticker[field] = None if value != value else value
+        return ticker
+
+    def __setitem__(self, key, ticker):
+        # Stamped now, like the ingest path, so the write is not taken for a stale quote
+        self.record(key[0], key[1], ticker.get('bid'), ticker.get('ask'), ticker.get('timestamp'),
+                    ticker.get('received_at'), _loop_time())
+
+    def __delitem__(self, key):
+        # The history goes too, so a pair written again starts its statistics afresh
+        row, col = self._cell(key)
+        for values in (self.bids, self.asks, self.timestamps, self.received_at, self.updated_at,
+                       self.history_bids, self.history_asks):
+            values[row, col] = np.nan
+        self.history_head[row, col] = 0
+        self.history_count[row, col] = 0
+        self.count -= 1
+
+    def __iter__(self):
+        n_sym, n_ex = len(self.symbols), len(self.exchange_ids)
+        rows, cols = np.nonzero(~np.isnan(self.updated_at[:n_sym, :n_ex]))
+        for row, col in zip(rows.tolist(), cols.tolist()):
+            yield (self.symbols[row], self.exchange_ids[col])
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, key):
+        try:
+            self._cell(key)
+        except KeyError:
+            return False
+        return True
+
+    def nbytes(self):
+        """
+        Bytes held by the arrays.
+        """
+        return sum(getattr(self, name).nbytes for name in
+                   ('bids', 'asks', 'timestamps', 'received_at', 'updated_at', 'history_bids', 'history_asks',
+                    'history_head', 'history_count'))
@@ -1,21 +1,57 @@
 "for trade execution"
 
+import asyncio
+import logging
+import time
+import uuid
 from utils import Logger
-from config import MIN_TRADE_AMOUNT, MAX_TRADE_AMOUNT
+from metrics import Metrics
+from config import MIN_TRADE_AMOUNT, MAX_TRADE_AMOUNT, CONCURRENT_LEGS, LEG_TIMEOUT_SECONDS, UNWIND_ATTEMPTS
+
+# Quote amount traded when an opportunity was not sized against order books
+DEFAULT_TRADE_AMOUNT_QUOTE = min(MAX_TRADE_AMOUNT, max(MIN_TRADE_AMOUNT, 100)) # Example: $100
 
 class TradeExecutor:
     """
     Handles the execution of arbitrage trades.
     IMPORTANT: This implementation simulates trades for safety.
     """
-    def __init__(self, exchange_manager):
+    def __init__(self, exchange_manager, concurrent=CONCURRENT_LEGS, leg_timeout=LEG_TIMEOUT_SECONDS, journal=None):
+        """
+        Args:
+            exchange_manager (ExchangeManager): Places the (simulated) orders.
+            concurrent (bool): Submit both legs at once instead of buy-then-sell.
+            leg_timeout (float): Seconds each order leg may take before it is cancelled.
+            journal (TradeJournal, optional): Records every opportunity and trade result.
+        """
         self.exchange_manager = exchange_manager
+        self.concurrent = concurrent
+        self.leg_timeout = leg_timeout
+        self.journal = journal
 
     async def execute_arbitrage_trade(self, opportunity):
         """
         Simulates executing an arbitrage trade based on a detected opportunity.
         This function DOES NOT place real orders.
+
+        When the legs fill unevenly (a rejection, timeout or partial fill), the
+        unhedged amount is unwound on the exchange where it was filled. Trades
+        are shrunk to the available balances and skipped below MIN_TRADE_AMOUNT.
+
+        Returns:
+            dict: 'status' ('completed', 'unwound', 'failed', 'exposed' or 'skipped'), realized 'profit'
+                  in quote currency after fees and unwind cost, hedged 'filled_amount',
+                  'unwind_cost', 'open_amount' left unhedged and 'leg_skew' in seconds.
         """
+        if self.journal:
+            self.journal.record('opportunity', opportunity)
+        result = await self._execute(opportunity)
+        if self.journal:
+            self.journal.record('trade', {'symbol': opportunity['symbol'], 'buy_exchange': opportunity['buy_exchange'],
+                                          'sell_exchange': opportunity['sell_exchange'], **result})
+        return result
+
+    async def _execute(self, opportunity):
         symbol = opportunity['symbol']
         buy_exchange = opportunity['buy_exchange']
         sell_exchange = opportunity['sell_exchange']
@@ -23,66 +59,194 @@ class TradeExecutor:
         sell_price = opportunity['sell_price']
         net_profit_percent = opportunity['net_profit_percent']
 
-        Logger.info("\n--- SIMULATING ARBITRAGE TRADE ---")
-        Logger.info("Opportunity: %s", symbol)
-        Logger.info("Buy on %s @ %s", buy_exchange, buy_price)
-        Logger.info("Sell on %s @ %s", sell_exchange, sell_price)
-        Logger.info("Calculated Net Profit: %.4f%%", net_profit_percent)
+        if Logger.isEnabledFor(logging.INFO): # One check instead of five discarded records
+            Logger.info("\n--- SIMULATING ARBITRAGE TRADE ---")
+            Logger.info("Opportunity: %s", symbol)
+            Logger.info("Buy on %s @ %s", buy_exchange, buy_price)
+            Logger.info("Sell on %s @ %s", sell_exchange, sell_price)
+            Logger.info("Calculated Net Profit: %.4f%%", net_profit_percent)
 
         # --- Determine Trade Amount ---
-        # For simplicity, we'll use a fixed amount. In a real bot, you'd:
-        # 1. Fetch available USDT balance on buy_exchange.
-        # 2. Fetch available crypto balance (e.g., BTC) on sell_exchange (if pre-funded).
-        # 3. Check order book depth on both exchanges to determine max executable amount without high slippage.
-        # 4. Use MIN_TRADE_AMOUNT_USDT and MAX_TRADE_AMOUNT_USDT from config.
-        
-        # Example: Let's assume we want to trade a fixed USDT amount for simulation
-        trade_amount_usdt = min(MAX_TRADE_AMOUNT, max(MIN_TRADE_AMOUNT, 100)) # Example: $100
-
-        # Calculate crypto amount to buy
-        # This is the amount of the base asset (e.g., BTC) we will buy
-        crypto_amount_to_buy = trade_amount_usdt / buy_price
-
-        # --- Simulate Balance Checks (Conceptual) ---
-        # In a real bot, you'd perform these actual checks:
-        # buy_exchange_usdt_balance = await self.exchange_manager.fetch_balance(buy_exchange, 'USDT')
-        # sell_exchange_crypto_balance = await self.exchange_manager.fetch_balance(sell_exchange, symbol.split('/')[0]) # e.g., 'BTC'
-
-        # if buy_exchange_usdt_balance < trade_amount_usdt:
-        #     logger.warning(f"Insufficient USDT balance on {buy_exchange} for trade. Required: {trade_amount_usdt}, Available: {buy_exchange_usdt_balance}")
-        #     return
-
-        # if sell_exchange_crypto_balance < crypto_amount_to_buy:
-        #     logger.warning(f"Insufficient {symbol.split('/')[0]} balance on {sell_exchange} for trade. Required: {crypto_amount_to_buy}, Available: {sell_exchange_crypto_balance}")
-        #     # This scenario is tricky for cross-exchange. Usually means you need to rebalance first.
-        #     return
+        # Sized from order book depth when available, otherwise a fixed amount,
+        # then capped by the balances on both exchanges below.
+        if 'trade_amount' in opportunity:
+            # Sized by ArbitrageFinder.rank_by_executable_profit against order book depth
+            trade_amount_usdt = opportunity['trade_amount_quote']
+            crypto_amount_to_buy = opportunity['trade_amount']
+        else:
+            # Example: Let's assume we want to trade a fixed USDT amount for simulation
+            trade_amount_usdt = DEFAULT_TRADE_AMOUNT_QUOTE
+
+            # Calculate crypto amount to buy
+            # This is the amount of the base asset (e.g., BTC) we will buy
+            crypto_amount_to_buy = trade_amount_usdt / buy_price
+
+        # --- Balance Checks ---
+        # Served from ExchangeManager's balance cache, so no round-trip per trade
+        sized_amount = crypto_amount_to_buy
+        base, quote = symbol.split('/')
+        buy_fee = opportunity.get('estimated_buy_fee_percent', 0.0) / 100
+        sell_fee = opportunity.get('estimated_sell_fee_percent', 0.0) / 100
+        buy_exchange_quote_balance, sell_exchange_base_balance = await asyncio.gather(
+            self.exchange_manager.fetch_balance(buy_exchange, quote),
+            self.exchange_manager.fetch_balance(sell_exchange, base))
+        affordable = min(buy_exchange_quote_balance / (buy_price * (1 + buy_fee)), sell_exchange_base_balance)
+        if affordable < crypto_amount_to_buy:
+            Logger.warning("Balances limit %s trade to %.6f %s (%s %s on %s, %s %s on %s).", symbol, max(affordable, 0.0),
+                           base, buy_exchange_quote_balance, quote, buy_exchange, sell_exchange_base_balance, base, sell_exchange)
+            crypto_amount_to_buy = max(affordable, 0.0)
+
+        # --- Market precision and minimums on both exchanges ---
+        crypto_amount_to_buy = await self.exchange_manager.normalize_amount(buy_exchange, symbol, crypto_amount_to_buy, buy_price)
+        crypto_amount_to_buy = await self.exchange_manager.normalize_amount(sell_exchange, symbol, crypto_amount_to_buy, sell_price)
+        if crypto_amount_to_buy * buy_price < MIN_TRADE_AMOUNT:
+            Logger.warning("Skipping %s: tradable amount %.2f %s is below the minimum.",
+                           symbol, crypto_amount_to_buy * buy_price, quote)
+            Logger.info("--- END SIMULATED TRADE ---\n")
+            return {'status': 'skipped', 'profit': 0.0, 'filled_amount': 0.0, 'unwind_cost': 0.0,
+                    'open_amount': 0.0, 'leg_skew': None}
+        trade_amount_usdt *= crypto_amount_to_buy / sized_amount
 
         Logger.info("Attempting to trade ~%.2f USDT worth of %s...", trade_amount_usdt, symbol.split('/')[0])
         Logger.info("This translates to buying %.6f %s on %s", crypto_amount_to_buy, symbol.split('/')[0], buy_exchange)
 
         # --- Simulate Order Placement ---
-        # In a real bot, these would be awaited concurrently using asyncio.gather()
-        buy_order = await self.exchange_manager.create_market_buy_order(
-            exchange_id=buy_exchange,
-            symbol=symbol,
-            amount=crypto_amount_to_buy # Amount of base currency (e.g. BTC)
-        )
-
-        sell_order = await self.exchange_manager.create_market_sell_order(
-            exchange_id=sell_exchange,
-            symbol=symbol,
-            amount=crypto_amount_to_buy # Amount of base currency (e.g. BTC)
-        )
-
-        if buy_order and sell_order:
-            Logger.info("SIMULATED TRADE COMPLETED for %s!", symbol)
-            Logger.info("Simulated Buy Order ID: %s, Status: %s", buy_order.get('id'), buy_order.get('status'))
-            Logger.info("Simulated Sell Order ID: %s, Status: %s", sell_order.get('id'), sell_order.get('status'))
-    
-            # Calculate estimated profit from simulated trade
-            estimated_profit_usdt = trade_amount_usdt * (net_profit_percent / 100)
-            Logger.info("Estimated Profit (after fees): %.4f USDT", estimated_profit_usdt)
+        reference_time = time.perf_counter()
+        if 'detected_at' in opportunity:
+            Metrics.observe('detect_to_submit', buy_exchange, reference_time - opportunity['detected_at'])
+        if self.concurrent:
+            # Both legs in flight at once: the sell leg no longer waits out the buy round-trip
+            (buy_order, buy_acked_at), (sell_order, sell_acked_at) = await asyncio.gather(
+                self._submit_leg('buy', buy_exchange, symbol, crypto_amount_to_buy, buy_price, reference_time),
+                self._submit_leg('sell', sell_exchange, symbol, crypto_amount_to_buy, sell_price, reference_time))
         else:
-            Logger.error("SIMULATED TRADE FAILED for %s due to order issues.", symbol)
+            buy_order, buy_acked_at = await self._submit_leg(
+                'buy', buy_exchange, symbol, crypto_amount_to_buy, buy_price, reference_time)
+            sell_order, sell_acked_at = None, buy_acked_at
+            if _filled(buy_order) > 0:
+                # Only sell what was actually bought
+                sell_order, sell_acked_at = await self._submit_leg(
+                    'sell', sell_exchange, symbol, _filled(buy_order), sell_price, reference_time)
+        if 'received_at' in opportunity:
+            Metrics.observe('tick_to_trade', buy_exchange, max(buy_acked_at, sell_acked_at) - opportunity['received_at'])
+
+        bought, sold = _filled(buy_order), _filled(sell_order)
+        buy_average = _average(buy_order, buy_price)
+        sell_average = _average(sell_order, sell_price)
+        hedged = min(bought, sold)
+        result = {
+            'status': 'completed',
+            'profit': hedged * (sell_average * (1 - sell_fee) - buy_average * (1 + buy_fee)),
+            'filled_amount': hedged,
+            'unwind_cost': 0.0,
+            'open_amount': 0.0,
+            'leg_skew': abs(sell_acked_at - buy_acked_at) if bought and sold else None,
+        }
+        Logger.info("Buy order %s: %s, filled %.6f", buy_order and buy_order.get('id'),
+                    buy_order and buy_order.get('status'), bought)
+        Logger.info("Sell order %s: %s, filled %.6f", sell_order and sell_order.get('id'),
+                    sell_order and sell_order.get('status'), sold)
+
+        # --- Unwind any unhedged amount ---
+        if bought > sold:
+            # Long on the buy exchange: sell the excess back there
+            excess = bought - sold
+            unwound, unwind_average = await self._unwind('sell', buy_exchange, symbol, excess, buy_price, reference_time)
+            if unwound:
+                result['unwind_cost'] = unwound * (buy_average * (1 + buy_fee) - unwind_average * (1 - buy_fee))
+            result['open_amount'] = excess - unwound
+        elif sold > bought:
+            # Short on the sell exchange: buy the excess back there
+            excess = sold - bought
+            unwound, unwind_average = await self._unwind('buy', sell_exchange, symbol, excess, sell_price, reference_time)
+            if unwound:
+                result['unwind_cost'] = unwound * (unwind_average * (1 + sell_fee) - sell_average * (1 - sell_fee))
+            result['open_amount'] = excess - unwound
+        result['profit'] -= result['unwind_cost']
+
+        if result['open_amount'] > crypto_amount_to_buy * 1e-9:
+            result['status'] = 'exposed'
+            Logger.error("UNWIND FAILED for %s: %.6f %s left unhedged.", symbol, result['open_amount'], symbol.split('/')[0])
+        elif bought != sold:
+            result['status'] = 'unwound'
+            Logger.warning("Legs filled unevenly for %s (bought %.6f, sold %.6f); unwound at a cost of %.4f USDT.",
+                           symbol, bought, sold, result['unwind_cost'])
+        elif not hedged:
+            result['status'] = 'failed'
+            Logger.error("SIMULATED TRADE FAILED for %s: neither leg filled.", symbol)
+
+        if hedged:
+            Logger.info("SIMULATED TRADE %s for %s! Hedged %.6f %s, leg skew %.1f ms",
+                        result['status'].upper(), symbol, hedged, symbol.split('/')[0], result['leg_skew'] * 1e3)
+            if 'expected_profit' in opportunity:
+                estimated_profit_usdt = opportunity['expected_profit'] # Includes slippage
+            else:
+                estimated_profit_usdt = trade_amount_usdt * (net_profit_percent / 100)
+            Logger.info("Estimated Profit (after fees): %.4f USDT, realized: %.4f USDT", estimated_profit_usdt, result['profit'])
 
         Logger.info("--- END SIMULATED TRADE ---\n")
+        return result
+
+    async def _submit_leg(self, side, exchange_id, symbol, amount, price, reference_time):
+        """
+        Places one market order with a deadline of self.leg_timeout seconds.
+        A leg that misses its deadline may still be live on the exchange, so it
+        is cancelled there, and whatever filled before the cancel landed counts
+        as the leg's fill. Unwinding only starts after that, so a late fill
+        cannot execute on top of the unwind.
+
+        Returns:
+            tuple: (order dict or None, perf_counter time the leg finished).
+        """
+        if side == 'buy':
+            create = self.exchange_manager.create_market_buy_order
+        else:
+            create = self.exchange_manager.create_market_sell_order
+        client_order_id = uuid.uuid4().hex
+        submitted_at = time.perf_counter()
+        try:
+            order = await asyncio.wait_for(
+                create(exchange_id=exchange_id, symbol=symbol, amount=amount, price=price, reference_time=reference_time,
+                       client_order_id=client_order_id),
+                self.leg_timeout)
+        except asyncio.TimeoutError:
+            order = await self.exchange_manager.cancel_order(exchange_id, symbol, client_order_id)
+            Logger.warning("%s leg on %s for %s timed out after %.2fs and was cancelled with %.6f filled.",
+                           side.capitalize(), exchange_id, symbol, self.leg_timeout, _filled(order))
+        acked_at = time.perf_counter()
+        Metrics.observe('submit_to_ack', exchange_id, acked_at - submitted_at)
+        return order, acked_at
+
+    async def _unwind(self, side, exchange_id, symbol, amount, price, reference_time):
+        """
+        Flattens an unhedged amount with up to UNWIND_ATTEMPTS market orders.
+
+        Returns:
+            tuple: (amount unwound, its average fill price).
+        """
+        unwound = notional = 0.0
+        for _ in range(UNWIND_ATTEMPTS):
+            order, _ = await self._submit_leg(side, exchange_id, symbol, amount - unwound, price, reference_time)
+            filled = _filled(order)
+            unwound += filled
+            notional += filled * _average(order, price)
+            if amount - unwound <= amount * 1e-9:
+                break
+        return unwound, notional / unwound if unwound else price
+
+def _filled(order):
+    """
+    Base amount an order response reports as filled.
+    Responses without 'filled' count as fully filled unless rejected.
+    """
+    if not order or order.get('status') == 'rejected':
+        return 0.0
+    filled = order.get('filled')
+    return order.get('amount', 0.0) if filled is None else filled
+
+def _average(order, price):
+    """
+    Average fill price of an order, falling back to the quoted price.
+    """
+    average = order.get('average') if order else None
+    return price if average is None else average
@@ -0,0 +1,105 @@
+"append-only JSONL journal of opportunities and trades, written off the event loop"
+
+import json
+import os
+import queue
+import threading
+import time
+from config import JOURNAL_MAX_PENDING, JOURNAL_BATCH_SIZE, JOURNAL_FULL_POLICY
+from utils import Logger
+
+_CLOSE = object() # Sentinel telling the writer to flush and exit
+
+class TradeJournal:
+    """
+    Records opportunities and trade results as one JSON object per line.
+
+    record() only puts the entry on a bounded queue; a background thread
+    serializes whatever has queued up and appends it with one write per
+    batch of up to batch_size entries, so bursts cost few syscalls. When
+    the writer falls behind and max_pending entries are queued, the policy
+    decides: 'drop' discards the new entry and counts it in self.dropped,
+    'block' waits for room (stalling the caller, so only for must-keep
+    journals).
+    """
+    def __init__(self, path, max_pending=JOURNAL_MAX_PENDING, batch_size=JOURNAL_BATCH_SIZE,
+                 policy=JOURNAL_FULL_POLICY):
+        """
+        Args:
+            path (str): File to append to. Created if missing.
+            max_pending (int): Entries that may wait for the writer.
+            batch_size (int): Most entries written per write call.
+            policy (str): 'drop' or 'block', what record() does when the queue is full.
+        """
+        if policy not in ('drop', 'block'):
+            raise ValueError(f"Unknown journal policy {policy!r}")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.batch_size = batch_size
+        self.policy = policy
+        self.queue = queue.Queue(max_pending)
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.file = open(path, 'a', encoding='utf-8')
+        self.thread = threading.Thread(target=self._run, name='trade-journal', daemon=True)
+        self.thread.start()
+
+    def record(self, kind, entry):
+        """
+        Queues one entry for writing. Never blocks under the 'drop' policy.
+
+        Args:
+            kind (str): Entry type, e.g. 'opportunity' or 'trade'.
+            entry (dict): JSON-serializable fields; copied, so the caller may reuse it.
+        """
+        item = (kind, time.time(), dict(entry))
+        if self.policy == 'block':
+            self.queue.put(item)
+        else:
+            try:
+                self.queue.put_nowait(item)
+            except queue.Full:
+                self.dropped += 1
+                return False
+        self.recorded += 1
+        return True
+
+    def _run(self):
+        closing = False
+        while not closing:
+            batch = [self.queue.get()]
+            # Whatever else is already waiting goes into the same write
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if _CLOSE in batch:
+                batch.remove(_CLOSE)
+                closing = True
+            self._write(batch)
+
+    def _write(self, batch):
+        if not batch:
+            return
+        lines = []
+        for kind, recorded_at, entry in batch:
+            lines.append(json.dumps({'kind': kind, 'time': recorded_at, **entry}, default=str))
+        try:
+            self.file.write('\n'.join(lines) + '\n')
+            self.file.flush()
+            self.written += len(batch)
+        except OSError as e:
+            Logger.error("Trade journal write to %s failed, %d entries lost: %s", self.path, len(batch), e)
+
+    def close(self):
+        """
+        Writes every queued entry and closes the file.
+        """
+        self.queue.put(_CLOSE)
+        self.thread.join()
+        self.file.close()
+        Logger.info("Journaled %d entries to %s (%d dropped).", self.written, self.path, self.dropped)
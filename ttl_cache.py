@@ -0,0 +1,109 @@
+"TTL/LRU cache with request coalescing for exchange account data"
+
+import asyncio
+import time
+from collections import OrderedDict
+
+_ABANDONED = object() # Result handed to waiters when the caller running the fetch was cancelled
+
+class TTLCache:
+    """
+    Bounded mapping whose entries expire after a time-to-live.
+    The least recently used entry is evicted when the cache is full, and
+    concurrent get_or_fetch calls for the same missing key share one fetch.
+    """
+    def __init__(self, maxsize=1024, ttl=60.0, clock=time.monotonic):
+        """
+        Args:
+            maxsize (int): Maximum number of entries kept.
+            ttl (float): Default seconds an entry stays fresh.
+            clock (callable): Time source, replaceable in benchmarks.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict() # {key: (value, expires_at)}, least recently used first
+        self._inflight = {} # {key: asyncio.Future} for fetches in progress
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        entry = self._entries.get(key)
+        return entry is not None and entry[1] > self.clock()
+
+    def get(self, key, default=None):
+        """
+        Returns the fresh value for key, or default if it is missing or expired.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        if entry[1] <= self.clock():
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def set(self, key, value, ttl=None):
+        """
+        Stores value under key, evicting the least recently used entry if full.
+        """
+        self._entries[key] = (value, self.clock() + (self.ttl if ttl is None else ttl))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        """
+        Drops key so the next lookup fetches it again.
+        """
+        self._entries.pop(key, None)
+
+    async def get_or_fetch(self, key, fetch, ttl=None):
+        """
+        Returns the cached value for key, calling `await fetch()` on a miss.
+        Callers that miss while a fetch for the same key is running wait for
+        that fetch instead of starting their own. Exceptions are passed to
+        every waiter and nothing is cached. If the caller running the fetch
+        is cancelled, its waiters are not: they retry, and one of them fetches.
+
+        Args:
+            key (hashable): Cache key.
+            fetch (callable): Coroutine function producing the value.
+            ttl (float, optional): Freshness for this entry, defaults to self.ttl.
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] > self.clock():
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            value = await asyncio.shield(inflight)
+            if value is _ABANDONED:
+                return await self.get_or_fetch(key, fetch, ttl)
+            return value
+
+        self.misses += 1
+        future = self._inflight[key] = asyncio.get_running_loop().create_future()
+        try:
+            value = await fetch()
+        except asyncio.CancelledError:
+            future.set_result(_ABANDONED)
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception() # Mark retrieved so an unawaited failure is not logged
+            raise
+        else:
+            self.set(key, value, ttl)
+            future.set_result(value)
+            return value
+        finally:
+            del self._inflight[key]
@@ -1,15 +1,63 @@
 "helper functions for the arb finder"
 
+import atexit
+import importlib
 import logging
+import logging.handlers
+import queue
 from config import LOG_FILE, LOG_LEVEL
 
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves the Formatter (timestamp, level and layout) to
+    the listener thread, where the stock handler runs it in the caller.
+    The message itself is still rendered here: getMessage() merges the
+    %-arguments so the queued record no longer refers to objects the caller
+    may change afterwards. That is the one formatting cost left on the
+    caller, and records below the logger's level never get this far.
+    """
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # Tracebacks cannot be pickled or safely read later; render them now
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+class LazyModule:
+    """
+    Stands in for a module until one of its attributes is used, so heavy
+    imports (ccxt takes about a second) stay off the startup path of code
+    that never needs them. load() imports it eagerly, e.g. from a thread.
+    """
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
 def setup_logger():
     """
     Sets up a custom logger for the bot.
+
+    Calls on the logger only enqueue the record; a QueueListener thread
+    formats it and writes it to the console and the log file, so log I/O
+    never blocks the event loop. Records below the logger's level are
+    discarded by logging before anything is formatted.
     """
     logger = logging.getLogger('ArbitrageBot')
     logger.setLevel(LOG_LEVEL)
 
+    if logger.handlers: # Prevent adding duplicate handlers if called multiple times
+        return logger
+
     # Create handlers
     c_handler = logging.StreamHandler()
     f_handler = logging.FileHandler(LOG_FILE)
@@ -23,10 +71,12 @@ def setup_logger():
     c_handler.setFormatter(formatter)
     f_handler.setFormatter(formatter)
 
-    # Add handlers to the logger
-    if not logger.handlers: # Prevent adding duplicate handlers if called multiple times
-        logger.addHandler(c_handler)
-        logger.addHandler(f_handler)
+    # Only the queue handler runs in the calling thread; the listener owns the I/O handlers
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(DeferredQueueHandler(log_queue))
+    listener = logging.handlers.QueueListener(log_queue, c_handler, f_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop) # Drains the queue before the interpreter exits
 
     return logger
 
@@ -0,0 +1,113 @@
+"websocket ticker streams"
+
+import asyncio
+import json
+import aiohttp
+from utils import Logger
+from config import STREAM_STALE_SECONDS, STREAM_RECONNECT_MAX_SECONDS
+
+class TickerStream:
+    """
+    Subscribes to one exchange's ticker and top-of-book channels over a websocket
+    and forwards every update to a callback.
+
+    Messages are JSON objects {seq, channel, symbol, bid, ask, timestamp}. The
+    stream resubscribes after every reconnect, backing off exponentially while
+    connections fail before delivering anything, and forces a reconnect when
+    it sees a gap in seq numbers so the server resends a fresh snapshot.
+    """
+    def __init__(self, exchange_id, url, symbols, on_ticker):
+        """
+        Args:
+            exchange_id (str): Exchange the stream belongs to.
+            url (str): Websocket URL.
+            symbols (list): Symbols to subscribe to.
+            on_ticker (callable): Called as on_ticker(symbol, exchange_id, ticker_data).
+        """
+        self.exchange_id = exchange_id
+        self.url = url
+        self.symbols = list(symbols)
+        self.on_ticker = on_ticker
+        self.connected = False
+        self.last_seq = None
+        self.last_message_time = None
+        self.gap_count = 0
+        self.reconnect_count = 0
+        self.message_count = 0
+
+    def is_healthy(self):
+        """
+        A stream is healthy while it is connected and has delivered a message recently.
+        """
+        if not self.connected or self.last_message_time is None:
+            return False
+        return asyncio.get_event_loop().time() - self.last_message_time <= STREAM_STALE_SECONDS
+
+    async def run(self):
+        """
+        Connects and consumes the stream forever, reconnecting on any failure.
+        """
+        backoff = 0.5
+        async with aiohttp.ClientSession() as session:
+            while True:
+                received = self.message_count
+                try:
+                    async with session.ws_connect(self.url, heartbeat=STREAM_STALE_SECONDS) as ws:
+                        await ws.send_json({'op': 'subscribe', 'channels': ['ticker', 'book'],
+                                            'symbols': self.symbols})
+                        self.connected = True
+                        self.last_seq = None
+                        Logger.info("Subscribed to %s stream for %d symbols.", self.exchange_id, len(self.symbols))
+                        await self._consume(ws)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    Logger.error("Stream error on %s: %s", self.exchange_id, e)
+                finally:
+                    self.connected = False
+
+                # A connection that delivered messages was healthy, whether it
+                # dropped or was closed after a gap: reconnect without backing off
+                healthy = self.message_count > received
+                if healthy:
+                    backoff = 0.5
+                self.reconnect_count += 1
+                await asyncio.sleep(backoff)
+                if not healthy:
+                    backoff = min(backoff * 2, STREAM_RECONNECT_MAX_SECONDS)
+
+    async def _consume(self, ws):
+        """
+        Reads messages until the socket closes or a sequence gap is found.
+
+        Returns:
+            bool: True if the stream stopped because of a sequence gap.
+        """
+        loop = asyncio.get_event_loop()
+        async for msg in ws:
+            if msg.type != aiohttp.WSMsgType.TEXT:
+                if msg.type in (aiohttp.WSMsgType.ERROR, aiohttp.WSMsgType.CLOSED):
+                    break
+                continue
+
+            message = json.loads(msg.data)
+            seq = message.get('seq')
+            if seq is not None:
+                if self.last_seq is not None and seq != self.last_seq + 1:
+                    self.gap_count += 1
+                    Logger.warning("Sequence gap on %s stream (%s -> %s). Resubscribing.",
+                                   self.exchange_id, self.last_seq, seq)
+                    return True
+                self.last_seq = seq
+
+            self.last_message_time = loop.time()
+            self.message_count += 1
+            if message.get('channel') in ('ticker', 'book'):
+                self.on_ticker(message['symbol'], self.exchange_id, {
+                    'bid': message.get('bid'),
+                    'ask': message.get('ask'),
+                    'timestamp': message.get('timestamp'),
+                    'exchange_id': self.exchange_id,
+                    'symbol': message['symbol']
+                })
+        return False
@@ -0,0 +1,308 @@
+"Finds cross-exchange arbitrage across quote currencies"
+
+import numpy as np
+from config import (MIN_PROFIT_PERCENT, DEFAULT_TAKER_FEE_PERCENT, TOP_K_OPPORTUNITIES, QUOTE_CURRENCIES,
+                    COMMON_QUOTE, CONVERSION_SYMBOLS)
+
+def cross_quote_symbols(symbols, quotes=QUOTE_CURRENCIES, conversion_symbols=CONVERSION_SYMBOLS):
+    """
+    Returns symbols plus every base of them in each of quotes and the
+    conversion pairs, without duplicates, e.g. BTC/USDT -> BTC/USDT, BTC/USDC,
+    BTC/USD, USDC/USDT, ...
+    """
+    expanded = list(symbols)
+    for base in dict.fromkeys(symbol.split('/')[0] for symbol in symbols):
+        expanded.extend(f'{base}/{quote}' for quote in quotes if base not in quotes)
+    expanded.extend(conversion_symbols)
+    return list(dict.fromkeys(expanded))
+
+class ConversionMatrix:
+    """
+    Rates between quote currencies (e.g. USDT, USDC, USD) on each exchange,
+    derived from the stablecoin pairs between them, such as USDC/USDT.
+
+    A conversion settles on the exchange that holds the balance, so rates
+    are kept per exchange and never combine markets of different exchanges.
+    rates[exchange_id][i, j] is how many units of quote j one unit of quote
+    i converts into on that exchange, taker fee included: the bid of an i/j
+    market, or one over the ask of a j/i market. Pairs without a direct
+    market are chained through the others, so USDC -> USD works from
+    USDC/USDT and USDT/USD alone. A quote always converts into itself at 1;
+    on an exchange without conversion pairs nothing else converts.
+    """
+    def __init__(self, quotes=QUOTE_CURRENCIES, common_quote=COMMON_QUOTE, fee_percent=DEFAULT_TAKER_FEE_PERCENT):
+        self.quotes = list(quotes)
+        self.quote_index = {quote: i for i, quote in enumerate(self.quotes)}
+        self.common = self.quote_index[common_quote]
+        self.fee_percent = fee_percent
+        self.fee_percents = {} # {(symbol, exchange_id): taker fee percent}
+        self.pair_quotes = {} # {(symbol, exchange_id): (bid, ask)} of the conversion pairs
+        n = len(self.quotes)
+        self.identity = np.full((n, n), np.nan) # Rates of an exchange without conversion pairs
+        np.fill_diagonal(self.identity, 1.0)
+        self.direct = {} # {exchange_id: rates of its direct markets}
+        self.rates = {} # {exchange_id: chained rates}
+
+    def revenue_rates(self, exchange_id):
+        """
+        Common quote received on an exchange per unit of each quote sold into it.
+        """
+        return self.rates.get(exchange_id, self.identity)[:, self.common]
+
+    def cost_rates(self, exchange_id):
+        """
+        Common quote spent on an exchange per unit of each quote bought with it.
+        """
+        with np.errstate(divide='ignore'):
+            return 1 / self.rates.get(exchange_id, self.identity)[self.common, :]
+
+    def update(self, symbol, exchange_id, bid, ask):
+        """
+        Stores a conversion pair's ticker and recomputes the exchange's rates.
+
+        Returns:
+            numpy.ndarray: Indices of the quotes whose rates to or from the
+                           common quote changed on that exchange.
+        """
+        self.pair_quotes[symbol, exchange_id] = (bid, ask)
+        return self.refresh(symbol, exchange_id)
+
+    def refresh(self, symbol, exchange_id):
+        """
+        Recomputes the exchange's rates from its stored conversion quote of
+        symbol, e.g. after its fee changed. Returns what update returns.
+        """
+        if (symbol, exchange_id) not in self.pair_quotes:
+            return np.empty(0, dtype=np.intp)
+        bid, ask = self.pair_quotes[symbol, exchange_id]
+        base, quote = symbol.split('/')
+        i, j = self.quote_index[base], self.quote_index[quote]
+        direct = self.direct.get(exchange_id)
+        if direct is None:
+            direct = self.direct[exchange_id] = self.identity.copy()
+        fee = 1 - self.fee_percents.get((symbol, exchange_id), self.fee_percent) / 100
+        direct[i, j] = bid * fee if bid else np.nan
+        direct[j, i] = fee / ask if ask else np.nan
+
+        previous = np.stack([self.revenue_rates(exchange_id), self.cost_rates(exchange_id)])
+        rates = direct.copy()
+        # Best chain of at most n - 1 conversions. Pegs drifting apart can make
+        # a loop of conversions profitable; pinning the diagonal keeps such a
+        # loop (CycleFinder's to report) out of the rates.
+        for _ in range(len(self.quotes) - 2):
+            rates = np.fmax(rates, np.fmax.reduce(rates[:, :, None] * direct[None, :, :], axis=1))
+            np.fill_diagonal(rates, 1.0)
+        self.rates[exchange_id] = rates
+        current = np.stack([self.revenue_rates(exchange_id), self.cost_rates(exchange_id)])
+        changed = ~((previous == current) | (np.isnan(previous) & np.isnan(current)))
+        return np.flatnonzero(changed.any(axis=0))
+
+class CrossQuoteFinder:
+    """
+    Compares every base asset across all its quote variants and exchanges,
+    e.g. BTC/USDT on one exchange with BTC/USDC or BTC/USD on another.
+
+    Quotes live in dense base x quote x exchange arrays. Each one is also
+    kept re-priced into the common quote, fees included: asks through the
+    cost of acquiring the quote and bids through what selling it back
+    yields, both on the quote's own exchange, so a conversion round-trip is
+    charged on both legs. A ticker rewrites one cell; a conversion rate move
+    rewrites only the slice of its quote on its exchange. Detection treats every (quote, exchange) as a venue and
+    computes the whole buy/sell profit tensor of each base in one pass.
+    """
+    def __init__(self, bases=(), exchange_ids=(), quotes=QUOTE_CURRENCIES, common_quote=COMMON_QUOTE,
+                 fee_percent=DEFAULT_TAKER_FEE_PERCENT):
+        self.conversion = ConversionMatrix(quotes, common_quote, fee_percent)
+        self.quotes = self.conversion.quotes
+        self.quote_index = self.conversion.quote_index
+        self.default_fee_percent = fee_percent
+        self.bases = []
+        self.exchange_ids = []
+        self.base_index = {}
+        self.exchange_index = {}
+        n_quotes = len(self.quotes)
+        self.bids = np.full((0, n_quotes, 0), np.nan)
+        self.asks = np.full((0, n_quotes, 0), np.nan)
+        self.fees = np.full((0, n_quotes, 0), fee_percent)
+        self.costs = np.full((0, n_quotes, 0), np.nan) # Common quote paid per unit bought
+        self.revenues = np.full((0, n_quotes, 0), np.nan) # Common quote received per unit sold
+        self._reserve(max(len(bases), 8), max(len(exchange_ids), 4))
+        for base in bases:
+            self.base_id(base)
+        for ex_id in exchange_ids:
+            self.exchange_id(ex_id)
+
+    def _reserve(self, base_capacity, exchange_capacity):
+        rows, _, cols = self.bids.shape
+        if base_capacity <= rows and exchange_capacity <= cols:
+            return
+        shape = (max(base_capacity, rows), len(self.quotes), max(exchange_capacity, cols))
+        for name, fill in (('bids', np.nan), ('asks', np.nan), ('fees', self.default_fee_percent),
+                           ('costs', np.nan), ('revenues', np.nan)):
+            grown = np.full(shape, fill)
+            grown[:rows, :, :cols] = getattr(self, name)
+            setattr(self, name, grown)
+
+    def base_id(self, base):
+        idx = self.base_index.get(base)
+        if idx is None:
+            idx = len(self.bases)
+            if idx >= self.bids.shape[0]:
+                self._reserve(idx * 2, self.bids.shape[2])
+            self.bases.append(base)
+            self.base_index[base] = idx
+        return idx
+
+    def exchange_id(self, exchange_id):
+        idx = self.exchange_index.get(exchange_id)
+        if idx is None:
+            idx = len(self.exchange_ids)
+            if idx >= self.bids.shape[2]:
+                self._reserve(self.bids.shape[0], idx * 2)
+            self.exchange_ids.append(exchange_id)
+            self.exchange_index[exchange_id] = idx
+        return idx
+
+    def set_fee_percents(self, fee_percents):
+        """
+        Installs exact taker fees, e.g. from ExchangeManager.load_fee_table.
+
+        Args:
+            fee_percents (dict): {(symbol, exchange_id): taker fee percent}.
+        """
+        self.conversion.fee_percents.update(fee_percents)
+        touched = {} # {column: quote indices to re-price}
+        for (symbol, exchange_id), fee_percent in fee_percents.items():
+            base, _, quote = symbol.partition('/')
+            if quote not in self.quote_index:
+                continue
+            # Ids first: interning can reallocate the arrays
+            col = self.exchange_id(exchange_id)
+            if base in self.quote_index:
+                # A conversion fee changes the exchange's rates right away, not on the pair's next tick
+                touched.setdefault(col, set()).update(self.conversion.refresh(symbol, exchange_id).tolist())
+                continue
+            row = self.base_id(base)
+            self.fees[row, self.quote_index[quote], col] = fee_percent
+            touched.setdefault(col, set()).add(self.quote_index[quote])
+        for col, quotes in touched.items():
+            self._normalize(sorted(quotes), [col])
+
+    def on_ticker_update(self, symbol, exchange_id, ticker):
+        """
+        Ticker listener for DataManager. Conversion pairs update the rates and
+        re-price their quotes' slices; other markets with a tracked quote
+        update their own cell.
+        """
+        base, _, quote = symbol.partition('/')
+        if quote not in self.quote_index:
+            return
+        bid, ask = ticker.get('bid'), ticker.get('ask')
+        if base in self.quote_index:
+            col = self.exchange_id(exchange_id)
+            self._normalize(self.conversion.update(symbol, exchange_id, bid, ask), [col])
+            return
+        row, col = self.base_id(base), self.exchange_id(exchange_id)
+        q = self.quote_index[quote]
+        self.bids[row, q, col] = np.nan if bid is None else bid
+        self.asks[row, q, col] = np.nan if ask is None else ask
+        fee = self.fees[row, q, col] / 100
+        self.costs[row, q, col] = self.asks[row, q, col] * (1 + fee) * self.conversion.cost_rates(exchange_id)[q]
+        self.revenues[row, q, col] = (self.bids[row, q, col] * (1 - fee)
+                                      * self.conversion.revenue_rates(exchange_id)[q])
+
+    def exclude_quote(self, symbol, exchange_id):
+        """
+        Exclusion listener for DataManager: forgets a stale or excluded quote.
+        """
+        self.on_ticker_update(symbol, exchange_id, {'bid': None, 'ask': None})
+
+    def _normalize(self, quotes, cols=None):
+        """
+        Re-prices the given quote slices into the common quote, on the given
+        exchange columns or all of them, each at its own exchange's rates.
+        """
+        if len(quotes) == 0:
+            return
+        if cols is None:
+            cols = range(len(self.exchange_ids))
+        ex_ids = [self.exchange_ids[col] for col in cols]
+        quotes = np.asarray(quotes)
+        # [quote, column] rates, each column at its own exchange's
+        cost_rates = np.stack([self.conversion.cost_rates(ex_id) for ex_id in ex_ids], axis=1)[quotes]
+        revenue_rates = np.stack([self.conversion.revenue_rates(ex_id) for ex_id in ex_ids], axis=1)[quotes]
+        quotes = quotes[:, None]
+        cols = np.asarray(cols, dtype=np.intp)[None, :]
+        fees = self.fees[:, quotes, cols] / 100
+        self.costs[:, quotes, cols] = self.asks[:, quotes, cols] * (1 + fees) * cost_rates
+        self.revenues[:, quotes, cols] = self.bids[:, quotes, cols] * (1 - fees) * revenue_rates
+
+    def profit_tensor(self, include_same_quote=False):
+        """
+        Net profit percent of buying each base at one venue and selling at
+        another, both priced in the common quote.
+
+        Args:
+            include_same_quote (bool): Also keep pairs on the same quote, which
+                                       ArbitrageFinder already covers.
+
+        Returns:
+            numpy.ndarray: Shape (bases, venues, venues), venue = quote * exchanges + exchange.
+                           Untradable cells are -inf.
+        """
+        n_base, n_quote, n_ex = len(self.bases), len(self.quotes), len(self.exchange_ids)
+        costs = self.costs[:n_base, :, :n_ex].reshape(n_base, n_quote * n_ex)
+        revenues = self.revenues[:n_base, :, :n_ex].reshape(n_base, n_quote * n_ex)
+        cost = costs[:, :, None]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            net = (revenues[:, None, :] - cost) / cost * 100
+            tradable = revenues[:, None, :] > cost
+        venue_quote = np.repeat(np.arange(n_quote), n_ex)
+        venue_exchange = np.tile(np.arange(n_ex), n_quote)
+        # Buying in one quote and selling in another is a cross-quote trade even on one exchange
+        allowed = venue_quote[:, None] != venue_quote[None, :]
+        if include_same_quote:
+            allowed |= venue_exchange[:, None] != venue_exchange[None, :]
+        return np.where(tradable & allowed[None, :, :], net, -np.inf)
+
+    def find_opportunities(self, k=TOP_K_OPPORTUNITIES, min_profit_percent=MIN_PROFIT_PERCENT,
+                           include_same_quote=False):
+        """
+        Returns up to k cross-quote opportunities above min_profit_percent, best first.
+
+        Returns:
+            list: Dicts with 'base', 'buy_symbol', 'sell_symbol', 'buy_exchange',
+                  'sell_exchange', 'buy_price' and 'sell_price' in their own quotes,
+                  'buy_cost' and 'sell_revenue' per unit in the common quote with fees
+                  and conversion, 'net_profit_percent' and the fee percents.
+        """
+        if k <= 0 or not self.bases or not self.exchange_ids:
+            return []
+        net = self.profit_tensor(include_same_quote)
+        flat = net.ravel()
+        candidates = np.flatnonzero(flat > min_profit_percent)
+        if candidates.size > k:
+            candidates = candidates[np.argpartition(flat[candidates], -k)[-k:]]
+        candidates = candidates[np.argsort(-flat[candidates], kind='stable')]
+        n_ex = len(self.exchange_ids)
+        common = self.quotes[self.conversion.common]
+        opportunities = []
+        for b, buy, sell in zip(*(idx.tolist() for idx in np.unravel_index(candidates, net.shape))):
+            (buy_q, buy_e), (sell_q, sell_e) = divmod(buy, n_ex), divmod(sell, n_ex)
+            base = self.bases[b]
+            opportunities.append({
+                'base': base,
+                'buy_symbol': f'{base}/{self.quotes[buy_q]}',
+                'sell_symbol': f'{base}/{self.quotes[sell_q]}',
+                'buy_exchange': self.exchange_ids[buy_e],
+                'sell_exchange': self.exchange_ids[sell_e],
+                'buy_price': float(self.asks[b, buy_q, buy_e]),
+                'sell_price': float(self.bids[b, sell_q, sell_e]),
+                'common_quote': common,
+                'buy_cost': float(self.costs[b, buy_q, buy_e]),
+                'sell_revenue': float(self.revenues[b, sell_q, sell_e]),
+                'net_profit_percent': float(net[b, buy, sell]),
+                'estimated_buy_fee_percent': float(self.fees[b, buy_q, buy_e]),
+                'estimated_sell_fee_percent': float(self.fees[b, sell_q, sell_e])
+            })
+        return opportunities